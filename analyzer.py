@@ -1,15 +1,34 @@
 import argparse
-import json
+import math
+import os.path
 import statistics
-from typing import Dict, List
+from typing import Any, Dict, Iterable, List, Tuple
 
+import numpy  # type: ignore
+
+import changepoint
+import codec
 import const
+import jmh
 import logger
+import significance
+import store
 import utils
 from model import objects
 
 DELTA_THRESHOLD = 2  # seconds
 SPEEDUP_THRESHOLD = 2.0
+# test methods mostly take fractions of a second, so they are salient if their time grows relative to the previous one,
+# by more than a minimal delta below which the times of methods are too coarse to compare
+METHOD_SPEEDUP_THRESHOLD = 1.5
+METHOD_MIN_DELTA = 0.05  # seconds
+
+RESOURCE_METRICS = ['user_time', 'system_time', 'peak_rss', 'voluntary_switches', 'involuntary_switches',
+                    'read_bytes', 'write_bytes', 'instructions', 'cycles', 'cache_misses', 'branch_misses']
+# tolerated relative increase of every resource metric over the previous commit, hardware event counts vary least
+RESOURCE_THRESHOLDS = {'user_time': 0.2, 'system_time': 0.5, 'peak_rss': 0.2, 'voluntary_switches': 0.5,
+                       'involuntary_switches': 0.5, 'read_bytes': 0.5, 'write_bytes': 0.5, 'instructions': 0.05,
+                       'cycles': 0.05, 'cache_misses': 0.2, 'branch_misses': 0.2}
 
 
 def analyze(path_to_log_dir: str, path_to_jmh_reports: str) -> None:
@@ -17,49 +36,315 @@ def analyze(path_to_log_dir: str, path_to_jmh_reports: str) -> None:
     analyze_jmh_reports(path_to_jmh_reports)
 
 
-def analyze_junit_reports(path_to_log_dir: str) -> None:
-    """Reads data from test runs, computes benchmarking statistics and logs result."""
-    filenames = get_log_file_names(path_to_log_dir)
+def analyze_junit_reports(path_to_log_dir: str) -> List[objects.ProfileTarget]:
+    """Reads data from test runs, computes benchmarking statistics and logs result.
+
+    Reports are read from the results database. If it is empty, reports in the former one-JSON-file-per-test layout
+    are imported first. Test methods are analyzed like test classes, their salient commits and change points are
+    logged separately. Returns the salient commits together with the test classes that made them salient.
+    """
+    connection = store.open_store(path_to_log_dir)
+    if store.is_empty(connection) and len(get_log_file_names(path_to_log_dir)) > 0:
+        imported = store.import_json_reports(connection, path_to_log_dir)
+        print('Imported {n} JSON log files into the results database'.format(n=imported))
+
+    if store.is_empty(connection):
+        print('Error: No reports found in {log}'.format(log=path_to_log_dir))
+
+    runtime_matrix = store.load_runtime_matrix(connection)
+    resource_usage = store.load_resource_usage(connection)
+
+    matrix_statistics = analyze_runtime_matrix(runtime_matrix)
+    for test_index in range(len(runtime_matrix.test_names)):
+        test_statistics = create_benchmark_statistics(runtime_matrix, matrix_statistics, test_index)
+        logger.log_benchmark_statistics(test_statistics, dest_dir=path_to_log_dir)
+
+    salient_commits = find_salient_commits_in_matrix(runtime_matrix, matrix_statistics)
+    resource_changes = compare_resource_usage(runtime_matrix.commit_ids, resource_usage, salient_commits.keys())
+    logger.log_salient_commits(salient_commits, dest_dir=path_to_log_dir, resource_changes=resource_changes)
+
+    change_points = find_test_change_points(runtime_matrix)
+    logger.log_change_points(change_points, dest_dir=path_to_log_dir)
+
+    # the methods of one test class are analyzed at a time, so the times of all methods are never held at once
+    method_salient_commits = {}  # type: Dict[str, List[Dict]]
+    method_change_points = []  # type: List[objects.ChangePoint]
+    has_methods = False
+    for method_matrix in store.iter_method_runtime_matrices(connection):
+        has_methods = True
+        method_statistics = analyze_runtime_matrix(method_matrix, delta_threshold=math.inf,
+                                                   speedup_threshold=METHOD_SPEEDUP_THRESHOLD,
+                                                   min_delta=METHOD_MIN_DELTA, relative=True)
+        for commit_id, rows in find_salient_commits_in_matrix(method_matrix, method_statistics).items():
+            method_salient_commits.setdefault(commit_id, []).extend(rows)
+        method_change_points.extend(find_test_change_points(method_matrix))
+    connection.close()
+
+    if has_methods:
+        # most recent commit first, like the salient commits of the test classes
+        method_salient_commits = {commit_id: method_salient_commits[commit_id]
+                                  for commit_id in runtime_matrix.commit_ids if commit_id in method_salient_commits}
+        logger.log_salient_commits(method_salient_commits, dest_dir=path_to_log_dir, filename='salient_methods.txt')
+        logger.log_change_points(method_change_points, dest_dir=path_to_log_dir, filename='method_change_points.txt')
+
+    if len(resource_usage) > 0:
+        logger.log_salient_resource_usage(find_salient_resource_usage(runtime_matrix.commit_ids, resource_usage),
+                                          dest_dir=path_to_log_dir)
+        resource_change_points = find_resource_change_points(runtime_matrix.commit_ids, resource_usage)
+        logger.log_change_points(resource_change_points, dest_dir=path_to_log_dir,
+                                 filename='resource_change_points.txt')
+
+    return find_profile_targets(runtime_matrix, matrix_statistics)
+
+
+def analyze_runtime_matrix(runtime_matrix: objects.RuntimeMatrix, delta_threshold: float = None,
+                           speedup_threshold: float = None, min_delta: float = 0.0,
+                           relative: bool = False) -> objects.MatrixStatistics:
+    """Computes the statistics of analyze_report_list for every test at once.
+
+    Each commit is compared with the next older commit the same test was measured for, missing cells are skipped.
+    A cell is salient if its runtime grew by more than min_delta and either exceeds the delta or the speedup
+    threshold, which default to the current DELTA_THRESHOLD and SPEEDUP_THRESHOLD. Speedups of runtimes following
+    one of less than a second are 0, unless they are relative, e.g. for test methods.
+    """
+    # read at call time, the command line replaces the module defaults
+    delta_threshold = delta_threshold if delta_threshold is not None else DELTA_THRESHOLD
+    speedup_threshold = speedup_threshold if speedup_threshold is not None else SPEEDUP_THRESHOLD
+    runtimes = runtime_matrix.runtimes
+    commit_count, test_count = runtimes.shape
+    measured = ~numpy.isnan(runtimes)
+
+    # row index of the next older measured commit of each cell, commit_count if there is none
+    row_indices = numpy.where(measured, numpy.arange(commit_count)[:, None], commit_count)
+    nearest_measured = numpy.minimum.accumulate(row_indices[::-1], axis=0)[::-1]
+    next_rows = numpy.vstack([nearest_measured[1:], numpy.full((1, test_count), commit_count)])
+    padded_runtimes = numpy.vstack([runtimes, numpy.full((1, test_count), numpy.nan)])
+    next_runtimes = padded_runtimes[next_rows, numpy.arange(test_count)]
+
+    compared = measured & ~numpy.isnan(next_runtimes)
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        runtime_deltas = runtimes - next_runtimes
+        if relative:
+            speedups = runtimes / next_runtimes
+        else:
+            speedups = numpy.where(numpy.trunc(next_runtimes) != 0, runtimes / next_runtimes, 0.0)
+    salient = compared & (runtime_deltas > min_delta) & (
+        (runtime_deltas > delta_threshold) | (speedups > speedup_threshold))
+
+    counts = measured.sum(axis=0)
+    means = numpy.where(counts > 0, numpy.nansum(runtimes, axis=0) / numpy.maximum(counts, 1), 0.0)
+    squared_deviations = numpy.nansum((runtimes - means) ** 2, axis=0)
+    std_devs = numpy.where(counts >= 2, numpy.sqrt(squared_deviations / numpy.maximum(counts - 1, 1)), 0.0)
+
+    return objects.MatrixStatistics(runtime_deltas=runtime_deltas, speedups=speedups, compared=compared,
+                                    salient=salient, std_devs=std_devs)
+
+
+def create_benchmark_statistics(runtime_matrix: objects.RuntimeMatrix, matrix_statistics: objects.MatrixStatistics,
+                                test_index: int) -> objects.BenchmarkStatistics:
+    """Returns the statistics of a single test, like analyze_report_list does for its list of reports."""
+    rows = numpy.flatnonzero(matrix_statistics.compared[:, test_index])
+    junit_statistics_list = [create_matrix_cell_statistics(runtime_matrix, matrix_statistics, row, test_index)
+                             for row in rows]
+
+    return objects.BenchmarkStatistics(
+        test_name=runtime_matrix.test_names[test_index],
+        std_dev=float(matrix_statistics.std_devs[test_index]),
+        delta_threshold=DELTA_THRESHOLD,
+        speedup_threshold=SPEEDUP_THRESHOLD,
+        junit_statistics=junit_statistics_list)
+
+
+def find_salient_commits_in_matrix(runtime_matrix: objects.RuntimeMatrix,
+                                   matrix_statistics: objects.MatrixStatistics) -> Dict[str, List[Dict]]:
+    """Identify salient commits, like find_salient_commits, by only visiting the cells of the saliency mask."""
+    result = {}  # type: Dict[str, List[Dict]]
+    for row, test_index in zip(*numpy.nonzero(matrix_statistics.salient)):
+        data = dict(create_matrix_cell_statistics(runtime_matrix, matrix_statistics, row, test_index)._asdict())
+        data[const.TEST_NAME] = runtime_matrix.test_names[test_index]
+        result.setdefault(runtime_matrix.commit_ids[row], []).append(data)
+
+    return result
+
+
+def find_profile_targets(runtime_matrix: objects.RuntimeMatrix,
+                         matrix_statistics: objects.MatrixStatistics) -> List[objects.ProfileTarget]:
+    """Returns every salient commit with the test classes salient for it and the commit they were compared with."""
+    measured = ~numpy.isnan(runtime_matrix.runtimes)
+    test_names = {}  # type: Dict[Tuple[str, str], List[str]]
+    for row, test_index in zip(*numpy.nonzero(matrix_statistics.salient)):
+        # salient cells were compared, so an older measured commit exists
+        previous_row = row + 1 + numpy.flatnonzero(measured[row + 1:, test_index])[0]
+        key = (runtime_matrix.commit_ids[row], runtime_matrix.commit_ids[previous_row])
+        test_names.setdefault(key, []).append(runtime_matrix.test_names[test_index])
+
+    return [objects.ProfileTarget(commit_id=commit_id, previous_commit_id=previous_commit_id, test_classes=names,
+                                  benchmarks=[])
+            for (commit_id, previous_commit_id), names in test_names.items()]
+
+
+def compare_resource_usage(commit_ids: List[str], resource_usage: Dict[str, Dict[str, objects.ResourceUsage]],
+                           selected_commit_ids: Iterable[str]) -> Dict[str, List[Dict[str, Any]]]:
+    """Compares the resource usage of the selected commits to the one of the next older commit it was recorded for.
+
+    Commit ids are ordered from the most recent commit on. Returns one row per stage and metric by commit id, for
+    every selected commit with recorded usage that has a predecessor with recorded usage.
+    """
+    changes = {}  # type: Dict[str, List[Dict[str, Any]]]
+    positions = {commit_id: position for position, commit_id in enumerate(commit_ids)}
+    for commit_id in selected_commit_ids:
+        if commit_id not in resource_usage:
+            continue
+        previous_commit_id = next((older for older in commit_ids[positions[commit_id] + 1:]
+                                   if older in resource_usage), None)
+        if previous_commit_id is None:
+            continue
+
+        for stage, usage in sorted(resource_usage[commit_id].items()):
+            previous_usage = resource_usage[previous_commit_id].get(stage)
+            if previous_usage is None:
+                continue
+            for metric in RESOURCE_METRICS:
+                value, previous_value = getattr(usage, metric), getattr(previous_usage, metric)
+                if value is None or previous_value is None:
+                    continue
+                changes.setdefault(commit_id, []).append({
+                    'stage': stage, 'metric': metric, 'value': value, 'previous': previous_value,
+                    'ratio': value / previous_value if previous_value > 0 else float('nan')})
+
+    return changes
+
+
+def find_salient_resource_usage(commit_ids: List[str], resource_usage: Dict[str, Dict[str, objects.ResourceUsage]]
+                                ) -> Dict[str, List[Dict[str, Any]]]:
+    """Returns the stages and metrics of every commit whose usage grew by more than their RESOURCE_THRESHOLDS.
+
+    Commit ids are ordered from the most recent commit on. Every commit is compared with the next older commit its
+    usage was recorded for, independent of whether its runtimes changed.
+    """
+    recorded_commit_ids = [commit_id for commit_id in commit_ids if commit_id in resource_usage]
+    changes = compare_resource_usage(commit_ids, resource_usage, recorded_commit_ids)
+    salient_usage = {}  # type: Dict[str, List[Dict[str, Any]]]
+    for commit_id in recorded_commit_ids:
+        for change in changes.get(commit_id, []):
+            if change['ratio'] - 1 > RESOURCE_THRESHOLDS[change['metric']]:
+                salient_usage.setdefault(commit_id, []).append(change)
+
+    return salient_usage
+
+
+def find_resource_change_points(commit_ids: List[str], resource_usage: Dict[str, Dict[str, objects.ResourceUsage]]
+                                ) -> List[objects.ChangePoint]:
+    """Detects change points in the series of every resource metric of every stage, e.g. 'test instructions'.
+
+    Commit ids are ordered from the most recent commit on. Hardware event counts vary far less between runs than
+    runtimes, so they reveal small regressions that get lost in the noise of the runtimes.
+    """
+    series_list = []  # type: List[Tuple[str, List[str], List[float]]]
+    chronological_commit_ids = [commit_id for commit_id in reversed(commit_ids) if commit_id in resource_usage]
+    stages = sorted({stage for usage in resource_usage.values() for stage in usage})
+
+    for stage in stages:
+        for metric in RESOURCE_METRICS:
+            series = [(commit_id, getattr(resource_usage[commit_id][stage], metric))
+                      for commit_id in chronological_commit_ids if stage in resource_usage[commit_id]]
+            series = [(commit_id, value) for commit_id, value in series if value is not None]
+            if len(series) == 0:
+                continue
+            series_list.append(('{stage} {metric}'.format(stage=stage, metric=metric),
+                                [commit_id for commit_id, _ in series], [value for _, value in series]))
+
+    return changepoint.detect_change_points(series_list)
+
+
+def find_test_change_points(runtime_matrix: objects.RuntimeMatrix) -> List[objects.ChangePoint]:
+    """Detects change points in the runtime series of every test, skipping commits a test was not measured for."""
+    series_list = []  # type: List[Tuple[str, List[str], List[float]]]
+    chronological_runtimes = runtime_matrix.runtimes[::-1]
+    chronological_commit_ids = runtime_matrix.commit_ids[::-1]
+
+    for test_index, test_name in enumerate(runtime_matrix.test_names):
+        column = chronological_runtimes[:, test_index]
+        rows = numpy.flatnonzero(~numpy.isnan(column))
+        series_list.append((test_name, [chronological_commit_ids[row] for row in rows], column[rows]))
+
+    return changepoint.detect_change_points(series_list)
+
+
+def create_matrix_cell_statistics(runtime_matrix: objects.RuntimeMatrix, matrix_statistics: objects.MatrixStatistics,
+                                  row: int, test_index: int) -> objects.JUnitStatistics:
+    runtime = float(runtime_matrix.runtimes[row, test_index])
+    samples = runtime_matrix.samples.get((row, test_index), [runtime])
+    return create_junit_statistics(runtime_matrix.commit_ids[row], runtime,
+                                   float(matrix_statistics.speedups[row, test_index]),
+                                   float(matrix_statistics.runtime_deltas[row, test_index]), samples)
+
+
+def analyze_jmh_reports(path_to_reports: str, dest_dir: str = None) -> List[objects.ProfileTarget]:
+    """Compares the JMH reports of consecutive commits and logs the result.
+
+    Returns the commits with a regression together with the benchmarks that regressed.
+    """
+    jmh_commit_reports = list(codec.read_records(path_to_reports, codec.JMH))
+
+    jmh_statistics_list = compare_jmh_commit_reports(jmh_commit_reports)
+    logger.log_jmh_statistics(jmh_statistics_list, dest_dir=dest_dir)
+    logger.log_change_points(find_jmh_change_points(jmh_commit_reports), dest_dir=dest_dir,
+                             filename='jmh_change_points.txt')
+
+    return find_jmh_profile_targets(jmh_statistics_list)
+
+
+def find_jmh_profile_targets(jmh_statistics_list: List[objects.JmhStatistics]) -> List[objects.ProfileTarget]:
+    benchmarks = {}  # type: Dict[Tuple[str, str], List[str]]
+    for jmh_statistics in jmh_statistics_list:
+        if jmh_statistics.change == 'regression':
+            # strips the parameters, the benchmark is profiled with all of them
+            benchmark = jmh_statistics.benchmark.split('(')[0]
+            names = benchmarks.setdefault((jmh_statistics.commit_id, jmh_statistics.previous_commit_id), [])
+            if benchmark not in names:
+                names.append(benchmark)
+
+    return [objects.ProfileTarget(commit_id=commit_id, previous_commit_id=previous_commit_id, test_classes=[],
+                                  benchmarks=names)
+            for (commit_id, previous_commit_id), names in benchmarks.items()]
 
-    if len(filenames) is 0:
-        print('Error: No log files found in {log}'.format(log=path_to_log_dir))
 
-    statistics_list = []
-    for filename in filenames:
-        with open(filename) as file:
-            report_data_list = json.load(file)
-            commit_report_list = list(
-                map(objects.build_junit_commit_report, report_data_list))
-            test_statistics = analyze_report_list(commit_report_list)
-            statistics_list.append(test_statistics)
-            logger.log_benchmark_statistics(test_statistics, dest_dir=path_to_log_dir)
+def compare_jmh_commit_reports(jmh_commit_reports: List[objects.JmhCommitReport]) -> List[objects.JmhStatistics]:
+    """Compares every report with the one of the same benchmark, parameters and mode of the next older commit."""
+    random_state = numpy.random.RandomState(0)
+    jmh_statistics_list = []  # type: List[objects.JmhStatistics]
+    for commit_reports in group_jmh_commit_reports(jmh_commit_reports).values():
+        for i in range(len(commit_reports) - 1):
+            jmh_statistics_list.append(jmh.compare_jmh_reports(commit_reports[i], commit_reports[i + 1], random_state))
 
-    salient_commits = find_salient_commits(statistics_list)
-    logger.log_salient_commits(salient_commits, dest_dir=path_to_log_dir)
+    return jmh_statistics_list
 
 
-def analyze_jmh_reports(path_to_reports: str) -> None:
-    with open(path_to_reports) as file:
-        jmh_reports = json.load(file)
-        jmh_commit_reports = list(map(lambda x: objects.build_jmh_commit_report(x), jmh_reports))
+def find_jmh_change_points(jmh_commit_reports: List[objects.JmhCommitReport]) -> List[objects.ChangePoint]:
+    """Detects change points in the score series of every benchmark, in the unit of its most recent score."""
+    series_list = []  # type: List[Tuple[str, List[str], List[float]]]
+    for (benchmark, mode), commit_reports in group_jmh_commit_reports(jmh_commit_reports).items():
+        unit = commit_reports[0].jmh_report.primaryMetric.scoreUnit
+        chronological_reports = commit_reports[::-1]
+        series_list.append((
+            '{benchmark} ({mode}, {unit})'.format(benchmark=benchmark, mode=mode, unit=unit),
+            [commit_report.commit_id for commit_report in chronological_reports],
+            [jmh.convert_score(commit_report.jmh_report.primaryMetric, unit)
+             for commit_report in chronological_reports]))
 
-        mode = jmh_commit_reports[0].jmh_report.mode
+    return changepoint.detect_change_points(series_list)
 
-        jmh_statistics_list = []  # type: List[objects.JmhStatistics]
 
-        # we assume that the measurement mode is avgt, measured in s/op
-        for i in range(len(jmh_commit_reports) - 1):
-            current_commit = jmh_commit_reports[i].commit_id
-            current_score = jmh_commit_reports[i].jmh_report.primaryMetric.score
-            next_score = jmh_commit_reports[i + 1].jmh_report.primaryMetric.score
-            delta = current_score - next_score
+def group_jmh_commit_reports(
+        jmh_commit_reports: List[objects.JmhCommitReport]) -> Dict[Tuple[str, str], List[objects.JmhCommitReport]]:
+    """Groups reports by benchmark including its parameters, and mode, keeping their order, the most recent first."""
+    groups = {}  # type: Dict[Tuple[str, str], List[objects.JmhCommitReport]]
+    for commit_report in jmh_commit_reports:
+        key = (jmh.get_benchmark_name(commit_report.jmh_report), commit_report.jmh_report.mode)
+        groups.setdefault(key, []).append(commit_report)
 
-            jmh_statistics = objects.JmhStatistics(commit_id=current_commit,
-                                                   mode=mode,
-                                                   score=current_score,
-                                                   delta=delta)
-            jmh_statistics_list.append(jmh_statistics)
-        logger.log_jmh_statistics(jmh_statistics_list)
+    return groups
 
 
 def find_salient_commits(
@@ -122,12 +407,8 @@ def analyze_report_list(reports: List[objects.JUnitCommitReport]) -> objects.Ben
         runtime_delta = current_runtime - next_runtime
         speedup = current_runtime / next_runtime if int(next_runtime) is not 0 else 0
 
-        junit_statistics = objects.JUnitStatistics(
-            commit_id=current_commit,
-            runtime=current_runtime,
-            speedup=speedup,
-            runtime_delta=runtime_delta)
-
+        junit_statistics = create_junit_statistics(current_commit, current_runtime, speedup, runtime_delta,
+                                                   get_samples(reports[i].report))
         junit_statistics_list.append(junit_statistics)
 
     test_name = reports[0].report.test_name
@@ -141,6 +422,32 @@ def analyze_report_list(reports: List[objects.JUnitCommitReport]) -> objects.Ben
     return benchmark_statistics
 
 
+def create_junit_statistics(commit_id: str, runtime: float, speedup: float, runtime_delta: float,
+                            samples: List[float]) -> objects.JUnitStatistics:
+    """Creates a JUnitStatistics obj, summarizing the samples taken for the commit."""
+    if len(samples) == 1:
+        return objects.JUnitStatistics(commit_id=commit_id, runtime=runtime, speedup=speedup,
+                                       runtime_delta=runtime_delta, median=samples[0], ci_lower=samples[0],
+                                       ci_upper=samples[0])
+
+    ci_lower, ci_upper = significance.confidence_interval(samples)
+    return objects.JUnitStatistics(
+        commit_id=commit_id,
+        runtime=runtime,
+        speedup=speedup,
+        runtime_delta=runtime_delta,
+        sample_count=len(samples),
+        median=statistics.median(samples),
+        variance=statistics.variance(samples) if len(samples) >= 2 else 0.0,
+        ci_lower=ci_lower,
+        ci_upper=ci_upper)
+
+
+def get_samples(report: objects.JUnitReport) -> List[float]:
+    """Returns the runtimes of every invocation of a test class, reports without samples count as one."""
+    return report.samples if report.samples else [report.time_elapsed]
+
+
 def compute_std_deviation(reports: List[objects.JUnitCommitReport]) -> float:
     """Returns the std deviation over all test execution times in list of test data objects.
 
@@ -154,9 +461,9 @@ if __name__ == '__main__':
     parser = argparse.ArgumentParser(description='Analyze reports')
     parser.add_argument('directory', type=str,
                         help='Path to a directory where analyzable reports reside')
-    parser.add_argument('--delta-threshold', type=str,
+    parser.add_argument('--delta-threshold', type=float,
                         help='Set threshold to which the delta of the current commit compared to the next older one is tolerable')
-    parser.add_argument('--speedup-threshold', type=str,
+    parser.add_argument('--speedup-threshold', type=float,
                         help='Set threshold to which the relation of the current runtime to the former one is tolerable')
 
     args = parser.parse_args()
@@ -166,3 +473,6 @@ if __name__ == '__main__':
         SPEEDUP_THRESHOLD = args.speedup_threshold
 
     analyze_junit_reports(args.directory)
+    path_to_jmh_reports = codec.find_records(args.directory, const.JMH_REPORTS, const.LEGACY_JMH_REPORTS)
+    if os.path.isfile(path_to_jmh_reports):
+        analyze_jmh_reports(path_to_jmh_reports, dest_dir=args.directory)
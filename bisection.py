@@ -0,0 +1,120 @@
+import os.path
+import statistics
+from typing import Dict, List, Optional
+
+from git import Repo  # type: ignore
+
+import const
+import runner
+import significance
+from model import objects
+from run.maven import run_mvn_test
+
+SIGNIFICANCE_LEVEL = 0.05
+MIN_SAMPLES = 5
+
+
+def bisect(path_to_repo: str, good: str, bad: str, test_name: str, branch: str,
+           sample_count: int) -> objects.BisectResult:
+    """Finds the first commit between good (older) and bad (more recent) that made a test class slower.
+
+    Every probed commit is measured sample_count times. A commit counts as slow if its runtimes are significantly
+    higher than those of the good commit according to a Mann-Whitney U test, which takes O(log n) probes.
+    """
+    if sample_count < MIN_SAMPLES:
+        print('Raising the number of samples per commit to {n}.'.format(n=MIN_SAMPLES))
+        sample_count = MIN_SAMPLES
+
+    repo = Repo(path_to_repo)
+    # ordered from bad (index 0) to good (last index)
+    commits = [commit.hexsha for commit in runner.select_commits(repo, [bad, good], True, branch)]
+    samples = {}  # type: Dict[str, List[float]]
+    original_head = repo.head.commit.hexsha if repo.head.is_detached else repo.active_branch.name
+
+    def measure(commit_id: str) -> List[float]:
+        if commit_id not in samples:
+            repo.git.checkout(commit_id)
+            samples[commit_id] = measure_test(path_to_repo, test_name, sample_count)
+        return samples[commit_id]
+
+    # reverts the repo to its original state, also if a measurement fails
+    try:
+        good_samples = measure(commits[-1])
+        if not is_slower(measure(commits[0]), good_samples):
+            print('{bad} is not significantly slower than {good}, nothing to bisect.'.format(bad=bad, good=good))
+            return create_bisect_result(test_name, commits, None, samples)
+
+        slow_index = 0
+        fast_index = len(commits) - 1
+        while fast_index - slow_index > 1:
+            index = (slow_index + fast_index) // 2
+            if is_slower(measure(commits[index]), good_samples):
+                slow_index = index
+            else:
+                fast_index = index
+    finally:
+        repo.git.checkout(original_head)
+
+    return create_bisect_result(test_name, commits, slow_index, samples)
+
+
+def measure_test(path_to_repo: str, test_name: str, sample_count: int) -> List[float]:
+    """Runs a single test class sample_count times and returns its runtimes.
+
+    The test class is named like the --test option of surefire, either by its simple or its fully qualified name.
+    """
+    path_to_parent_pom = os.path.join(path_to_repo, const.POM)
+    test_class = strip_java_extension(test_name)
+
+    runtimes = []  # type: List[float]
+    for i in range(sample_count):
+        run_mvn_test(path_to_parent_pom, test_classes=[test_class])
+        reports = [report for report in runner.collect_junit_reports(path_to_parent_pom)
+                   if is_test_class(report.test_name, test_class)]
+        if len(reports) == 0:
+            print('Error: No report of {test} found.'.format(test=test_class))
+            exit(1)
+        runtimes.append(reports[0].time_elapsed)
+
+    return runtimes
+
+
+def is_slower(samples: List[float], baseline: List[float]) -> bool:
+    """Returns True iff the samples are significantly higher than the baseline."""
+    _, p_value = significance.mann_whitney_u(samples, baseline)
+    return p_value < SIGNIFICANCE_LEVEL and statistics.median(samples) > statistics.median(baseline)
+
+
+def create_bisect_result(test_name: str, commits: List[str], culprit_index: Optional[int],
+                         samples: Dict[str, List[float]]) -> objects.BisectResult:
+    """Compares the culprit with its predecessor, or the bad commit with the good one if there is no culprit."""
+    if culprit_index is None:
+        after, before = commits[0], commits[-1]
+    else:
+        after, before = commits[culprit_index], commits[culprit_index + 1]
+
+    # the bisection always ends with both neighbours measured
+    before_samples = samples[before]
+    _, p_value = significance.mann_whitney_u(samples[after], before_samples)
+
+    return objects.BisectResult(
+        test_name=test_name,
+        good=commits[-1],
+        bad=commits[0],
+        culprit=commits[culprit_index] if culprit_index is not None else None,
+        median_before=statistics.median(before_samples),
+        median_after=statistics.median(samples[after]),
+        p_value=p_value,
+        confidence=1 - p_value,
+        measured_commits=len(samples))
+
+
+def is_test_class(report_test_name: str, test_class: str) -> bool:
+    """Returns True iff a report belongs to the test class, given by its simple or its fully qualified name."""
+    if '.' in test_class:
+        return report_test_name == test_class
+    return report_test_name.split('.')[-1] == test_class
+
+
+def strip_java_extension(test_name: str) -> str:
+    return test_name[:-len('.java')] if test_name.endswith('.java') else test_name
@@ -0,0 +1,157 @@
+import os
+import shutil
+import tarfile
+import tempfile
+from typing import Dict, List, Optional, Tuple
+
+from git import Repo  # type: ignore
+
+import cache
+import const
+import impact
+import utils
+from model import objects
+from run.java import fetch_java_version
+from run.maven import fetch_maven_version
+
+# python versions with extraction filters also reject unsafe modes and metadata besides the paths checked here
+EXTRACTION_OPTIONS = {'filter': 'data'} if hasattr(tarfile, 'data_filter') else {}
+
+# java and maven versions of the current process, fetched once since every commit is built with the same tools
+_environment = None  # type: Optional[str]
+
+
+def get_module_keys(path_to_repo: str, modules: List[objects.MavenModule]) -> Dict[str, str]:
+    """Returns the build cache key of every module of the revision checked out in path_to_repo, by module path.
+
+    A key covers the pom and the source folder of a module, and the keys of its parent and of the modules of the
+    reactor it depends on, so a module is rebuilt whenever anything it is compiled against changes.
+    """
+    repo = Repo(path_to_repo)
+    by_coordinates = {impact.get_coordinates(module): module for module in modules}
+    keys = {}  # type: Dict[Tuple[str, str], str]
+
+    def get_key(module: objects.MavenModule) -> str:
+        coordinates = impact.get_coordinates(module)
+        if coordinates not in keys:
+            keys[coordinates] = ''  # guards against cyclic dependencies
+            module_dir = impact.get_relative_path(path_to_repo, module.path)
+            entries = repo.git.ls_tree('HEAD', '--', os.path.join(module_dir, const.POM),
+                                       os.path.join(module_dir, 'src'))
+            upstream_keys = sorted(get_key(by_coordinates[upstream])
+                                   for upstream in impact.get_upstream_coordinates(module)
+                                   if upstream in by_coordinates)
+            keys[coordinates] = cache.hash_values(['module', entries, get_environment()] + upstream_keys)
+        return keys[coordinates]
+
+    return {impact.get_relative_path(path_to_repo, module.path): get_key(module) for module in modules}
+
+
+def restore_outputs(path_to_repo: str, module_keys: Dict[str, str], build_cache_dir: str) -> List[str]:
+    """Replaces the target dir of every module by its cached one, if any, and returns the paths of these modules.
+
+    Target dirs of modules without cached outputs are removed, like mvn clean would do. Restored files are given the
+    current time, so maven regards them as newer than the sources and does not compile them again.
+    """
+    restored = []  # type: List[str]
+    for module_dir, key in module_keys.items():
+        path_to_module = os.path.join(path_to_repo, module_dir)
+        shutil.rmtree(os.path.join(path_to_module, const.MVN_TARGET_DIR), ignore_errors=True)
+
+        entry = get_entry_path(build_cache_dir, key)
+        try:
+            with tarfile.open(entry) as archive:
+                members = archive.getmembers()
+                if not all(is_target_member(member) for member in members):
+                    print('Ignoring build cache entry {entry}, which holds more than files of a target dir'.format(
+                        entry=entry))
+                    continue
+                archive.extractall(path_to_module, members, **EXTRACTION_OPTIONS)
+        except FileNotFoundError:
+            continue
+
+        # marks the entry as recently used
+        os.utime(entry)
+        touch_tree(os.path.join(path_to_module, const.MVN_TARGET_DIR))
+        restored.append(module_dir)
+
+    print('Restored the build outputs of {n} of {total} modules'.format(n=len(restored), total=len(module_keys)))
+    return restored
+
+
+def is_target_member(member: tarfile.TarInfo) -> bool:
+    """Returns whether an archive member is a file or dir inside the target dir, so extracting it writes nowhere else"""
+    path = os.path.normpath(member.name)
+    return (member.isfile() or member.isdir()) and not os.path.isabs(path) and (
+        path == const.MVN_TARGET_DIR or path.startswith(const.MVN_TARGET_DIR + os.sep))
+
+
+def store_outputs(path_to_repo: str, module_keys: Dict[str, str], build_cache_dir: str, max_size: int) -> None:
+    """Stores the target dir of the given modules, skipping test reports, and evicts the least recently used entries.
+
+    Entries are written to a temporary file first, so concurrent workers never read a partial entry.
+    """
+    utils.create_dir(build_cache_dir)
+    for module_dir, key in module_keys.items():
+        path_to_target = os.path.join(path_to_repo, module_dir, const.MVN_TARGET_DIR)
+        if not os.path.isdir(path_to_target):
+            continue
+
+        file_descriptor, temp_path = tempfile.mkstemp(dir=build_cache_dir, suffix='.tmp')
+        os.close(file_descriptor)
+        with tarfile.open(temp_path, 'w') as archive:
+            archive.add(path_to_target, arcname=const.MVN_TARGET_DIR, filter=exclude_reports)
+        os.replace(temp_path, get_entry_path(build_cache_dir, key))
+
+    evict_entries(build_cache_dir, max_size)
+
+
+def evict_entries(build_cache_dir: str, max_size: int) -> None:
+    """Removes the least recently used entries until the total size of the build cache does not exceed max_size."""
+    entries = []  # type: List[Tuple[float, int, str]]
+    for filename in utils.get_filenames_by_type(build_cache_dir, 'tar'):
+        try:
+            stat = os.stat(filename)
+        except FileNotFoundError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, filename))
+
+    total_size = sum(size for _, size, _ in entries)
+    for _, size, filename in sorted(entries):
+        if total_size <= max_size:
+            break
+        try:
+            os.remove(filename)
+        except FileNotFoundError:
+            pass
+        total_size -= size
+
+
+def exclude_reports(info: tarfile.TarInfo) -> Optional[tarfile.TarInfo]:
+    """Excludes the surefire reports, which belong to a single test run, from an entry."""
+    reports_dir = os.path.join(const.MVN_TARGET_DIR, const.SUREFIRE_REPORTS_DIR)
+    if info.name == reports_dir or info.name.startswith(reports_dir + os.sep):
+        return None
+    return info
+
+
+def touch_tree(path: str) -> None:
+    for dir_path, _, filenames in os.walk(path):
+        for filename in filenames:
+            os.utime(os.path.join(dir_path, filename))
+
+
+def get_environment() -> str:
+    global _environment
+    if _environment is None:
+        _environment = cache.hash_values([fetch_java_version(), fetch_maven_version()])
+    return _environment
+
+
+def get_default_build_cache_dir(path_to_log: str) -> str:
+    """Returns path to the dir where build outputs are cached."""
+    return os.path.join(path_to_log, const.BUILD_CACHE_DIR)
+
+
+def get_entry_path(build_cache_dir: str, key: str) -> str:
+    return os.path.join(build_cache_dir, key + '.tar')
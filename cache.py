@@ -0,0 +1,116 @@
+import hashlib
+import json
+import os.path
+import platform
+from typing import List, Optional, Set
+
+from git import Commit, Repo  # type: ignore
+
+import codec
+import const
+import utils
+from model import objects
+from run.java import fetch_java_version
+from run.maven import fetch_maven_version
+
+
+def get_environment_fingerprint(path_to_pipeline: Optional[str]) -> str:
+    """Returns a hash over everything besides the revision itself that has an effect on measured runtimes."""
+    cpu_model = ''
+    if os.path.isfile('/proc/cpuinfo'):
+        with open('/proc/cpuinfo') as file:
+            cpu_model = next((line for line in file if line.startswith('model name')), '')
+
+    environment = [platform.node(), platform.machine(), cpu_model, fetch_java_version(), fetch_maven_version(),
+                   os.path.abspath(os.path.expanduser(path_to_pipeline)) if path_to_pipeline is not None else '']
+    return hash_values(environment)
+
+
+def build_cache_keys(repo: Repo, commit: Commit, settings: objects.MeasurementSettings, environment: str,
+                     measure_cpus: Set[int] = None, worker_cpus: List[Set[int]] = None,
+                     worker_memory: str = None) -> List[str]:
+    """Returns the keys a measurement of the given commit is stored under.
+
+    The first key is derived from the hash of the complete tree of the commit. The second one only covers the poms
+    and source folders of every maven module, so commits that merely change documentation or other files outside of
+    the modules share it with their predecessor. The noise controls of the measurement, i.e. warmups, quiescence
+    limits, the cpus it is pinned to and the cpus and heap limit of parallel workers, are part of both keys.
+    """
+    selection = ','.join(sorted(settings.test_classes)) if settings.test_classes is not None else ''
+    pipeline = json.dumps(settings.pipeline._asdict(), sort_keys=True) if settings.pipeline is not None else ''
+    adaptive = json.dumps(settings.adaptive._asdict(), sort_keys=True) if settings.adaptive is not None else ''
+    flink = json.dumps(settings.flink._asdict(), sort_keys=True) if settings.flink is not None else ''
+    quiescence = json.dumps(settings.quiescence._asdict(), sort_keys=True) if settings.quiescence is not None else ''
+    pinning = ','.join(str(cpu) for cpu in sorted(measure_cpus)) if measure_cpus is not None else ''
+    # a commit may be measured by any of the workers
+    workers = (';'.join(','.join(str(cpu) for cpu in sorted(cpus)) for cpus in worker_cpus)
+               if worker_cpus is not None else '')
+    # change impact measurements mostly hold results carried over from the previous commit
+    options = [selection, str(settings.invocation_count), str(settings.change_impact), pipeline, adaptive,
+               str(settings.sample_resources), str(settings.count_events), flink, str(settings.warmup_count),
+               quiescence, pinning, workers, worker_memory or '', environment]
+
+    tree_key = hash_values(['tree', commit.tree.hexsha] + options)
+    source_key = hash_values(['source', get_source_fingerprint(repo, commit)] + options)
+    return [tree_key, source_key]
+
+
+def get_source_fingerprint(repo: Repo, commit: Commit) -> str:
+    """Returns a hash over the pom and the source folder of every module of the project at the given commit."""
+    filenames = repo.git.ls_tree('-r', '--name-only', commit.hexsha).splitlines()
+    module_dirs = [os.path.dirname(name) for name in filenames if os.path.basename(name) == const.POM]
+
+    paths = []
+    for module_dir in module_dirs:
+        paths.append(os.path.join(module_dir, const.POM))
+        paths.append(os.path.join(module_dir, 'src'))
+
+    # lists the object ids of the module poms and source trees, ignoring paths that do not exist
+    entries = repo.git.ls_tree(commit.hexsha, '--', *paths)
+    return hash_values(sorted(entries.splitlines()))
+
+
+def load_measurement(cache_dir: str, keys: List[str], commit_id: str) -> Optional[objects.CommitMeasurement]:
+    """Returns the measurement stored under the first known key, attributed to the given commit, or None."""
+    for key in keys:
+        path = get_entry_path(cache_dir, key)
+        if os.path.isfile(path):
+            with open(path) as file:
+                measurement = codec.decode_measurement(file.read())
+            print('Reusing cached measurement of {cached} for {commit}'.format(cached=measurement.commit_id,
+                                                                               commit=commit_id))
+            return assign_commit(measurement, commit_id)
+
+    return None
+
+
+def store_measurement(cache_dir: str, keys: List[str], measurement: objects.CommitMeasurement) -> None:
+    """Stores a measurement under each of the given keys."""
+    utils.create_dir(cache_dir)
+    data = codec.encode_measurement(measurement)
+    for key in keys:
+        with open(get_entry_path(cache_dir, key), 'w') as file:
+            file.write(data)
+
+
+def assign_commit(measurement: objects.CommitMeasurement, commit_id: str) -> objects.CommitMeasurement:
+    """Returns a copy of the measurement whose reports are linked to the given commit."""
+    return measurement._replace(
+        commit_id=commit_id,
+        junit_reports=[report._replace(commit_id=commit_id) for report in measurement.junit_reports],
+        jmh_reports=[report._replace(commit_id=commit_id) for report in measurement.jmh_reports],
+        flink_reports=[report._replace(commit_id=commit_id) for report in measurement.flink_reports]
+        if measurement.flink_reports is not None else None)
+
+
+def get_default_cache_dir(path_to_log: str) -> str:
+    """Returns path to the dir where measurements are cached."""
+    return os.path.join(path_to_log, const.CACHE_DIR)
+
+
+def get_entry_path(cache_dir: str, key: str) -> str:
+    return os.path.join(cache_dir, key + '.json')
+
+
+def hash_values(values: List[str]) -> str:
+    return hashlib.sha1('\0'.join(values).encode('utf-8')).hexdigest()
@@ -0,0 +1,154 @@
+from typing import Any, List, Optional, Sequence, Tuple
+
+import numpy  # type: ignore
+
+from model import objects
+
+SIGNIFICANCE_LEVEL = 0.05  # false discovery rate of the change points found in one call
+PERMUTATIONS = 9999  # most permutations a split is tested with, bounds the smallest p-value
+PERMUTATION_CHUNK = 100  # permutations drawn at once, bounds the memory to PERMUTATION_CHUNK * n values
+EXCEEDANCES = 10  # permuted maxima reaching the observed one after which a split is clearly not significant
+MIN_SEGMENT_LENGTH = 3
+
+
+def detect_change_points(series_list: List[Tuple[str, List[str], Sequence[float]]]) -> List[objects.ChangePoint]:
+    """Finds the commits at which the mean of each series shifts, ordered by series and from the oldest commit on.
+
+    Every series is a name, commits and values in chronological order, the oldest commit first. It is split
+    recursively (binary segmentation) at the point maximizing the standardized CUSUM statistic, as long as a
+    permutation test finds the split significant. The splits of all series tested in the same round of the recursion
+    are corrected for multiple testing by the Benjamini-Hochberg procedure, and their adjusted p-values are reported.
+    A split costs O(PERMUTATIONS * n) time and O(PERMUTATION_CHUNK * n) memory at most, regardless of the number of
+    series, and far less if its significance is clear early.
+    """
+    series_values = [numpy.asarray(values, dtype=numpy.float64) for _, _, values in series_list]
+    random_state = numpy.random.RandomState(0)
+
+    splits = [[] for _ in series_list]  # type: List[List[Tuple[int, float]]]
+    segments = [(series_index, 0, len(values)) for series_index, values in enumerate(series_values)]
+    while len(segments) > 0:
+        candidates = []  # type: List[Tuple[int, int, int, int, float]]
+        for series_index, start, end in segments:
+            split = find_split(series_values[series_index][start:end])
+            if split is not None:
+                candidates.append((series_index, start, end, start + split[0], split[1]))
+
+        p_values = compute_p_values([series_values[series_index][start:end]
+                                     for series_index, start, end, _, _ in candidates],
+                                    [statistic for _, _, _, _, statistic in candidates], random_state)
+        segments = []
+        for (series_index, start, end, index, _), p_value in zip(candidates, adjust_p_values(p_values)):
+            if p_value >= SIGNIFICANCE_LEVEL:
+                continue
+            splits[series_index].append((index, p_value))
+            segments.extend([(series_index, start, index), (series_index, index, end)])
+
+    change_points = []  # type: List[objects.ChangePoint]
+    for (name, commit_ids, _), values, series_splits in zip(series_list, series_values, splits):
+        change_points.extend(create_change_points(name, commit_ids, values, sorted(series_splits)))
+
+    return change_points
+
+
+def create_change_points(name: str, commit_ids: List[str], values, splits: List[Tuple[int, float]]
+                         ) -> List[objects.ChangePoint]:
+    """Returns a change point for each of the ordered splits of a series, comparing the segments next to it."""
+    boundaries = [0] + [index for index, _ in splits] + [len(values)]
+
+    change_points = []  # type: List[objects.ChangePoint]
+    for i, (index, p_value) in enumerate(splits):
+        mean_before = float(values[boundaries[i]:index].mean())
+        mean_after = float(values[index:boundaries[i + 2]].mean())
+        shift = mean_after - mean_before
+        change_points.append(objects.ChangePoint(
+            name=name,
+            commit_id=commit_ids[index],
+            mean_before=mean_before,
+            mean_after=mean_after,
+            shift=shift,
+            relative_shift=shift / mean_before if mean_before != 0 else 0.0,
+            p_value=p_value))
+
+    return change_points
+
+
+def adjust_p_values(p_values: List[float]) -> List[float]:
+    """Returns the Benjamini-Hochberg adjusted p-values, in the order of the given ones.
+
+    Rejecting every hypothesis whose adjusted p-value is below a level keeps the expected share of false rejections
+    among all rejections below that level.
+    """
+    count = len(p_values)
+    if count == 0:
+        return []
+
+    order = numpy.argsort(p_values)
+    scaled = numpy.asarray(p_values, dtype=numpy.float64)[order] * count / numpy.arange(1, count + 1)
+    # the adjusted p-value of a rank is the smallest scaled p-value of it and all higher ranks
+    adjusted = numpy.minimum(numpy.minimum.accumulate(scaled[::-1])[::-1], 1.0)
+
+    result = numpy.empty(count)
+    result[order] = adjusted
+    return [float(p_value) for p_value in result]
+
+
+def find_split(segment) -> Optional[Tuple[int, float]]:
+    """Returns the most likely position of a mean shift within the segment and its standardized CUSUM statistic."""
+    if len(segment) < 2 * MIN_SEGMENT_LENGTH:
+        return None
+
+    statistics = compute_split_statistics(segment[numpy.newaxis, :])[0]
+    best = int(numpy.argmax(statistics))
+    if statistics[best] <= 0:
+        return None
+    return best + MIN_SEGMENT_LENGTH, float(statistics[best])
+
+
+def compute_p_values(segments: List[Any], statistics: List[float], random_state: numpy.random.RandomState
+                     ) -> List[float]:
+    """Returns the permutation p-values of the splits of the segments, drawn until their significance is clear.
+
+    Each pass draws PERMUTATION_CHUNK permutations of every undecided segment. A split is decided once EXCEEDANCES
+    permuted maxima reached its statistic, its p-value is then estimated by their share (Besag and Clifford), once
+    the Benjamini-Hochberg procedure finds it significant by the p-value (1 + exceedances) / (1 + permutations),
+    which never underestimates the exact one, or after PERMUTATIONS permutations.
+    """
+    count = len(segments)
+    permutations = numpy.zeros(count, dtype=numpy.int64)
+    exceedances = numpy.zeros(count, dtype=numpy.int64)
+    decided = numpy.zeros(count, dtype=bool)
+    p_values = numpy.ones(count)
+    while not decided.all():
+        for i in numpy.flatnonzero(~decided):
+            drawn = min(PERMUTATION_CHUNK, PERMUTATIONS - int(permutations[i]))
+            permuted_segments = segments[i][numpy.argsort(random_state.rand(drawn, len(segments[i])), axis=1)]
+            permuted_maxima = compute_split_statistics(permuted_segments).max(axis=1)
+            running_exceedances = exceedances[i] + numpy.cumsum(permuted_maxima >= statistics[i])
+            if running_exceedances[-1] >= EXCEEDANCES:
+                permutations[i] += int(numpy.argmax(running_exceedances >= EXCEEDANCES)) + 1
+                exceedances[i] = EXCEEDANCES
+                decided[i] = True
+            else:
+                permutations[i] += drawn
+                exceedances[i] = running_exceedances[-1]
+                decided[i] = permutations[i] >= PERMUTATIONS
+
+        with numpy.errstate(divide='ignore', invalid='ignore'):
+            p_values = numpy.where(exceedances >= EXCEEDANCES, exceedances / permutations,
+                                   (exceedances + 1) / (permutations + 1))
+        decided |= numpy.array(adjust_p_values(list(p_values))) < SIGNIFICANCE_LEVEL
+
+    return [float(p_value) for p_value in p_values]
+
+
+def compute_split_statistics(series):
+    """Returns |mean(left) - mean(right)| * sqrt(k * (n - k) / n) for every admissible split k of every row."""
+    length = series.shape[1]
+    positions = numpy.arange(MIN_SEGMENT_LENGTH, length - MIN_SEGMENT_LENGTH + 1)
+
+    cumulative_sums = numpy.cumsum(series, axis=1)
+    left_sums = cumulative_sums[:, positions - 1]
+    right_sums = cumulative_sums[:, -1:] - left_sums
+
+    mean_differences = left_sums / positions - right_sums / (length - positions)
+    return numpy.abs(mean_differences) * numpy.sqrt(positions * (length - positions) / length)
@@ -0,0 +1,132 @@
+import json
+import os.path
+import sys
+from typing import Any, Callable, Dict, Iterable, Iterator, List
+
+from model import objects
+
+FORMAT = 'perfdelta-records'
+# bumped whenever a field of an encoded record is removed or moved, appending fields with a default keeps it
+FORMAT_VERSION = 1
+
+JUNIT = 'junit'
+JMH = 'jmh'
+FLINK = 'flink'
+MEASUREMENT = 'measurement'
+
+SEPARATORS = (',', ':')
+
+
+def encode(record: Any) -> str:
+    """Encodes a record as a JSON array of its fields in declaration order, nested records as nested arrays.
+
+    Named tuples are tuples, so the json module encodes them as arrays directly, without converting them to dicts.
+    """
+    return json.dumps(record, separators=SEPARATORS)
+
+
+def write_records(path: str, kind: str, records: Iterable[Any]) -> None:
+    """Writes records of one kind to a file, one per line, after a header naming the kind and the format version."""
+    with open(path, 'w') as file:
+        file.write(encode_header(kind) + '\n')
+        for record in records:
+            file.write(encode(record) + '\n')
+
+
+def find_records(directory: str, filename: str, legacy_filename: str) -> str:
+    """Returns the path of a file of records in directory, or of the one named as before if only that one exists."""
+    path = os.path.join(directory, filename)
+    legacy_path = os.path.join(directory, legacy_filename)
+    return legacy_path if not os.path.isfile(path) and os.path.isfile(legacy_path) else path
+
+
+def read_records(path: str, kind: str) -> Iterator[Any]:
+    """Yields the records of a file written by write_records, one line at a time.
+
+    Files in the former layout, a JSON array of dicts, are read as well.
+    """
+    with open(path) as file:
+        first_line = file.readline()
+        if first_line.lstrip().startswith('['):
+            file.seek(0)
+            yield from map(LEGACY_DECODERS[kind], json.load(file))
+            return
+
+        check_header(json.loads(first_line), kind, path)
+        decoder = DECODERS[kind]
+        for line in file:
+            if len(line) > 1:
+                yield decoder(json.loads(line))
+
+
+def encode_measurement(measurement: objects.CommitMeasurement) -> str:
+    return encode_header(MEASUREMENT) + '\n' + encode(measurement)
+
+
+def decode_measurement(data: str) -> objects.CommitMeasurement:
+    """Decodes a measurement encoded by encode_measurement, or a JSON object of the former layout."""
+    first_line, _, body = data.partition('\n')
+    header = json.loads(first_line)
+    if 'format' not in header:
+        # the former layout is a single line holding the measurement as an object
+        return objects.build_commit_measurement(header)
+
+    check_header(header, MEASUREMENT, 'measurement')
+    return decode_commit_measurement(json.loads(body))
+
+
+def encode_header(kind: str) -> str:
+    return json.dumps({'format': FORMAT, 'version': FORMAT_VERSION, 'kind': kind}, separators=SEPARATORS)
+
+
+def check_header(header: Dict[str, Any], kind: str, source: str) -> None:
+    if header.get('format') != FORMAT or header.get('version') != FORMAT_VERSION or header.get('kind') != kind:
+        print('Error: {source} does not hold {kind} records of format version {version}'.format(
+            source=source, kind=kind, version=FORMAT_VERSION))
+        exit(1)
+
+
+# Decoders rebuild records from their positional fields. Trailing fields that are missing take their defaults.
+# Commit ids and test names recur for every commit and test, so they are interned and stored once.
+
+def decode_junit_commit_report(row: List[Any]) -> objects.JUnitCommitReport:
+    report = row[1]
+    return objects.JUnitCommitReport(commit_id=sys.intern(row[0]),
+                                     report=objects.JUnitReport(sys.intern(report[0]), *report[1:]))
+
+
+def decode_jmh_commit_report(row: List[Any]) -> objects.JmhCommitReport:
+    report = row[1]
+    return objects.JmhCommitReport(commit_id=sys.intern(row[0]), jmh_report=objects.JmhReport(
+        sys.intern(report[0]), *report[1:11], objects.PrimaryMetric(*report[11]), *report[12:]))
+
+
+def decode_flink_commit_report(row: List[Any]) -> objects.FlinkCommitReport:
+    report = row[1]
+    vertices = [objects.FlinkVertexMetrics(*vertex) for vertex in report[5]]
+    return objects.FlinkCommitReport(commit_id=sys.intern(row[0]),
+                                     flink_report=objects.FlinkJobReport(*report[:5], vertices, *report[6:]))
+
+
+def decode_commit_measurement(row: List[Any]) -> objects.CommitMeasurement:
+    fields = row + [None] * (6 - len(row))
+    return objects.CommitMeasurement(
+        commit_id=sys.intern(fields[0]),
+        junit_reports=[decode_junit_commit_report(report) for report in fields[1]],
+        jmh_reports=[decode_jmh_commit_report(report) for report in fields[2]],
+        tested_modules=fields[3],
+        resource_usage=[objects.ResourceUsage(*usage) for usage in fields[4]] if fields[4] is not None else None,
+        flink_reports=[decode_flink_commit_report(report) for report in fields[5]] if fields[5] is not None else None)
+
+
+DECODERS = {
+    JUNIT: decode_junit_commit_report,
+    JMH: decode_jmh_commit_report,
+    FLINK: decode_flink_commit_report,
+}  # type: Dict[str, Callable[[List[Any]], Any]]
+
+LEGACY_DECODERS = {
+    JUNIT: objects.build_junit_commit_report,
+    JMH: objects.build_jmh_commit_report,
+    FLINK: objects.build_flink_commit_report,
+}  # type: Dict[str, Callable[[Dict[str, Any]], Any]]
@@ -1,14 +1,25 @@
 POM = 'pom.xml'
 RESULTS_DIRECTORY = 'perfdelta-results'
+WORKTREES_DIRECTORY = 'perfdelta-worktrees'
 MVN_TARGET_DIR = 'target'
 SUREFIRE_REPORTS_DIR = 'surefire-reports'
 STATISTICS_DIR = 'statistics'
+CACHE_DIR = 'cache'
+BUILD_CACHE_DIR = 'build-cache'
+PROFILES_DIR = 'profiles'
+RESULTS_DATABASE = 'perfdelta.db'
+JMH_REPORTS = 'jmh_reports.jsonl'
+LEGACY_JMH_REPORTS = 'jmh_reports.json'  # written as a JSON array by earlier versions
+JMH_RESULT = 'jmh-result.json'
+FLINK_REPORTS = 'flink_reports.jsonl'
+PIPELINE_PATH = '~/Code/gradoop-jmh-pipeline'
+PIPELINE_JAR = 'gradoop-pipeline-1.0-SNAPSHOT-shaded.jar'
 
 ###########################
 # Report object constants #
 ###########################
 
-COMMIT = 'commit'
+COMMIT = 'commit_id'
 REPORT = 'report'
 NUMBER_TESTS = 'test_run'
 FAILURES = 'failures'
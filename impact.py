@@ -0,0 +1,171 @@
+import os.path
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from git import Repo  # type: ignore
+
+import const
+from model import objects
+from parse import parse_pom
+
+SOURCE_EXTENSIONS = {'.java', '.kt', '.scala', '.groovy'}
+
+
+def load_reactor(path_to_repo: str) -> List[objects.MavenModule]:
+    """Returns every module of the maven project checked out in path_to_repo."""
+    path_to_parent_pom = os.path.join(path_to_repo, const.POM)
+    return parse_pom.read_reactor(path_to_parent_pom)
+
+
+def select_affected_modules(path_to_repo: str, modules: List[objects.MavenModule], commit_id: str,
+                            previous_commit_id: str) -> Optional[List[str]]:
+    """Returns paths (relative to the project root) of the modules whose tests have to be rerun for a commit.
+
+    These are the modules containing changes to the previous commit plus every module depending on them, directly or
+    via inheritance. Returns None if the whole project is affected, e.g. because the parent pom changed.
+    """
+    module_dirs = {get_relative_path(path_to_repo, module.path): module for module in modules}
+
+    changed_files = Repo(path_to_repo).git.diff('--name-only', previous_commit_id, commit_id).splitlines()
+    changed_modules = find_changed_modules(changed_files, list(module_dirs.keys()))
+    if os.curdir in changed_modules:
+        return None
+
+    affected = add_dependents([module_dirs[path] for path in changed_modules], modules)
+    affected_dirs = sorted(get_relative_path(path_to_repo, module.path) for module in affected)
+    print('Modules affected by changes since {commit}: {modules}'.format(commit=previous_commit_id,
+                                                                          modules=', '.join(affected_dirs) or '-'))
+    return affected_dirs
+
+
+def find_changed_modules(changed_files: List[str], module_dirs: List[str]) -> Set[str]:
+    """Maps changed files to the innermost module containing them.
+
+    Only changes to the pom or the src folder of a module are taken into account, so documentation or CI
+    configuration changes do not affect any module.
+    """
+    changed = set()  # type: Set[str]
+    for filename in changed_files:
+        owner = max((module_dir for module_dir in module_dirs if is_in_dir(filename, module_dir)),
+                    key=len, default=None)
+        if owner is None:
+            continue
+        relative_name = os.path.relpath(filename, owner)
+        if relative_name == const.POM or relative_name.startswith('src' + os.sep):
+            changed.add(owner)
+
+    return changed
+
+
+def add_dependents(modules: List[objects.MavenModule],
+                   all_modules: List[objects.MavenModule]) -> List[objects.MavenModule]:
+    """Returns the given modules together with all modules that depend on them or inherit from them."""
+    dependents = {}  # type: Dict[Tuple[str, str], List[objects.MavenModule]]
+    for module in all_modules:
+        for coordinates in get_upstream_coordinates(module):
+            dependents.setdefault(coordinates, []).append(module)
+
+    return traverse(modules, lambda module: dependents.get(get_coordinates(module), []))
+
+
+def get_upstream_modules(path_to_repo: str, modules: List[objects.MavenModule], module_dirs: List[str]) -> List[str]:
+    """Returns paths of the modules the given ones depend on or inherit from, excluding the given ones."""
+    by_coordinates = {get_coordinates(module): module for module in modules}
+    selected = [module for module in modules if get_relative_path(path_to_repo, module.path) in module_dirs]
+
+    upstream = traverse(selected, lambda module: [by_coordinates[coordinates]
+                                                  for coordinates in get_upstream_coordinates(module)
+                                                  if coordinates in by_coordinates])
+    upstream_dirs = [get_relative_path(path_to_repo, module.path) for module in upstream]
+    return sorted(path for path in upstream_dirs if path not in module_dirs)
+
+
+def traverse(modules: List[objects.MavenModule],
+             neighbours: Callable[[objects.MavenModule], List[objects.MavenModule]]) -> List[objects.MavenModule]:
+    """Returns the given modules and every module reachable from them."""
+    visited = {get_coordinates(module): module for module in modules}
+    queue = list(modules)
+    while len(queue) > 0:
+        for neighbour in neighbours(queue.pop()):
+            if get_coordinates(neighbour) not in visited:
+                visited[get_coordinates(neighbour)] = neighbour
+                queue.append(neighbour)
+
+    return list(visited.values())
+
+
+def get_upstream_coordinates(module: objects.MavenModule) -> List[Tuple[str, str]]:
+    """Returns the coordinates of the dependencies and the parent of a module."""
+    return list(module.dependencies) + ([module.parent] if module.parent is not None else [])
+
+
+def get_coordinates(module: objects.MavenModule) -> Tuple[str, str]:
+    return module.group_id, module.artifact_id
+
+
+def carry_forward(repo: Repo, measurement: objects.CommitMeasurement,
+                  previous_measurement: objects.CommitMeasurement) -> objects.CommitMeasurement:
+    """Completes a measurement of some modules with the reports of the previous commit for all other modules.
+
+    Reports that are taken over are flagged as unchanged. Test classes whose source no longer exists, or that belong
+    to a module whose tests were run, are not taken over.
+    """
+    if measurement.tested_modules is None:
+        return measurement
+
+    measured_tests = {report.report.test_name for report in measurement.junit_reports}
+    class_modules = index_class_modules(repo.git.ls_tree('-r', '--name-only', measurement.commit_id).splitlines())
+
+    junit_reports = list(measurement.junit_reports)
+    unknown_tests = []  # type: List[str]
+    for commit_report in previous_measurement.junit_reports:
+        test_name = commit_report.report.test_name
+        if test_name in measured_tests:
+            continue
+        module_dir = class_modules.get(test_name)
+        if module_dir is None:
+            unknown_tests.append(test_name)
+            continue
+        if module_dir in measurement.tested_modules:
+            continue
+        report = commit_report.report._replace(unchanged=True)
+        junit_reports.append(objects.create_junit_commit_report(commit=measurement.commit_id, report=report))
+
+    if len(unknown_tests) > 0:
+        print('No module of {commit} holds the source of {tests}, their results are not carried over'.format(
+            commit=measurement.commit_id, tests=', '.join(sorted(unknown_tests))))
+    return measurement._replace(junit_reports=junit_reports)
+
+
+def index_class_modules(filenames: List[str]) -> Dict[str, str]:
+    """Maps the name of every class with a source file to the path of the innermost module containing it.
+
+    Sources are expected at src/<source set>/<language>/<package dirs> of a module, e.g. src/test/java or
+    src/it/scala. If classes of the same name exist in several source sets, the one of a test source set is kept.
+    """
+    module_dirs = {os.path.dirname(filename) or os.curdir
+                   for filename in filenames if os.path.basename(filename) == const.POM}
+
+    class_modules = {}  # type: Dict[str, str]
+    for filename in filenames:
+        path, extension = os.path.splitext(filename)
+        if extension not in SOURCE_EXTENSIONS:
+            continue
+        module_dir = os.path.dirname(filename) or os.curdir
+        while module_dir not in module_dirs and module_dir != os.curdir:
+            module_dir = os.path.dirname(module_dir) or os.curdir
+        parts = os.path.relpath(path, module_dir).split(os.sep)
+        if module_dir not in module_dirs or len(parts) < 4 or parts[0] != 'src':
+            continue
+        class_name = '.'.join(parts[3:])
+        if class_name not in class_modules or 'test' in parts[1]:
+            class_modules[class_name] = module_dir
+
+    return class_modules
+
+
+def is_in_dir(filename: str, directory: str) -> bool:
+    return directory == os.curdir or filename.startswith(directory + os.sep)
+
+
+def get_relative_path(path_to_repo: str, path: str) -> str:
+    return os.path.relpath(os.path.abspath(path), os.path.abspath(path_to_repo))
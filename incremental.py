@@ -0,0 +1,188 @@
+import itertools
+import math
+import statistics
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy  # type: ignore
+
+import analyzer
+import codec
+import const
+import jmh
+import logger
+import store
+from model import objects
+
+WINDOW_SIZE = 20  # commits the recent mean and std deviation are taken over
+
+
+def analyze_junit_reports(path_to_log_dir: str) -> List[objects.ProfileTarget]:
+    """Updates the statistics of the test classes with reports added since the last update, and logs them.
+
+    Like analyzer.analyze_junit_reports, every commit is compared with the next older commit the test was measured
+    for, but only the reports added since the last update are visited: the running statistics of every test class,
+    i.e. count, mean and sum of squared deviations of its runtimes (Welford) and the runtimes of its last commits,
+    are stored in the results database together with the statistics of every commit. The statistics of the new
+    commits are appended to the files of their test classes and the salient ones to the salient commits. A test
+    class whose added reports are not more recent than those it was updated with is analyzed again from its first
+    commit, its file and the salient commits and resources are rewritten then. Change points are not detected.
+    Returns the salient commits among the added ones together with the test classes that made them salient.
+    """
+    connection = store.open_store(path_to_log_dir)
+    pending_reports = store.load_pending_reports(connection)
+    if len(pending_reports) == 0:
+        print('No reports were added since the last analysis of {log}'.format(log=path_to_log_dir))
+        connection.close()
+        return []
+    new_commit_ids = set(itertools.chain.from_iterable(pending_reports.values()))
+    commit_times = store.get_commit_times(connection, new_commit_ids)
+
+    rewrite = False
+    test_names = {}  # type: Dict[Tuple[str, str], List[str]]
+    salient_commits = {}  # type: Dict[str, List[Dict[str, Any]]]
+    for test_name, commit_ids in sorted(pending_reports.items()):
+        running = store.load_running_statistics(connection, codec.JUNIT, test_name)
+        replace = running is None or any(commit_times[commit_id] <= running.last_commit_time
+                                         for commit_id in commit_ids)
+        if replace:
+            running = None
+            reports = store.get_junit_history(connection, test_name)
+            if not rewrite and any(report.commit_id not in new_commit_ids for report in reports):
+                # commits analyzed before are compared again, e.g. with an older commit that was added
+                rewrite = True
+                commit_times = store.get_commit_times(connection)
+        else:
+            reports = store.get_junit_reports(connection, test_name, commit_ids)
+
+        statistics_list = []  # type: List[objects.JUnitStatistics]
+        for commit_report in reversed(reports):
+            previous_commit_id = running.last_commit_id if running is not None else None
+            junit_statistics = compare_with_previous(commit_report, running)
+            running = add_value(running, commit_report.report.time_elapsed, commit_report.commit_id,
+                                commit_times[commit_report.commit_id])
+            if junit_statistics is None:
+                continue
+            statistics_list.append(junit_statistics)
+            if analyzer.is_salient(junit_statistics):
+                test_names.setdefault((commit_report.commit_id, previous_commit_id), []).append(test_name)
+                data = dict(junit_statistics._asdict())
+                data[const.TEST_NAME] = test_name
+                salient_commits.setdefault(commit_report.commit_id, []).append(data)
+
+        store.save_junit_statistics(connection, test_name, running, statistics_list, replace)
+        logger.log_benchmark_statistics(create_benchmark_statistics(test_name, running, statistics_list[::-1]),
+                                        dest_dir=path_to_log_dir, append=not replace)
+
+    if rewrite:
+        salient_commits = store.load_salient_statistics(connection, analyzer.DELTA_THRESHOLD,
+                                                        analyzer.SPEEDUP_THRESHOLD)
+        commit_ids = store.get_commit_ids(connection)
+        resource_usage = store.load_resource_usage(connection)
+    else:
+        # the new commits and the next older commit with recorded usage of each, to compare them with
+        previous_commit_ids = {store.get_previous_resource_commit(connection, commit_id)
+                               for commit_id in new_commit_ids} - {None} - new_commit_ids
+        commit_times.update(store.get_commit_times(connection, previous_commit_ids))
+        commit_ids = sorted(new_commit_ids | previous_commit_ids,
+                            key=lambda commit_id: (-commit_times[commit_id], commit_id))
+        resource_usage = store.load_resource_usage(connection, commit_ids)
+        salient_commits = {commit_id: salient_commits[commit_id] for commit_id in commit_ids
+                           if commit_id in salient_commits}
+    connection.close()
+
+    resource_changes = analyzer.compare_resource_usage(commit_ids, resource_usage, salient_commits.keys())
+    logger.log_salient_commits(salient_commits, dest_dir=path_to_log_dir, resource_changes=resource_changes,
+                               append=not rewrite)
+    if len(resource_usage) > 0:
+        salient_usage = analyzer.find_salient_resource_usage(commit_ids, resource_usage)
+        if not rewrite:
+            salient_usage = {commit_id: rows for commit_id, rows in salient_usage.items()
+                             if commit_id in new_commit_ids}
+        logger.log_salient_resource_usage(salient_usage, dest_dir=path_to_log_dir, append=not rewrite)
+
+    return [objects.ProfileTarget(commit_id=commit_id, previous_commit_id=previous_commit_id, test_classes=names,
+                                  benchmarks=[])
+            for (commit_id, previous_commit_id), names in test_names.items()]
+
+
+def analyze_jmh_reports(path_to_reports: str, path_to_log_dir: str) -> List[objects.ProfileTarget]:
+    """Compares the JMH reports of commits more recent than those of the last update with their predecessor.
+
+    The report of the most recent commit of every benchmark, parameters and mode is kept with its running statistics
+    in the results database, so the reports of a run are compared with those of earlier runs as well. Reports of
+    commits that are not more recent are skipped. Only the comparisons of the new commits are appended to the JMH
+    statistics. Returns the commits with a regression together with the benchmarks that regressed.
+    """
+    connection = store.open_store(path_to_log_dir)
+    jmh_commit_reports = list(codec.read_records(path_to_reports, codec.JMH))
+    commit_times = store.get_commit_times(connection, {report.commit_id for report in jmh_commit_reports})
+    unknown_commits = {report.commit_id for report in jmh_commit_reports if report.commit_id not in commit_times}
+    if len(unknown_commits) > 0:
+        print('Error: the commits {commits} of the JMH reports are not in the results database of {log}'.format(
+            commits=', '.join(sorted(unknown_commits)), log=path_to_log_dir))
+        exit(1)
+
+    random_state = numpy.random.RandomState(0)
+    jmh_statistics_list = []  # type: List[objects.JmhStatistics]
+    for (benchmark, mode), commit_reports in analyzer.group_jmh_commit_reports(jmh_commit_reports).items():
+        name = '{benchmark} ({mode})'.format(benchmark=benchmark, mode=mode)
+        running = store.load_running_statistics(connection, codec.JMH, name)
+        new_statistics = []  # type: List[objects.JmhStatistics]
+        for commit_report in sorted(commit_reports, key=lambda report: commit_times[report.commit_id]):
+            commit_time = commit_times[commit_report.commit_id]
+            if running is not None and commit_time <= running.last_commit_time:
+                continue
+            if running is not None:
+                new_statistics.append(jmh.compare_jmh_reports(commit_report, running.last_report, random_state))
+            metric = commit_report.jmh_report.primaryMetric
+            unit = running.unit if running is not None else metric.scoreUnit
+            running = add_value(running, jmh.convert_score(metric, unit), commit_report.commit_id, commit_time)
+            running = running._replace(unit=unit, last_report=commit_report)
+
+        if running is not None:
+            store.save_jmh_statistics(connection, name, running, new_statistics)
+        # the most recent commit of every benchmark first, like the statistics logged before
+        jmh_statistics_list.extend(reversed(new_statistics))
+
+    connection.close()
+    if len(jmh_statistics_list) > 0:
+        logger.log_jmh_statistics(jmh_statistics_list, dest_dir=path_to_log_dir, append=True)
+    return analyzer.find_jmh_profile_targets(jmh_statistics_list)
+
+
+def compare_with_previous(commit_report: objects.JUnitCommitReport,
+                          running: Optional[objects.RunningStatistics]) -> Optional[objects.JUnitStatistics]:
+    """Compares a report with the last runtime of the running statistics, like analyzer.analyze_runtime_matrix."""
+    if running is None:
+        return None
+    runtime = commit_report.report.time_elapsed
+    speedup = runtime / running.last_value if math.trunc(running.last_value) != 0 else 0.0
+    return analyzer.create_junit_statistics(commit_report.commit_id, runtime, speedup, runtime - running.last_value,
+                                            analyzer.get_samples(commit_report.report))
+
+
+def add_value(running: Optional[objects.RunningStatistics], value: float, commit_id: str,
+              commit_time: int) -> objects.RunningStatistics:
+    """Returns the running statistics including the value of a more recent commit, by Welford's algorithm."""
+    if running is None:
+        return objects.RunningStatistics(count=1, mean=value, m2=0.0, recent=[value], last_commit_id=commit_id,
+                                         last_commit_time=commit_time, last_value=value)
+
+    count = running.count + 1
+    delta = value - running.mean
+    mean = running.mean + delta / count
+    return running._replace(count=count, mean=mean, m2=running.m2 + delta * (value - mean),
+                            recent=(running.recent + [value])[-WINDOW_SIZE:], last_commit_id=commit_id,
+                            last_commit_time=commit_time, last_value=value)
+
+
+def create_benchmark_statistics(test_name: str, running: objects.RunningStatistics,
+                                junit_statistics: List[objects.JUnitStatistics]) -> objects.BenchmarkStatistics:
+    return objects.BenchmarkStatistics(
+        test_name=test_name,
+        std_dev=math.sqrt(running.m2 / (running.count - 1)) if running.count >= 2 else 0.0,
+        delta_threshold=analyzer.DELTA_THRESHOLD,
+        speedup_threshold=analyzer.SPEEDUP_THRESHOLD,
+        junit_statistics=junit_statistics,
+        recent_mean=statistics.mean(running.recent),
+        recent_std_dev=statistics.stdev(running.recent) if len(running.recent) >= 2 else 0.0)
@@ -0,0 +1,113 @@
+import itertools
+import math
+from typing import Any, Tuple
+
+import numpy  # type: ignore
+
+import significance
+from model import objects
+
+SIGNIFICANCE_LEVEL = 0.05
+
+# every other mode (avgt, sample, ss) measures time per operation, where lower is better
+HIGHER_IS_BETTER_MODES = {'thrpt'}
+TIME_UNITS = {'ns': 1e-9, 'us': 1e-6, 'ms': 1e-3, 's': 1.0, 'min': 60.0, 'hr': 3600.0}
+
+
+def compare_jmh_reports(commit_report: objects.JmhCommitReport, baseline: objects.JmhCommitReport,
+                        random_state: numpy.random.RandomState) -> objects.JmhStatistics:
+    """Compares the raw samples of a benchmark with those of the same benchmark and mode measured for the baseline.
+
+    The p-value is computed by a Mann-Whitney U test, the confidence interval of the score ratio by bootstrapping.
+    If either report lacks raw samples, the interval is derived from the score confidence reported by JMH.
+    """
+    metric = commit_report.jmh_report.primaryMetric
+    baseline_metric = baseline.jmh_report.primaryMetric
+    conversion = get_unit_scale(baseline_metric.scoreUnit) / get_unit_scale(metric.scoreUnit)
+
+    values, counts = get_samples(metric)
+    baseline_values, baseline_counts = get_samples(baseline_metric)
+    baseline_values = baseline_values * conversion
+    baseline_score = baseline_metric.score * conversion
+
+    if counts.sum() >= 2 and baseline_counts.sum() >= 2:
+        _, p_value = significance.mann_whitney_u_weighted(values, counts, baseline_values, baseline_counts)
+        ci_lower, ci_upper = significance.bootstrap_ratio_interval(values, counts, baseline_values, baseline_counts,
+                                                                   random_state)
+    else:
+        p_value = math.nan
+        ci_lower, ci_upper = get_confidence_ratio(metric, baseline_metric, conversion)
+
+    ratio = metric.score / baseline_score if baseline_score != 0 else 0.0
+    excludes_one = ci_lower > 1.0 or ci_upper < 1.0  # False if the interval is unknown
+    significant = excludes_one and (math.isnan(p_value) or p_value < SIGNIFICANCE_LEVEL)
+
+    change = ''
+    if significant:
+        faster = ratio > 1 if commit_report.jmh_report.mode in HIGHER_IS_BETTER_MODES else ratio < 1
+        change = 'improvement' if faster else 'regression'
+
+    return objects.JmhStatistics(commit_id=commit_report.commit_id,
+                                 mode=commit_report.jmh_report.mode,
+                                 score=metric.score,
+                                 delta=metric.score - baseline_score,
+                                 benchmark=get_benchmark_name(commit_report.jmh_report),
+                                 unit=metric.scoreUnit,
+                                 ratio=ratio,
+                                 ci_lower=ci_lower,
+                                 ci_upper=ci_upper,
+                                 p_value=p_value,
+                                 change=change,
+                                 previous_commit_id=baseline.commit_id)
+
+
+def get_benchmark_name(jmh_report: objects.JmhReport) -> str:
+    """Returns the name of the benchmark method, followed by its parameters if it has any, e.g. X.run(size=10)."""
+    if not jmh_report.params:
+        return jmh_report.benchmark
+
+    params = ', '.join('{key}={value}'.format(key=key, value=value) for key, value in sorted(jmh_report.params.items()))
+    return '{benchmark}({params})'.format(benchmark=jmh_report.benchmark, params=params)
+
+
+def get_samples(metric: objects.PrimaryMetric) -> Tuple[Any, Any]:
+    """Returns the distinct values of all forks and iterations as a numpy array, together with their counts."""
+    if metric.rawDataHistogram:
+        bins = itertools.chain.from_iterable(itertools.chain.from_iterable(metric.rawDataHistogram))
+        pairs = numpy.array(list(bins), dtype=numpy.float64).reshape(-1, 2)
+        values, sample_counts = pairs[:, 0], pairs[:, 1]
+    else:
+        values = numpy.fromiter(itertools.chain.from_iterable(metric.rawData or []), dtype=numpy.float64)
+        sample_counts = numpy.ones(len(values))
+
+    distinct_values, inverse = numpy.unique(values, return_inverse=True)
+    return distinct_values, numpy.bincount(inverse, weights=sample_counts, minlength=len(distinct_values))
+
+
+def get_confidence_ratio(metric: objects.PrimaryMetric, baseline_metric: objects.PrimaryMetric,
+                         conversion: float) -> Tuple[float, float]:
+    """Returns the range of score ratios covered by the confidence intervals JMH reported for both scores."""
+    lower, upper = (float(bound) for bound in metric.scoreConfidence)
+    baseline_lower, baseline_upper = (float(bound) * conversion for bound in baseline_metric.scoreConfidence)
+    if baseline_lower <= 0 or math.isnan(lower) or math.isnan(baseline_lower):
+        return math.nan, math.nan
+
+    return lower / baseline_upper, upper / baseline_lower
+
+
+def convert_score(metric: objects.PrimaryMetric, unit: str) -> float:
+    """Returns the score of the metric expressed in the given unit of the same kind, e.g. ms/op instead of us/op."""
+    return metric.score * get_unit_scale(metric.scoreUnit) / get_unit_scale(unit)
+
+
+def get_unit_scale(unit: str) -> float:
+    """Returns the factor that converts a score in the given unit into ops/s or s/op.
+
+    Units that are neither a rate nor a time per operation, e.g. those of secondary metrics, are not scaled.
+    """
+    numerator, _, denominator = unit.partition('/')
+    if numerator == 'ops' and denominator in TIME_UNITS:
+        return 1 / TIME_UNITS[denominator]
+    if denominator == 'op' and numerator in TIME_UNITS:
+        return TIME_UNITS[numerator]
+    return 1.0
@@ -1,18 +1,20 @@
 import os
 from os import path
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Tuple
 
 from tabulate import tabulate
 
 import const
 import utils
-from model.objects import BenchmarkStatistics, JmhStatistics
+from model.objects import (BenchmarkStatistics, BisectResult, ChangePoint, JmhStatistics, MethodDiff,
+                           ProfileTarget, ScalingFit, ScalingPoint, ScalingRegression)
 
 
-def log_benchmark_statistics(statistics: BenchmarkStatistics, dest_dir: str = None) -> None:
+def log_benchmark_statistics(statistics: BenchmarkStatistics, dest_dir: str = None, append: bool = False) -> None:
     """Logs data contained by dict to the specified directory.
 
-    The filename of a given statistics dict is equal to the test name.
+    The filename of a given statistics dict is equal to the test name. If appended, the statistics follow those
+    already logged to the file, e.g. the ones of new commits.
     If no path to a destination directory is provided, the data is printed to std out.
     """
     statistics_str = format_benchmark_statistics(statistics)
@@ -22,25 +24,101 @@ def log_benchmark_statistics(statistics: BenchmarkStatistics, dest_dir: str = No
         stat_dir = os.path.join(dest_dir, const.STATISTICS_DIR)
         utils.create_dir(stat_dir)
         destination = path.join(stat_dir, statistics.test_name)
-        with open(destination, "w") as file:
-            file.write(statistics_str)
+        append = append and path.isfile(destination)
+        with open(destination, 'a' if append else 'w') as file:
+            file.write('\n\n' + statistics_str if append else statistics_str)
 
 
-def log_jmh_statistics(statistics: List[JmhStatistics], dest_dir: str = None) -> None:
+def log_jmh_statistics(statistics: List[JmhStatistics], dest_dir: str = None, append: bool = False) -> None:
+    statistics_str = tabulate(utils.unpack(statistics), headers='keys')
     if dest_dir is None:
-        print(utils.unpack(statistics))
+        print(statistics_str)
+    else:
+        stat_dir = os.path.join(dest_dir, const.STATISTICS_DIR)
+        utils.create_dir(stat_dir)
+        destination = path.join(stat_dir, 'jmh_statistics.txt')
+        append = append and path.isfile(destination)
+        with open(destination, 'a' if append else 'w') as file:
+            file.write('\n\n' + statistics_str if append else statistics_str)
+
+
+def log_salient_commits(salient_commits: Dict[str, List[Any]], dest_dir: str = None,
+                        resource_changes: Dict[str, List[Any]] = None, filename: str = 'salient_commits.txt',
+                        append: bool = False) -> None:
+    """Logs the salient commits, if appended only their sections are added to those already logged."""
+    if dest_dir is None:
+        print(format_salient_commits(salient_commits, resource_changes))
+    else:
+        stat_dir = os.path.join(dest_dir, const.STATISTICS_DIR)
+        utils.create_dir(stat_dir)
+        destination = path.join(stat_dir, filename)
+        append = append and path.isfile(destination)
+        with open(destination, 'a' if append else 'w') as file:
+            file.write(format_salient_commits(salient_commits, resource_changes, header=not append))
+
+
+def log_salient_resource_usage(salient_usage: Dict[str, List[Any]], dest_dir: str = None,
+                               append: bool = False) -> None:
+    if dest_dir is None:
+        print(format_salient_resource_usage(salient_usage))
+    else:
+        stat_dir = os.path.join(dest_dir, const.STATISTICS_DIR)
+        utils.create_dir(stat_dir)
+        destination = path.join(stat_dir, 'salient_resources.txt')
+        append = append and path.isfile(destination)
+        with open(destination, 'a' if append else 'w') as file:
+            file.write(format_salient_resource_usage(salient_usage, header=not append))
+
+
+def log_change_points(change_points: List[ChangePoint], dest_dir: str = None,
+                      filename: str = 'change_points.txt') -> None:
+    change_points_str = format_change_points(change_points)
+    if dest_dir is None:
+        print(change_points_str)
+    else:
+        stat_dir = os.path.join(dest_dir, const.STATISTICS_DIR)
+        utils.create_dir(stat_dir)
+        with open(path.join(stat_dir, filename), 'w') as file:
+            file.write(change_points_str)
+
+
+def log_bisect_result(result: BisectResult, dest_dir: str = None) -> None:
+    """Logs the outcome of a bisection. The filename is derived from the name of the bisected test."""
+    result_str = format_bisect_result(result)
+    if dest_dir is None:
+        print(result_str)
+    else:
+        stat_dir = os.path.join(dest_dir, const.STATISTICS_DIR)
+        utils.create_dir(stat_dir)
+        destination = path.join(stat_dir, 'bisect_{test}.txt'.format(test=result.test_name))
+        with open(destination, 'w') as file:
+            file.write(result_str)
 
 
-def log_salient_commits(
-        salient_commits: Dict[str, List[Any]], dest_dir: str = None) -> None:
-    salient_commits_str = format_salient_commits(salient_commits)
+def log_profile_diff(target: ProfileTarget, diffs: List[MethodDiff], sample_counts: Tuple[int, int],
+                     dest_dir: str = None) -> None:
+    """Logs the hot methods that changed between a flagged commit and its predecessor, named after the commit."""
+    diff_str = format_profile_diff(target, diffs, sample_counts)
     if dest_dir is None:
-        print(salient_commits_str)
+        print(diff_str)
     else:
         stat_dir = os.path.join(dest_dir, const.STATISTICS_DIR)
-        filename = path.join(stat_dir, 'salient_commits.txt')
-        with open(filename, 'w') as file:
-            file.write(salient_commits_str)
+        utils.create_dir(stat_dir)
+        destination = path.join(stat_dir, 'profile_{commit}.txt'.format(commit=target.commit_id))
+        with open(destination, 'w') as file:
+            file.write(diff_str)
+
+
+def log_scaling_analysis(points: List[ScalingPoint], fits: List[ScalingFit], regressions: List[ScalingRegression],
+                         dest_dir: str = None) -> None:
+    scaling_str = format_scaling_analysis(points, fits, regressions)
+    if dest_dir is None:
+        print(scaling_str)
+    else:
+        stat_dir = os.path.join(dest_dir, const.STATISTICS_DIR)
+        utils.create_dir(stat_dir)
+        with open(path.join(stat_dir, 'scaling.txt'), 'w') as file:
+            file.write(scaling_str)
 
 
 def format_benchmark_statistics(statistics: BenchmarkStatistics) -> str:
@@ -48,20 +126,88 @@ def format_benchmark_statistics(statistics: BenchmarkStatistics) -> str:
     header = ("{s.test_name}\n\n"
               "Std deviation: {s.std_dev}\n"
               "Delta threshold: {s.delta_threshold}\n"
-              "Speedup threshold: {s.speedup_threshold}\n\n").format(s=statistics)
+              "Speedup threshold: {s.speedup_threshold}\n").format(s=statistics)
+    if statistics.recent_mean is not None:
+        header += ("Recent mean: {s.recent_mean}\n"
+                   "Recent std deviation: {s.recent_std_dev}\n").format(s=statistics)
+    header += '\n'
 
     records = tabulate(utils.unpack(statistics.junit_statistics), headers="keys")
 
     return header + records
 
 
-def format_salient_commits(salient_commits: Dict[str, List[Any]]) -> str:
-    header = ('The following commits introduced changes that extended '
-              'the runtime of some test classes on branch {branch}.\n\n').format(branch='master')
-    body = ''
+def format_salient_commits(salient_commits: Dict[str, List[Any]], resource_changes: Dict[str, List[Any]] = None,
+                           header: bool = True) -> str:
+    parts = []  # type: List[str]
+    if header:
+        parts.append(('The following commits introduced changes that extended '
+                      'the runtime of some test classes or methods on branch {branch}.\n\n').format(branch='master'))
     for key in salient_commits.keys():
-        body += '{hexsha}:\n\n'.format(hexsha=key)
-        body += tabulate(salient_commits[key], headers='keys')
-        body += '\n\n'
+        parts.append('{hexsha}:\n\n'.format(hexsha=key))
+        parts.append(tabulate(salient_commits[key], headers='keys'))
+        parts.append('\n\n')
+        if resource_changes is not None and key in resource_changes:
+            parts.append('Resource usage compared to the previous commit:\n\n')
+            parts.append(tabulate(resource_changes[key], headers='keys'))
+            parts.append('\n\n')
+
+    return ''.join(parts)
+
+
+def format_salient_resource_usage(salient_usage: Dict[str, List[Any]], header: bool = True) -> str:
+    parts = []  # type: List[str]
+    if header:
+        parts.append(('The following commits increased the resource usage of the test suite or the benchmarks '
+                      'on branch {branch}.\n\n').format(branch='master'))
+    for key in salient_usage.keys():
+        parts.append('{hexsha}:\n\n'.format(hexsha=key))
+        parts.append(tabulate(salient_usage[key], headers='keys'))
+        parts.append('\n\n')
+
+    return ''.join(parts)
+
+
+def format_change_points(change_points: List[ChangePoint]) -> str:
+    header = ('The following commits mark a significant and lasting shift '
+              'of the runtime of a test class or the score of a benchmark.\n\n')
+    if len(change_points) == 0:
+        return header + 'No change points found.\n'
+
+    return header + tabulate(utils.unpack(change_points), headers='keys') + '\n'
+
+
+def format_bisect_result(result: BisectResult) -> str:
+    header = ('Bisected {r.test_name} between {r.good} (good) and {r.bad} (bad), '
+              'measuring {r.measured_commits} commits.\n\n').format(r=result)
+    if result.culprit is None:
+        return header + 'No significant regression found (p-value: {r.p_value:.4f}).\n'.format(r=result)
+
+    return header + ('First regressing commit: {r.culprit}\n'
+                     'Median runtime: {r.median_before} -> {r.median_after}\n'
+                     'p-value: {r.p_value:.4f}, confidence: {r.confidence:.2%}\n').format(r=result)
+
+
+def format_profile_diff(target: ProfileTarget, diffs: List[MethodDiff], sample_counts: Tuple[int, int]) -> str:
+    header = ('Share of the execution samples in percent per method at {previous} ({before} samples) and at '
+              '{commit} ({after} samples).\n').format(previous=target.previous_commit_id, commit=target.commit_id,
+                                                            before=sample_counts[0], after=sample_counts[1])
+    if len(target.test_classes) > 0:
+        header += 'Test classes: {tests}\n'.format(tests=', '.join(target.test_classes))
+    if len(target.benchmarks) > 0:
+        header += 'Benchmarks: {benchmarks}\n'.format(benchmarks=', '.join(target.benchmarks))
+
+    return header + '\n' + tabulate(utils.unpack(diffs), headers='keys', floatfmt='.2f') + '\n'
+
+
+def format_scaling_analysis(points: List[ScalingPoint], fits: List[ScalingFit],
+                            regressions: List[ScalingRegression]) -> str:
+    body = 'Mean runtime, speedup and parallel efficiency per commit, configuration and parallelism.\n\n'
+    body += tabulate(utils.unpack(points), headers='keys', floatfmt='.3f') + '\n\n'
+    body += 'Serial fractions by the fits of Amdahl\'s and Gustafson\'s law, efficiency at the maximum parallelism.\n\n'
+    body += tabulate(utils.unpack(fits), headers='keys', floatfmt='.3f') + '\n\n'
+    body += 'The following commits slowed down a configuration at a parallelism more than at the lowest one.\n\n'
+    if len(regressions) == 0:
+        return body + 'No scaling regressions found.\n'
 
-    return header + body
+    return body + tabulate(utils.unpack(regressions), headers='keys', floatfmt='.4f') + '\n'
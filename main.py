@@ -1,9 +1,21 @@
 import argparse
 import os
+import shutil
+from typing import List
 
 import analyzer
+import bisection
+import build_cache
+import cache
+import codec
+import const
+import incremental
+import logger
+import orchestrator
+import profiler
 import runner
 import utils
+from model import objects
 
 
 def main():
@@ -23,11 +35,132 @@ def main():
     parser.add_argument('-b', '--branch', type=str, default='master',
                         help='name of the branch to test (defaults to "master").')
     parser.add_argument('--invocation-count', type=int, metavar='count',
-                        help='the number of times each test should be invoked. Logging happens after the last run.',
+                        help='the number of times each test should be invoked. The runtime of every invocation is kept.',
                         default=1)
+    parser.add_argument('--ci-target', type=float, metavar='fraction',
+                        help='invoke test classes again until the width of the 95%% confidence interval of their '
+                             'runtime is at most this fraction of its mean, e.g. 0.05. --invocation-count becomes the '
+                             'minimum number of invocations.')
+    parser.add_argument('--time-budget', type=float, metavar='seconds',
+                        help='time all invocations of the test suite of a commit may take with --ci-target.')
+    parser.add_argument('--max-invocations', type=int, metavar='count', default=30,
+                        help='maximum number of invocations of a test class with --ci-target (defaults to 30).')
+    parser.add_argument('-j', '--workers', type=int, metavar='count', default=1,
+                        help='number of commits measured in parallel, each in its own git worktree (defaults to 1).')
+    parser.add_argument('--worker-cpus', type=str, nargs='*', metavar='cpu-list',
+                        help='one cpu list per worker (e.g. 0-3 4-7) the worker and its child processes are pinned to.')
+    parser.add_argument('--worker-memory', type=str, metavar='size',
+                        help='maximum heap size of every JVM started by a worker, e.g. 4g.')
+    parser.add_argument('--pipelined', action='store_true',
+                        help='build the next commit while the current one is measured, on separate cpus.')
+    parser.add_argument('--build-cpus', type=str, metavar='cpu-list',
+                        help='cpus builds are pinned to when pipelined. Defaults to the lower half of the available '
+                             'cpus.')
+    parser.add_argument('--measure-cpus', type=str, metavar='cpu-list',
+                        help='cpus measurements are pinned to. When pipelined, defaults to the upper half of the '
+                             'available cpus.')
+    parser.add_argument('--warmup-invocations', type=int, metavar='count', default=0,
+                        help='number of invocations of the test suite before the measured ones, whose results are '
+                             'discarded (defaults to 0).')
+    parser.add_argument('--max-load', type=float, metavar='load',
+                        help='wait before measuring until the 1 minute load average is at most this value.')
+    parser.add_argument('--max-cpu-usage', type=float, metavar='fraction',
+                        help='wait before measuring until the usage of the measurement cpus is at most this '
+                             'fraction, e.g. 0.1.')
+    parser.add_argument('--max-swap-rate', type=float, metavar='pages',
+                        help='wait before measuring until less than this number of pages per second are swapped.')
+    parser.add_argument('--governor', type=str, metavar='name',
+                        help='cpu frequency governor the measurement cpus are required to use, e.g. performance.')
+    parser.add_argument('--quiescence-timeout', type=float, metavar='seconds', default=300,
+                        help='time to wait for the host to become quiet, after which runs are measured anyway and '
+                             'flagged as contended (defaults to 300).')
+    parser.add_argument('--resource-usage', action='store_true',
+                        help='record cpu times, peak memory, context switches and storage I/O of the processes of '
+                             'every test suite and benchmark run.')
+    parser.add_argument('--perf-counters', action='store_true',
+                        help='run every test suite and benchmark run under perf stat and record the instructions, '
+                             'cycles, cache misses and branch misses of its processes. Implies --resource-usage.')
+    parser.add_argument('--profile', action='store_true',
+                        help='profile salient commits and their predecessors with Java Flight Recorder and log the '
+                             'methods whose share of the execution samples changed most.')
+    parser.add_argument('--cache-dir', type=str,
+                        help='path to directory where measurements are cached. Defaults to "cache" in the destination.')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='measure every commit, even if a cached measurement exists.')
+    parser.add_argument('--incremental', action='store_true',
+                        help='update the statistics with the reports added since the last analysis instead of '
+                             'analyzing the whole history again. Change points are not detected.')
+    parser.add_argument('--bisect', type=str, nargs=2, metavar=('good', 'bad'),
+                        help='find the first commit between good and bad that slowed down the test given by --test.')
+    parser.add_argument('--test', type=str, metavar='test-class',
+                        help='test class to bisect, e.g. ClassXTest.')
+    parser.add_argument('--change-impact', action='store_true',
+                        help='only run the tests of modules affected by the changes to the next older selected commit '
+                             'and carry over the results of all other tests.')
+    parser.add_argument('--build-cache', action='store_true',
+                        help='restore the build outputs of modules whose sources and dependencies did not change '
+                             'instead of compiling them again.')
+    parser.add_argument('--build-cache-dir', type=str,
+                        help='path to directory where build outputs are cached. Defaults to "build-cache" in the '
+                             'destination.')
+    parser.add_argument('--build-cache-size', type=float, metavar='GiB', default=10,
+                        help='size the build cache is limited to, least recently used outputs are evicted first '
+                             '(defaults to 10).')
+    parser.add_argument('--pipeline', type=str, metavar='path', default=const.PIPELINE_PATH,
+                        help='path to the JMH pipeline project (defaults to {path}).'.format(path=const.PIPELINE_PATH))
+    parser.add_argument('--pipeline-jar', type=str, metavar='name', default=const.PIPELINE_JAR,
+                        help='name of the executable benchmark jar built into the target dir of the pipeline.')
+    parser.add_argument('--no-pipeline', action='store_true',
+                        help='do not run the JMH pipeline.')
+    parser.add_argument('--jmh-include', type=str, metavar='regex',
+                        help='only run the benchmarks matching the regex.')
+    parser.add_argument('--jmh-forks', type=int, metavar='count',
+                        help='number of forks of every benchmark, overriding its annotations.')
+    parser.add_argument('--jmh-warmup-iterations', type=int, metavar='count',
+                        help='number of warmup iterations of every benchmark, overriding its annotations.')
+    parser.add_argument('--jmh-iterations', type=int, metavar='count',
+                        help='number of measurement iterations of every benchmark, overriding its annotations.')
+    parser.add_argument('--flink', type=str, metavar='path',
+                        help='path to a Flink installation the pipeline jar is submitted to after the benchmarks. '
+                             'The cluster has to be running.')
+    parser.add_argument('--flink-parallelism', type=int, nargs='+', metavar='p', default=[1, 2, 4, 8, 16],
+                        help='parallelism levels the jar is submitted at (defaults to 1 2 4 8 16).')
+    parser.add_argument('--flink-jar', type=str, metavar='name',
+                        help='name of the jar within the target dir of the pipeline submitted to Flink (defaults to '
+                             '--pipeline-jar).')
+    parser.add_argument('--flink-class', type=str, metavar='name',
+                        help='entry class of the submitted jar, defaults to its main class.')
+    parser.add_argument('--flink-args', type=str, metavar='arguments',
+                        help='arguments passed to the entry class.')
+    parser.add_argument('--flink-rest-url', type=str, metavar='url', default='http://localhost:8081',
+                        help='url of the REST API of the JobManager the metrics of the jobs are read from (defaults to '
+                             'http://localhost:8081).')
+    parser.add_argument('--flink-slots', type=int, metavar='count',
+                        help='task slots the jobs of concurrent submissions may occupy in total. Defaults to the '
+                             'available slots of the cluster. Set to the largest level to submit one level at a time.')
 
     args = parser.parse_args()
 
+    if args.path is None:
+        project_root = os.getcwd()
+    else:
+        project_root = args.path
+
+    if args.destination is None:
+        log_dir = utils.get_default_log_dir(project_root)
+    else:
+        log_dir = args.destination
+
+    if args.bisect is not None:
+        if args.test is None:
+            print('Please specify the test class to bisect with --test.')
+            exit(1)
+        result = bisection.bisect(path_to_repo=project_root, good=args.bisect[0], bad=args.bisect[1],
+                                  test_name=args.test, branch=args.branch, sample_count=args.invocation_count)
+        logger.log_bisect_result(result)
+        logger.log_bisect_result(result, dest_dir=utils.create_dir(log_dir))
+        return
+
     interval = args.interval
     selection = args.selection
     if interval is None and selection is None:
@@ -40,24 +173,97 @@ def main():
     commit_ids = interval if interval is not None else selection
     is_interval = True if interval is not None else False
 
-    if args.path is None:
-        project_root = os.getcwd()
-    else:
-        project_root = args.path
-
-    if args.destination is None:
-        log_dir = utils.get_default_log_dir(project_root)
-    else:
-        log_dir = args.destination
-
     test_classes = args.test_classes
     branch = args.branch
     invocation_count = args.invocation_count
+    worker_cpus = None
+    if args.worker_cpus is not None:
+        worker_cpus = [utils.parse_cpu_list(cpu_list) for cpu_list in args.worker_cpus]
+
+    if args.change_impact and args.workers > 1:
+        # tests of selected modules resolve the other modules from the shared local maven repository, which
+        # concurrent workers would overwrite with the artifacts of other commits
+        print('Please use either --change-impact or more than one worker, not both.')
+        exit(1)
+
+    build_cpus, measure_cpus = None, None
+    if args.pipelined:
+        if args.workers > 1:
+            print('Please use either --pipelined or more than one worker, not both.')
+            exit(1)
+        build_cpus, measure_cpus = orchestrator.split_cpus(os.sched_getaffinity(0))
+        if args.build_cpus is not None:
+            build_cpus = utils.parse_cpu_list(args.build_cpus)
+    if args.measure_cpus is not None:
+        if args.workers > 1:
+            print('Please use --worker-cpus to pin parallel workers.')
+            exit(1)
+        measure_cpus = utils.parse_cpu_list(args.measure_cpus)
+
+    quiescence = None
+    if any(limit is not None for limit in (args.max_load, args.max_cpu_usage, args.max_swap_rate, args.governor)):
+        quiescence = objects.QuiescenceLimits(max_load=args.max_load, max_cpu_usage=args.max_cpu_usage,
+                                              max_swap_rate=args.max_swap_rate, governor=args.governor,
+                                              max_wait=args.quiescence_timeout)
+
+    if args.perf_counters and shutil.which('perf') is None:
+        print('Counting hardware events requires perf to be installed.')
+        exit(1)
+
+    adaptive = None
+    if args.ci_target is not None:
+        adaptive = objects.AdaptiveSampling(ci_target=args.ci_target, time_budget=args.time_budget,
+                                            max_invocations=args.max_invocations)
+
+    if args.no_cache:
+        cache_dir = None
+    elif args.cache_dir is None:
+        cache_dir = cache.get_default_cache_dir(log_dir)
+    else:
+        cache_dir = args.cache_dir
+
+    build_cache_dir = None
+    if args.build_cache or args.build_cache_dir is not None:
+        build_cache_dir = args.build_cache_dir or build_cache.get_default_build_cache_dir(log_dir)
+
+    pipeline = None
+    if not args.no_pipeline:
+        pipeline = objects.PipelineConfig(path=args.pipeline, jar=args.pipeline_jar, include=args.jmh_include,
+                                          forks=args.jmh_forks, warmup_iterations=args.jmh_warmup_iterations,
+                                          measurement_iterations=args.jmh_iterations)
+
+    flink = None
+    if args.flink is not None:
+        if pipeline is None:
+            print('The Flink stage submits the jar of the pipeline, please do not use --no-pipeline with --flink.')
+            exit(1)
+        flink = objects.FlinkConfig(path=args.flink, parallelisms=args.flink_parallelism,
+                                    jar=args.flink_jar or args.pipeline_jar, classname=args.flink_class,
+                                    args=args.flink_args, rest_url=args.flink_rest_url, slots=args.flink_slots)
 
     runner.run(path_to_repo=project_root, path_to_log=log_dir, commit_ids=commit_ids,
-               is_interval=is_interval, test_classes=test_classes, branch=branch, invocation_count=invocation_count)
+               is_interval=is_interval, test_classes=test_classes, branch=branch, invocation_count=invocation_count,
+               workers=args.workers, worker_cpus=worker_cpus, worker_memory=args.worker_memory,
+               cache_dir=cache_dir, change_impact=args.change_impact, pipeline=pipeline,
+               build_cache_dir=build_cache_dir, build_cache_size=int(args.build_cache_size * 1024 ** 3),
+               build_cpus=build_cpus, measure_cpus=measure_cpus, warmup_count=args.warmup_invocations,
+               quiescence=quiescence, adaptive=adaptive,
+               sample_resources=args.resource_usage or args.perf_counters, count_events=args.perf_counters,
+               flink=flink)
+    profile_targets = []  # type: List[objects.ProfileTarget]
     if invocation_count is not None and invocation_count > 0:
-        analyzer.analyze_junit_reports(log_dir)
+        if args.incremental:
+            profile_targets.extend(incremental.analyze_junit_reports(log_dir))
+        else:
+            profile_targets.extend(analyzer.analyze_junit_reports(log_dir))
+    if pipeline is not None:
+        path_to_jmh_reports = codec.find_records(log_dir, const.JMH_REPORTS, const.LEGACY_JMH_REPORTS)
+        if args.incremental:
+            profile_targets.extend(incremental.analyze_jmh_reports(path_to_jmh_reports, log_dir))
+        else:
+            profile_targets.extend(analyzer.analyze_jmh_reports(path_to_jmh_reports, dest_dir=log_dir))
+    if args.profile and len(profile_targets) > 0:
+        profiler.profile_commits(project_root, log_dir, profile_targets, branch, pipeline=pipeline)
 
 
 if __name__ == "__main__":
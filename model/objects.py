@@ -1,4 +1,4 @@
-from typing import NamedTuple, List, Any, Dict
+from typing import NamedTuple, List, Any, Dict, Optional, Tuple
 
 import const
 
@@ -11,6 +11,10 @@ class JUnitReport(NamedTuple):
     errors: int
     time_elapsed: float
     skipped: int
+    unchanged: bool = False  # True if carried forward from the previous commit instead of being measured
+    samples: Optional[List[float]] = None  # time elapsed in every invocation, time_elapsed is their mean
+    contended: bool = False  # True if a sample was taken while the host exceeded the quiescence limits
+    test_cases: Optional[Dict[str, List[float]]] = None  # time elapsed of every test method in every invocation
 
 
 class JUnitCommitReport(NamedTuple):
@@ -25,6 +29,11 @@ class JUnitStatistics(NamedTuple):
     runtime: float
     speedup: float
     runtime_delta: float
+    sample_count: int = 1
+    median: float = 0.0
+    variance: float = 0.0
+    ci_lower: float = 0.0  # bounds of the 95% confidence interval of the mean runtime
+    ci_upper: float = 0.0
 
 
 class JmhStatistics(NamedTuple):
@@ -32,6 +41,14 @@ class JmhStatistics(NamedTuple):
     mode: str
     score: float
     delta: float
+    benchmark: str = ''
+    unit: str = ''
+    ratio: float = 1.0  # score relative to the one of the next older commit, both in the unit of this score
+    ci_lower: float = 1.0  # 95% confidence interval of the ratio
+    ci_upper: float = 1.0
+    p_value: float = 1.0
+    change: str = ''  # 'improvement' or 'regression' if the difference is significant, taking the mode into account
+    previous_commit_id: str = ''  # commit of the score this one is compared with
 
 
 class BenchmarkStatistics(NamedTuple):
@@ -41,6 +58,36 @@ class BenchmarkStatistics(NamedTuple):
     delta_threshold: float
     speedup_threshold: float
     junit_statistics: List[JUnitStatistics]
+    recent_mean: Optional[float] = None  # mean and std deviation of the runtimes of the last commits, if tracked
+    recent_std_dev: Optional[float] = None
+
+
+class RuntimeMatrix(NamedTuple):
+    """Data structure that holds the runtimes of all test classes over all commits, the most recent commit first"""
+    commit_ids: List[str]
+    test_names: List[str]
+    runtimes: Any  # numpy array of shape (commits, tests), NaN where a test was not measured for a commit
+    samples: Dict[Tuple[int, int], List[float]]  # samples of the cells measured more than once, by (row, column)
+
+
+class MatrixStatistics(NamedTuple):
+    """Data structure that holds the statistics of a RuntimeMatrix, each array has the shape of the matrix"""
+    runtime_deltas: Any
+    speedups: Any
+    compared: Any  # True where both the commit and an older commit were measured
+    salient: Any
+    std_devs: Any  # one std deviation per test
+
+
+class ChangePoint(NamedTuple):
+    """Data structure that describes a lasting shift of the runtime or score of a test class or benchmark"""
+    name: str
+    commit_id: str  # first commit after the shift
+    mean_before: float
+    mean_after: float
+    shift: float
+    relative_shift: float
+    p_value: float
 
 
 class PrimaryMetric(NamedTuple):
@@ -49,8 +96,9 @@ class PrimaryMetric(NamedTuple):
     scoreError: float
     scoreConfidence: List[float]
     scoreUnit: str
-    rawData: List[List[float]]
+    rawData: List[List[float]]  # per fork, per iteration
     scorePercentiles: Dict[str, float]
+    rawDataHistogram: Optional[List[List[List[List[float]]]]] = None  # per fork, per iteration [value, count] pairs
 
 
 class JmhReport(NamedTuple):
@@ -67,6 +115,8 @@ class JmhReport(NamedTuple):
     measurementIterations: int
     measurementTime: str
     primaryMetric: PrimaryMetric
+    params: Optional[Dict[str, str]] = None  # values of the @Param fields of the benchmark
+    contended: bool = False  # True if the benchmarks ran while the host exceeded the quiescence limits
 
 
 class JmhCommitReport(NamedTuple):
@@ -74,9 +124,237 @@ class JmhCommitReport(NamedTuple):
     jmh_report: JmhReport
 
 
-class BenchmarkReportRow(NamedTuple):
+class RunningStatistics(NamedTuple):
+    """Data structure that holds the running statistics of the runtime of a test class or the score of a benchmark"""
+    count: int
+    mean: float
+    m2: float  # sum of squared deviations from the mean, updated by Welford's algorithm
+    recent: List[float]  # values of the last commits, the oldest first
+    last_commit_id: str  # most recent commit the statistics include
+    last_commit_time: int
+    last_value: float
+    unit: Optional[str] = None  # unit of the scores of a benchmark
+    last_report: Optional[JmhCommitReport] = None  # report of the most recent commit of a benchmark
+
+
+class FlinkVertexMetrics(NamedTuple):
+    """Data structure that holds the throughput and backpressure of a vertex of a Flink job"""
+    name: str
     parallelism: int
-    runtime: int
+    records_in: float  # records per second, over the duration of the vertex
+    records_out: float
+    backpressure: Optional[float] = None  # mean ratio of the most backpressured subtask, None if never sampled
+    peak_backpressure: Optional[float] = None
+
+
+class FlinkJobReport(NamedTuple):
+    """Data structure that holds the metrics the JobManager reports for a job submitted at a parallelism"""
+    job_id: str
+    name: str
+    parallelism: int
+    state: str
+    runtime: int  # milliseconds
+    vertices: List[FlinkVertexMetrics]
+    contended: bool = False  # True if the job was submitted while the host exceeded the quiescence limits
+
+
+class FlinkCommitReport(NamedTuple):
+    commit_id: str
+    flink_report: FlinkJobReport
+
+
+class ResourceUsage(NamedTuple):
+    """Data structure that holds the resources the process tree of a test suite or pipeline run used"""
+    user_time: float  # seconds
+    system_time: float
+    peak_rss: float  # bytes, largest resident set size of the process tree
+    voluntary_switches: float
+    involuntary_switches: float
+    read_bytes: float  # bytes read from and written to storage
+    write_bytes: float
+    stage: str = ''  # 'test' for the test suite, 'jmh' for the pipeline
+    instructions: Optional[float] = None  # hardware event counts of perf stat, None if not counted
+    cycles: Optional[float] = None
+    cache_misses: Optional[float] = None
+    branch_misses: Optional[float] = None
+
+
+class CommitMeasurement(NamedTuple):
+    """Data structure that holds every report obtained by measuring a single commit"""
+    commit_id: str
+    junit_reports: List[JUnitCommitReport]
+    jmh_reports: List[JmhCommitReport]
+    tested_modules: Optional[List[str]] = None  # paths of the modules whose tests were run, None for all
+    resource_usage: Optional[List[ResourceUsage]] = None  # one entry per stage, None if not sampled
+    flink_reports: Optional[List[FlinkCommitReport]] = None  # None if the Flink stage was not run
+
+
+class ProfileTarget(NamedTuple):
+    """Data structure that describes a flagged commit to be profiled together with its predecessor"""
+    commit_id: str
+    previous_commit_id: str
+    test_classes: List[str]  # fully qualified names of the flagged test classes
+    benchmarks: List[str]  # names of the flagged JMH benchmarks, without parameters
+
+
+class MethodProfile(NamedTuple):
+    """Data structure that holds the execution samples of a flight recording per method"""
+    sample_count: int
+    self_samples: Dict[str, int]  # samples with the method as top frame
+    total_samples: Dict[str, int]  # samples with the method anywhere on the stack
+
+
+class MethodDiff(NamedTuple):
+    """Data structure that compares the share of the samples of a method between two commits, in percent"""
+    method: str
+    self_before: float
+    self_after: float
+    self_delta: float
+    total_before: float
+    total_after: float
+    total_delta: float
+
+
+class PipelineConfig(NamedTuple):
+    """Data structure that holds where the JMH pipeline resides and how its benchmarks are run"""
+    path: str
+    jar: str  # name of the executable benchmark jar within the target dir of the pipeline
+    include: Optional[str] = None  # regex selecting the benchmarks to run, all of them if None
+    forks: Optional[int] = None  # the following override the values the benchmarks are annotated with
+    warmup_iterations: Optional[int] = None
+    measurement_iterations: Optional[int] = None
+
+
+class FlinkConfig(NamedTuple):
+    """Data structure that holds how the pipeline jar is submitted to a running Flink cluster"""
+    path: str  # Flink installation whose bin/flink submits the jobs
+    parallelisms: List[int]  # every level is submitted once
+    jar: str  # name of the submitted jar within the target dir of the pipeline
+    classname: Optional[str] = None  # entry class, the main class of the jar if None
+    args: Optional[str] = None  # arguments passed to the entry class
+    rest_url: str = 'http://localhost:8081'  # REST API of the JobManager
+    slots: Optional[int] = None  # task slots jobs may occupy at once, the available slots of the cluster if None
+
+
+class QuiescenceLimits(NamedTuple):
+    """Data structure that holds the limits the host has to stay within before a measurement is started"""
+    max_load: Optional[float] = None  # 1 minute load average
+    max_cpu_usage: Optional[float] = None  # mean usage of the cpus the measurement runs on, between 0 and 1
+    max_swap_rate: Optional[float] = None  # pages swapped in and out per second
+    governor: Optional[str] = None  # required cpu frequency governor, e.g. performance
+    max_wait: float = 300.0  # seconds to wait for the host to become quiet before measuring under contention
+
+
+class AdaptiveSampling(NamedTuple):
+    """Data structure that holds when to stop invoking the test suite of a commit once more"""
+    ci_target: float  # relative width of the 95% confidence interval of the mean runtime each test has to reach
+    time_budget: Optional[float] = None  # seconds all invocations of a commit may take
+    max_invocations: int = 30
+
+
+class MeasurementSettings(NamedTuple):
+    """Data structure that holds the options a commit is measured with"""
+    invocation_count: int
+    test_classes: Optional[List[str]] = None
+    change_impact: bool = False  # only run the tests of modules affected by the changes to the previous commit
+    pipeline: Optional[PipelineConfig] = None  # the JMH pipeline is not run if None
+    build_cache_dir: Optional[str] = None  # unchanged modules are not compiled again if given
+    build_cache_size: int = 10 * 1024 ** 3  # bytes
+    warmup_count: int = 0  # invocations of the test suite whose results are discarded
+    quiescence: Optional[QuiescenceLimits] = None  # the host is not checked before measuring if None
+    adaptive: Optional[AdaptiveSampling] = None  # invocation_count is the minimum number of invocations if given
+    sample_resources: bool = False  # record the resource usage of the processes of every measured stage
+    count_events: bool = False  # also count hardware events with perf stat, requires sample_resources
+    flink: Optional[FlinkConfig] = None  # the Flink stage is not run if None, requires a pipeline
+
+
+class MavenModule(NamedTuple):
+    """Data structure that holds the coordinates and inter-module relations of a maven module"""
+    path: str
+    group_id: str
+    artifact_id: str
+    parent: Optional[Tuple[str, str]]  # (groupId, artifactId)
+    dependencies: List[Tuple[str, str]]
+    version: Optional[str] = None
+
+
+class Pom(NamedTuple):
+    """Data structure that holds the unresolved values of a pom file"""
+    group_id: Optional[str]
+    artifact_id: str
+    version: Optional[str]
+    parent_group_id: Optional[str]
+    parent_artifact_id: Optional[str]
+    parent_version: Optional[str]
+    parent_relative_path: Optional[str]
+    modules: List[str]
+    dependencies: List[Tuple[str, str]]  # (groupId, artifactId)
+    properties: Dict[str, str]
+
+
+class BisectResult(NamedTuple):
+    """Data structure that holds the outcome of bisecting a performance regression of a single test class"""
+    test_name: str
+    good: str
+    bad: str
+    culprit: Optional[str]  # first slow commit, None if bad is not significantly slower than good
+    median_before: float
+    median_after: float
+    p_value: float
+    confidence: float
+    measured_commits: int
+
+
+class SelfBenchmarkResult(NamedTuple):
+    """Data structure that holds the cost of a function of perfdelta for a synthetic history of a given size"""
+    function: str
+    commits: int
+    tests: int
+    seconds: float  # fastest of the repetitions
+    peak_memory: int  # bytes allocated at most at once, as traced by tracemalloc
+
+
+class BenchmarkLogSummary(NamedTuple):
+    """Data structure that summarizes the rows of a Gradoop benchmark log per configuration and parallelism"""
+    key_columns: List[str]  # columns identifying a configuration
+    measured_columns: List[str]
+    configurations: List[Tuple[str, ...]]  # values of the key columns of every group
+    parallelism: Any  # numpy array with one entry per group
+    counts: Any  # numpy array with the number of values of every group and measured column, missing ones left out
+    means: Any  # numpy array of shape (groups, measured columns), nan without values
+    m2: Any  # sums of squared deviations from the means, of the same shape
+
+
+class ScalingPoint(NamedTuple):
+    """Data structure that holds the mean runtime of a configuration at one parallelism"""
+    commit_id: str
+    configuration: str
+    parallelism: int
+    runtime: float
+    speedup: float  # relative to the runtime at parallelism one, measured or fitted
+    efficiency: float  # speedup per parallelism
+
+
+class ScalingFit(NamedTuple):
+    """Data structure that describes how a configuration scales, by the fits of Amdahl's and Gustafson's law"""
+    commit_id: str
+    configuration: str
+    serial_runtime: float  # fitted runtime at parallelism one
+    amdahl_serial_fraction: float
+    gustafson_serial_fraction: float
+    max_parallelism: int
+    efficiency: float  # parallel efficiency at the maximum parallelism
+
+
+class ScalingRegression(NamedTuple):
+    """Data structure that describes a configuration which got slower at one parallelism than at the lowest one"""
+    commit_id: str
+    previous_commit_id: str
+    configuration: str
+    parallelism: int
+    runtime_change: float  # relative change of the mean runtime at the parallelism
+    baseline_change: float  # relative change of the mean runtime at the lowest parallelism
+    p_value: float
 
 
 def build_junit_commit_report(report_data: Dict[str, Any]) -> JUnitCommitReport:
@@ -87,7 +365,15 @@ def build_junit_commit_report(report_data: Dict[str, Any]) -> JUnitCommitReport:
 
 def build_jmh_report(report_data: Dict[str, Any]) -> JmhReport:
     """Builds a JmhReport object from the report data"""
-    primary_metric = PrimaryMetric(**report_data['primaryMetric'])
+    metric_data = report_data['primaryMetric']
+    # the sample mode reports a histogram per iteration instead of raw data
+    primary_metric = PrimaryMetric(score=metric_data['score'],
+                                   scoreError=metric_data['scoreError'],
+                                   scoreConfidence=metric_data['scoreConfidence'],
+                                   scoreUnit=metric_data['scoreUnit'],
+                                   rawData=metric_data.get('rawData', []),
+                                   scorePercentiles=metric_data.get('scorePercentiles', {}),
+                                   rawDataHistogram=metric_data.get('rawDataHistogram'))
     jmh_report = JmhReport(
         benchmark=report_data['benchmark'],
         mode=report_data['mode'],
@@ -100,7 +386,9 @@ def build_jmh_report(report_data: Dict[str, Any]) -> JmhReport:
         warmupTime=report_data['warmupTime'],
         measurementIterations=report_data['measurementIterations'],
         measurementTime=report_data['measurementTime'],
-        primaryMetric=primary_metric)
+        primaryMetric=primary_metric,
+        params=report_data.get('params'),
+        contended=report_data.get('contended', False))
     return jmh_report
 
 
@@ -109,17 +397,26 @@ def build_jmh_commit_report(commit_report_data: Dict[str, Any]) -> JmhCommitRepo
                            jmh_report=build_jmh_report(commit_report_data['jmh_report']))
 
 
+def build_flink_commit_report(commit_report_data: Dict[str, Any]) -> FlinkCommitReport:
+    report_data = commit_report_data['flink_report']
+    vertices = [FlinkVertexMetrics(**vertex) for vertex in report_data['vertices']]
+    return FlinkCommitReport(commit_id=commit_report_data['commit_id'],
+                             flink_report=FlinkJobReport(**dict(report_data, vertices=vertices)))
+
+
+def build_commit_measurement(measurement_data: Dict[str, Any]) -> CommitMeasurement:
+    """Builds a CommitMeasurement object from the measurement data"""
+    return CommitMeasurement(
+        commit_id=measurement_data['commit_id'],
+        junit_reports=list(map(build_junit_commit_report, measurement_data['junit_reports'])),
+        jmh_reports=list(map(build_jmh_commit_report, measurement_data['jmh_reports'])),
+        tested_modules=measurement_data.get('tested_modules'),
+        resource_usage=[ResourceUsage(**usage) for usage in measurement_data['resource_usage']]
+        if measurement_data.get('resource_usage') is not None else None,
+        flink_reports=list(map(build_flink_commit_report, measurement_data['flink_reports']))
+        if measurement_data.get('flink_reports') is not None else None)
+
+
 def create_junit_commit_report(commit: str, report: JUnitReport) -> JUnitCommitReport:
     """Creates a CommitReport obj by associating a commit id with a JUnitReport"""
     return JUnitCommitReport(commit_id=commit, report=report)
-
-
-def create_junit_report(report_xml) -> JUnitReport:
-    """Creates a JUnitReport obj"""
-    return JUnitReport(
-        test_name=report_xml.name,
-        test_run=report_xml.tests,
-        time_elapsed=report_xml.time,
-        failures=report_xml.failures,
-        errors=report_xml.errors,
-        skipped=report_xml.skipped)
@@ -0,0 +1,117 @@
+import os
+import time
+from typing import Dict, List, Set, Tuple
+
+from model import objects
+
+POLL_INTERVAL = 5  # seconds between two checks while waiting for the host to become quiet
+SAMPLE_INTERVAL = 1.0  # seconds cpu usage and swap activity are observed for
+
+GOVERNOR_PATH = '/sys/devices/system/cpu/cpu{cpu}/cpufreq/scaling_governor'
+
+
+def wait_for_quiescence(limits: objects.QuiescenceLimits) -> bool:
+    """Waits until the host stays within the limits and returns True, or False if it did not within limits.max_wait.
+
+    Only the cpus the current thread may run on, which measured processes inherit, are checked for usage and their
+    frequency governor. A wrong governor is not waited for, it can only be changed by an administrator.
+    """
+    cpus = os.sched_getaffinity(0)
+    governors_ok = check_governors(limits, cpus)
+
+    deadline = time.monotonic() + limits.max_wait
+    while True:
+        violations = check_host(limits, cpus)
+        if len(violations) == 0:
+            return governors_ok
+        if time.monotonic() >= deadline:
+            print('Measuring under contention: {violations}'.format(violations='; '.join(violations)))
+            return False
+
+        print('Waiting for the host to become quiet: {violations}'.format(violations='; '.join(violations)))
+        time.sleep(POLL_INTERVAL)
+
+
+def check_host(limits: objects.QuiescenceLimits, cpus: Set[int]) -> List[str]:
+    """Returns a description of every limit the host exceeds at the moment."""
+    violations = []  # type: List[str]
+
+    load = os.getloadavg()[0]
+    if limits.max_load is not None and load > limits.max_load:
+        violations.append('load average {load:.2f} > {max}'.format(load=load, max=limits.max_load))
+
+    if limits.max_cpu_usage is None and limits.max_swap_rate is None:
+        return violations
+
+    cpu_times, swapped_pages = read_cpu_times(), read_swapped_pages()
+    time.sleep(SAMPLE_INTERVAL)
+    cpu_usage = compute_cpu_usage(cpu_times, read_cpu_times(), cpus)
+    swap_rate = (read_swapped_pages() - swapped_pages) / SAMPLE_INTERVAL
+
+    if limits.max_cpu_usage is not None and cpu_usage > limits.max_cpu_usage:
+        violations.append('usage of cpus {cpus} {usage:.0%} > {max:.0%}'.format(
+            cpus=','.join(map(str, sorted(cpus))), usage=cpu_usage, max=limits.max_cpu_usage))
+    if limits.max_swap_rate is not None and swap_rate > limits.max_swap_rate:
+        violations.append('swapping {rate:.0f} pages/s > {max}'.format(rate=swap_rate, max=limits.max_swap_rate))
+
+    return violations
+
+
+def check_governors(limits: objects.QuiescenceLimits, cpus: Set[int]) -> bool:
+    """Returns False if the frequency governor of one of the cpus differs from the required one."""
+    if limits.governor is None:
+        return True
+
+    deviating = {cpu: governor for cpu, governor in read_governors(cpus).items() if governor != limits.governor}
+    for cpu, governor in sorted(deviating.items()):
+        print('Warning: cpu {cpu} uses the {governor} governor instead of {required}'.format(
+            cpu=cpu, governor=governor, required=limits.governor))
+    return len(deviating) == 0
+
+
+def read_governors(cpus: Set[int]) -> Dict[int, str]:
+    """Returns the frequency governor of every given cpu that exposes one, which virtual machines often do not."""
+    governors = {}  # type: Dict[int, str]
+    for cpu in cpus:
+        try:
+            with open(GOVERNOR_PATH.format(cpu=cpu)) as file:
+                governors[cpu] = file.read().strip()
+        except OSError:
+            continue
+    return governors
+
+
+def read_cpu_times() -> Dict[int, Tuple[int, int]]:
+    """Returns the busy and the total time of every cpu from /proc/stat, in clock ticks."""
+    times = {}  # type: Dict[int, Tuple[int, int]]
+    with open('/proc/stat') as file:
+        for line in file:
+            if not line.startswith('cpu') or line.startswith('cpu '):
+                continue
+            fields = line.split()
+            values = [int(value) for value in fields[1:]]
+            # idle and iowait
+            idle = values[3] + (values[4] if len(values) > 4 else 0)
+            # guest times are already included in user and nice
+            total = sum(values[:8])
+            times[int(fields[0][3:])] = (total - idle, total)
+    return times
+
+
+def compute_cpu_usage(before: Dict[int, Tuple[int, int]], after: Dict[int, Tuple[int, int]],
+                      cpus: Set[int]) -> float:
+    """Returns the mean usage of the given cpus between two readings of read_cpu_times, between 0 and 1."""
+    busy = sum(after[cpu][0] - before[cpu][0] for cpu in cpus if cpu in before and cpu in after)
+    total = sum(after[cpu][1] - before[cpu][1] for cpu in cpus if cpu in before and cpu in after)
+    return busy / total if total > 0 else 0.0
+
+
+def read_swapped_pages() -> int:
+    """Returns the number of pages swapped in and out since boot, from /proc/vmstat."""
+    pages = 0
+    with open('/proc/vmstat') as file:
+        for line in file:
+            name, _, value = line.partition(' ')
+            if name in ('pswpin', 'pswpout'):
+                pages += int(value)
+    return pages
@@ -0,0 +1,146 @@
+import asyncio
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+import build_cache
+import const
+import impact
+import parallel
+import runner
+from model import objects
+from run.maven import get_mvn_package_command
+
+# number of commits that may be built ahead of the one being measured, each of them occupies a worktree
+BUILD_AHEAD = 1
+
+
+def run_pipelined(path_to_repo: str, commit_ids: List[str], settings: objects.MeasurementSettings,
+                  previous_commits: Dict[str, str], build_cpus: Set[int],
+                  measure_cpus: Set[int]) -> Iterator[objects.CommitMeasurement]:
+    """Measures the given commits one after another, while building the next ones in other worktrees.
+
+    Checkout and build of a commit run as asyncio subprocesses on the build cpus, its measurement runs on the measure
+    cpus as soon as the previous measurement is done. At most BUILD_AHEAD commits are built in advance, so builds
+    never queue up. Measurements are yielded in the order of the given commit ids.
+    """
+    worktrees = parallel.prepare_worktrees(path_to_repo, BUILD_AHEAD + 1)
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    # measurements run the blocking code of runner.py in a thread of their own
+    executor = ThreadPoolExecutor(max_workers=1)
+
+    # affinity is a property of threads on linux and inherited by child processes, so build processes started by the
+    # event loop run on the build cpus, those started by the measurement thread on the measure cpus
+    original_cpus = os.sched_getaffinity(0)
+    os.sched_setaffinity(0, build_cpus)
+
+    results, stages = loop.run_until_complete(start_stages(worktrees, commit_ids, settings, previous_commits,
+                                                           measure_cpus, executor))
+    tasks = list(stages)
+    try:
+        running = list(stages)
+        for i in range(len(commit_ids)):
+            next_result = loop.create_task(results.get())
+            tasks.append(next_result)
+            while not next_result.done():
+                loop.run_until_complete(asyncio.wait([next_result] + running, return_when=asyncio.FIRST_COMPLETED))
+                for stage in [stage for stage in running if stage.done()]:
+                    # raises the error of a failed stage
+                    stage.result()
+                    running.remove(stage)
+            yield next_result.result()
+    finally:
+        for task in tasks:
+            task.cancel()
+        loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+        executor.shutdown(wait=True)
+        loop.close()
+        asyncio.set_event_loop(None)
+        os.sched_setaffinity(0, original_cpus)
+
+
+async def start_stages(worktrees: List[str], commit_ids: List[str], settings: objects.MeasurementSettings,
+                       previous_commits: Dict[str, str], measure_cpus: Set[int],
+                       executor: ThreadPoolExecutor) -> Tuple[asyncio.Queue, List[asyncio.Task]]:
+    """Starts the build and the measure stage, which hand over built commits together with their worktree."""
+    free_worktrees = asyncio.Queue()  # type: asyncio.Queue
+    for worktree in worktrees:
+        free_worktrees.put_nowait(worktree)
+    built = asyncio.Queue(maxsize=BUILD_AHEAD)  # type: asyncio.Queue
+    results = asyncio.Queue()  # type: asyncio.Queue
+
+    loop = asyncio.get_event_loop()
+    stages = [loop.create_task(build_stage(commit_ids, settings, free_worktrees, built)),
+              loop.create_task(measure_stage(len(commit_ids), settings, previous_commits, measure_cpus, executor,
+                                             free_worktrees, built, results))]
+    return results, stages
+
+
+async def build_stage(commit_ids: List[str], settings: objects.MeasurementSettings, free_worktrees: asyncio.Queue,
+                      built: asyncio.Queue) -> None:
+    for commit_id in commit_ids:
+        worktree = await free_worktrees.get()
+        await build_commit(worktree, commit_id, settings)
+        await built.put((commit_id, worktree))
+
+
+async def measure_stage(count: int, settings: objects.MeasurementSettings, previous_commits: Dict[str, str],
+                        measure_cpus: Set[int], executor: ThreadPoolExecutor, free_worktrees: asyncio.Queue,
+                        built: asyncio.Queue, results: asyncio.Queue) -> None:
+    loop = asyncio.get_event_loop()
+    for i in range(count):
+        commit_id, worktree = await built.get()
+        measurement = await loop.run_in_executor(executor, functools.partial(
+            measure_built_commit, worktree, commit_id, settings, previous_commits.get(commit_id), measure_cpus))
+        await free_worktrees.put(worktree)
+        await results.put(measurement)
+
+
+def measure_built_commit(worktree: str, commit_id: str, settings: objects.MeasurementSettings,
+                         previous_commit_id: Optional[str], measure_cpus: Set[int]) -> objects.CommitMeasurement:
+    os.sched_setaffinity(0, measure_cpus)
+    return runner.measure_commit(worktree, commit_id, settings, previous_commit_id, prebuilt=True)
+
+
+async def build_commit(worktree: str, commit_id: str, settings: objects.MeasurementSettings) -> None:
+    """Checks out a commit in the worktree, and compiles and packages every module of it without running tests.
+
+    Since the measurement does not clean the worktree, the outputs of the commit built before are removed first,
+    unless the build cache restores them. Nothing is installed, so the local maven repository used by the running
+    measurement is left alone.
+    """
+    print('Building {commit} in {worktree}'.format(commit=commit_id, worktree=worktree))
+    await run_command('git checkout -q {commit}'.format(commit=commit_id), worktree,
+                      'Checking out {commit} in {worktree} failed'.format(commit=commit_id, worktree=worktree))
+
+    path_to_pom = os.path.join(worktree, const.POM)
+    if settings.build_cache_dir is None:
+        await run_command(get_mvn_package_command(path_to_pom), worktree,
+                          'Could not build project described by {pom}'.format(pom=path_to_pom))
+        return
+
+    module_keys = build_cache.get_module_keys(worktree, impact.load_reactor(worktree))
+    for module_dir in build_cache.restore_outputs(worktree, module_keys, settings.build_cache_dir):
+        del module_keys[module_dir]
+    await run_command(get_mvn_package_command(path_to_pom, reuse_outputs=True), worktree,
+                      'Could not build project described by {pom}'.format(pom=path_to_pom))
+    build_cache.store_outputs(worktree, module_keys, settings.build_cache_dir, settings.build_cache_size)
+
+
+async def run_command(cmd: str, cwd: str, failure_message: str) -> None:
+    """Runs a shell command without blocking the event loop."""
+    process = await asyncio.create_subprocess_shell(cmd, cwd=cwd)
+    if await process.wait() != 0:
+        print(failure_message)
+        exit(1)
+
+
+def split_cpus(cpus: Set[int]) -> Tuple[Set[int], Set[int]]:
+    """Splits the given cpus into a set for building and a set for measuring, measurements get the upper half."""
+    ordered = sorted(cpus)
+    if len(ordered) < 2:
+        return set(ordered), set(ordered)
+    middle = len(ordered) // 2
+    return set(ordered[:middle]), set(ordered[middle:])
@@ -0,0 +1,104 @@
+import multiprocessing
+import os
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from git import GitCommandError, Repo  # type: ignore
+
+import const
+import runner
+import utils
+from model import objects
+
+# state of the current pool worker, set up once per process by init_worker
+_worker = {}  # type: dict
+
+
+def run_parallel(path_to_repo: str, commit_ids: List[str], settings: objects.MeasurementSettings,
+                 previous_commits: Dict[str, str], workers: int, worker_cpus: List[Set[int]] = None,
+                 worker_memory: str = None) -> Iterator[objects.CommitMeasurement]:
+    """Measures the given commits in a pool of worker processes, each owning a git worktree of the repository.
+
+    Worktrees are created next to the repository and reused by later runs. Measurements are yielded in the order of
+    the given commit ids, exactly as if the commits had been measured one after another.
+    """
+    if worker_cpus is not None and len(worker_cpus) != workers:
+        print('Error: {n} cpu sets given for {workers} workers.'.format(n=len(worker_cpus), workers=workers))
+        exit(1)
+
+    worktrees = prepare_worktrees(path_to_repo, workers)
+
+    worker_ids = multiprocessing.Queue()  # type: multiprocessing.Queue
+    for worker_id in range(workers):
+        worker_ids.put(worker_id)
+    pipeline_lock = multiprocessing.Lock()
+
+    tasks = [(commit_id, settings, previous_commits.get(commit_id)) for commit_id in commit_ids]
+
+    with multiprocessing.Pool(processes=workers, initializer=init_worker,
+                              initargs=(worker_ids, worktrees, worker_cpus, worker_memory, pipeline_lock)) as pool:
+        try:
+            # imap keeps the order of the tasks, so results are merged in history order
+            yield from pool.imap(measure_in_worktree, tasks, chunksize=1)
+        except RuntimeError as error:
+            print('Error: {error}'.format(error=error))
+            exit(1)
+
+
+def init_worker(worker_ids: multiprocessing.Queue, worktrees: List[str], worker_cpus: List[Set[int]],
+                worker_memory: str, pipeline_lock) -> None:
+    """Binds the current pool process to a worktree, a cpu set and a memory budget."""
+    worker_id = worker_ids.get()
+    _worker['worktree'] = worktrees[worker_id]
+    _worker['pipeline_lock'] = pipeline_lock
+
+    # child processes (mvn, surefire forks, java -jar) inherit both affinity and environment
+    if worker_cpus is not None:
+        os.sched_setaffinity(0, worker_cpus[worker_id])
+    if worker_memory is not None:
+        os.environ['JAVA_TOOL_OPTIONS'] = '-Xmx{memory}'.format(memory=worker_memory)
+
+
+def measure_in_worktree(task: Tuple[str, objects.MeasurementSettings, Optional[str]]) -> objects.CommitMeasurement:
+    """Checks out a commit in the worktree of the current worker and measures it."""
+    commit_id, settings, previous_commit_id = task
+    worktree = _worker['worktree']
+
+    try:
+        Repo(worktree).git.checkout(commit_id)
+        return runner.measure_commit(worktree, commit_id, settings, previous_commit_id,
+                                     pipeline_lock=_worker['pipeline_lock'])
+    except (GitCommandError, SystemExit):
+        # a dying pool process would leave the pool waiting forever, so report the failure instead
+        raise RuntimeError('Measuring commit {commit} in {worktree} failed'.format(commit=commit_id,
+                                                                                  worktree=worktree))
+
+
+def prepare_worktrees(path_to_repo: str, count: int) -> List[str]:
+    """Returns paths to count detached worktrees of the repository, adding the ones that do not exist yet."""
+    repo = Repo(path_to_repo)
+    repo.git.worktree('prune')
+
+    worktree_root = utils.create_dir(get_worktree_root(path_to_repo))
+    registered = get_registered_worktrees(repo)
+
+    worktrees = []
+    for worker_id in range(count):
+        path = os.path.join(worktree_root, 'worker-{id}'.format(id=worker_id))
+        if path not in registered:
+            print('Adding worktree {path}'.format(path=path))
+            repo.git.worktree('add', '--detach', path, 'HEAD')
+        worktrees.append(path)
+
+    return worktrees
+
+
+def get_registered_worktrees(repo: Repo) -> List[str]:
+    """Returns the absolute paths of all worktrees git knows about."""
+    output = repo.git.worktree('list', '--porcelain')
+    return [os.path.abspath(line.split(' ', 1)[1]) for line in output.splitlines() if line.startswith('worktree ')]
+
+
+def get_worktree_root(path_to_repo: str) -> str:
+    """Returns path to the dir holding the worktrees, which is located next to the repository."""
+    parent_dir = utils.get_parent_dir(path_to_repo)
+    return os.path.join(parent_dir, const.WORKTREES_DIRECTORY)
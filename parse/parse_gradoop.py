@@ -1,73 +1,137 @@
-import argparse
 import csv
-from statistics import mean
-from typing import List, Dict, Any
+import itertools
+from typing import Dict, List, Tuple
 
-from model.objects import BenchmarkReportRow
+import numpy  # type: ignore
 
+from model.objects import BenchmarkLogSummary
 
-def parse_gradoop_benchmark_report(path_to_csv: str) -> List[BenchmarkReportRow]:
-    with open(path_to_csv) as csv_file:
-        csv_reader = csv.reader(csv_file, delimiter='|')
-        next(csv_reader, None)  # skip the header
-
-        benchmark_report_rows = []
-        for line in csv_reader:
-            parallelism = int(line[0])
-            runtime = int(line[10])
-            benchmark_report_row = BenchmarkReportRow(parallelism, runtime)
-            benchmark_report_rows.append(benchmark_report_row)
-
-        return benchmark_report_rows
-
-
-def group_benchmark_report_by_parallelism(rows: List[BenchmarkReportRow]) -> Dict[int, Dict[str, Any]]:
-    result = {}
-    for row in rows:
-        if row.parallelism not in result.keys():
-            result[row.parallelism] = {'runtimes': [row.runtime]}
-        else:
-            result[row.parallelism]['runtimes'].append(row.runtime)
-
-    return result
-
-
-def compute_mean_runtime(report: Dict[int, Dict[str, Any]]) -> Dict[int, Dict[str, Any]]:
-    for parallelism in report.keys():
-        runtimes = report[parallelism]['runtimes']
-        mean_runtime = round(mean(runtimes))
-        report[parallelism]['mean_runtime'] = mean_runtime
-
-    return report
+PARALLELISM_COLUMN = 0
+CHUNK_ROWS = 65536  # rows converted at once, bounds the memory used for logs of any size
+MISSING_VALUES = {'', 'n/a', 'na', 'nan', 'null', 'none', '-'}
 
 
-def compute_speedup(report: Dict[int, Dict[str, Any]]) -> Dict[int, Dict[str, Any]]:
-    if 1 not in report.keys():
-        print('Could not compute speedup because no runtime data for parallelism one given.')
-        return report
+def parse_gradoop_benchmark_report(path_to_csv: str, key_columns: List[str] = None) -> BenchmarkLogSummary:
+    """Reads a Gradoop benchmark log and summarizes every column per configuration and parallelism.
 
-    base_runtime = report[1]['mean_runtime']
-
-    for parallelism in report.keys():
-        speedup = base_runtime / report[parallelism]['mean_runtime']
-        report[parallelism]['speedup'] = speedup
-
-    return report
-
-
-def main():
-    parser = argparse.ArgumentParser(
-        description='Parse Gradoop Benchmark result and compute analytics')
-    parser.add_argument('path', type=str, help='Path to csv')
-    args = parser.parse_args()
-    path = args.path
-
-    report_rows = parse_gradoop_benchmark_report(path)
-    grouped_report = group_benchmark_report_by_parallelism(report_rows)
-    grouped_report = compute_mean_runtime(grouped_report)
-    grouped_report = compute_speedup(grouped_report)
-    print(grouped_report)
-
-
-if __name__ == '__main__':
-    main()
+    The log is read in chunks of CHUNK_ROWS rows, whose columns are converted and aggregated with numpy, so it does
+    not have to fit into memory. Columns that are numeric in the first chunk are measured columns and get a count, a
+    mean and a sum of squared deviations per group, all other columns besides the parallelism and the given key
+    columns, e.g. a numeric scale factor, identify a configuration. Values of measured columns that are not numbers,
+    like empty ones or N/A, are skipped.
+    """
+    with open(path_to_csv, newline='') as csv_file:
+        csv_reader = csv.reader(csv_file, delimiter='|')
+        header = [name.strip() for name in next(csv_reader)]
+        unknown_columns = [name for name in key_columns or [] if name not in header]
+        if len(unknown_columns) > 0:
+            print('Error: {csv} has no columns named {columns}'.format(csv=path_to_csv,
+                                                                      columns=', '.join(unknown_columns)))
+            exit(1)
+
+        measured_indices = None  # type: List[int]
+        key_indices = None  # type: List[int]
+        groups = {}  # type: Dict[Tuple[str, ...], int]
+        counts = numpy.zeros((0, 0))
+        means = numpy.zeros((0, 0))
+        m2 = numpy.zeros((0, 0))
+
+        while True:
+            rows = [row for row in itertools.islice(csv_reader, CHUNK_ROWS) if len(row) == len(header)]
+            if len(rows) == 0:
+                break
+            columns = list(zip(*rows))
+            if measured_indices is None:
+                measured_indices = [index for index, column in enumerate(columns)
+                                    if index != PARALLELISM_COLUMN and header[index] not in (key_columns or [])
+                                    and is_numeric(column)]
+                key_indices = [index for index in range(len(header))
+                               if index != PARALLELISM_COLUMN and index not in measured_indices]
+                if len(measured_indices) == 0:
+                    print('Error: {csv} has no numeric columns besides the parallelism'.format(csv=path_to_csv))
+                    exit(1)
+                counts = numpy.zeros((0, len(measured_indices)))
+                means = numpy.zeros((0, len(measured_indices)))
+                m2 = numpy.zeros((0, len(measured_indices)))
+
+            # rows are grouped by their configuration and their parallelism
+            keys = list(zip(*([columns[index] for index in key_indices] + [columns[PARALLELISM_COLUMN]])))
+            chunk_keys, inverse = numpy.unique(numpy.array(['\0'.join(value.strip() for value in key) for key in keys]),
+                                               return_inverse=True)
+            group_ids = []  # type: List[int]
+            for chunk_key in chunk_keys:
+                key = tuple(str(chunk_key).split('\0'))
+                group_ids.append(groups.setdefault(key, len(groups)))
+
+            values = numpy.stack([to_float(columns[index]) for index in measured_indices], axis=1)
+            counts, means, m2 = merge_chunk(counts, means, m2, numpy.array(group_ids)[inverse], values, len(groups))
+
+    keys = sorted(groups, key=groups.get)
+    means[counts == 0] = numpy.nan
+    return BenchmarkLogSummary(
+        key_columns=[header[index] for index in key_indices or []],
+        measured_columns=[header[index] for index in measured_indices or []],
+        configurations=[key[:-1] for key in keys],
+        parallelism=numpy.array([int(key[-1]) for key in keys], dtype=numpy.int64),
+        counts=counts, means=means, m2=m2)
+
+
+def merge_chunk(counts, means, m2, group_ids, values, group_count: int):
+    """Adds the values of a chunk to the per group and column counts, means and sums of squared deviations.
+
+    Missing values (nan) are not counted. The statistics of the chunk are computed per group and merged with the
+    previous ones (Chan et al.), which stays accurate for large values, unlike accumulating sums of squares.
+    """
+    column_count = values.shape[1]
+    valid = ~numpy.isnan(values)
+    chunk_counts = sum_by_group(group_ids, valid.astype(numpy.float64), group_count)
+    chunk_sums = sum_by_group(group_ids, numpy.where(valid, values, 0.0), group_count)
+    present = chunk_counts > 0
+    chunk_means = numpy.zeros((group_count, column_count))
+    chunk_means[present] = chunk_sums[present] / chunk_counts[present]
+    chunk_m2 = sum_by_group(group_ids, numpy.where(valid, values - chunk_means[group_ids], 0.0) ** 2, group_count)
+
+    # groups first seen in this chunk
+    counts = numpy.vstack([counts, numpy.zeros((group_count - len(counts), column_count))])
+    means = numpy.vstack([means, numpy.zeros((group_count - len(means), column_count))])
+    m2 = numpy.vstack([m2, numpy.zeros((group_count - len(m2), column_count))])
+
+    total_counts = counts + chunk_counts
+    delta = chunk_means - means
+    weights = numpy.divide(chunk_counts, total_counts, out=numpy.zeros((group_count, column_count)),
+                           where=total_counts > 0)
+    merged_means = means + delta * weights
+    merged_m2 = m2 + chunk_m2 + delta ** 2 * counts * weights
+    return total_counts, merged_means, merged_m2
+
+
+def sum_by_group(group_ids, values, group_count: int):
+    """Returns the sums of the rows of values per group, as an array of shape (groups, columns)"""
+    return numpy.stack([numpy.bincount(group_ids, weights=values[:, column], minlength=group_count)
+                        for column in range(values.shape[1])], axis=1)
+
+
+def is_numeric(column: Tuple[str, ...]) -> bool:
+    """Returns whether most values of the column besides missing ones are numbers, e.g. despite a stray error text"""
+    number_count = int(numpy.count_nonzero(~numpy.isnan(to_float(column))))
+    present_count = sum(1 for value in column if not is_missing(value))
+    return number_count > present_count / 2
+
+
+def to_float(column: Tuple[str, ...]):
+    """Converts the values of a column to a float array, values that are not numbers become nan"""
+    try:
+        return numpy.array(column, dtype=numpy.float64)
+    except ValueError:
+        return numpy.array([parse_float(value) for value in column], dtype=numpy.float64)
+
+
+def parse_float(value: str) -> float:
+    try:
+        return float(value)
+    except ValueError:
+        return numpy.nan
+
+
+def is_missing(value: str) -> bool:
+    return value.strip().lower() in MISSING_VALUES
@@ -0,0 +1,49 @@
+from typing import Iterable, List, Set
+
+from model.objects import MethodProfile
+
+EXECUTION_SAMPLE = 'jdk.ExecutionSample'
+
+
+def read_execution_samples(lines: Iterable[str], profile: MethodProfile = None) -> MethodProfile:
+    """Counts the execution samples printed by the jfr tool per method, adding them to the given profile if any.
+
+    A method gets a self sample if it is the top frame of a stack trace and a total sample if it is any of its frames,
+    counted once per stack trace even if the method is recursive. Lines are consumed one at a time, so recordings of
+    any size can be read.
+    """
+    if profile is None:
+        profile = MethodProfile(sample_count=0, self_samples={}, total_samples={})
+
+    sample_count = profile.sample_count
+    in_stack_trace = False
+    frames = []  # type: List[str]
+    for line in lines:
+        stripped = line.strip()
+        if stripped.startswith('stackTrace = ['):
+            in_stack_trace = True
+            frames = []
+        elif in_stack_trace and stripped == ']':
+            in_stack_trace = False
+            if len(frames) > 0:
+                sample_count += 1
+                add_sample(profile, frames)
+        elif in_stack_trace and stripped != '...':
+            frames.append(get_method(stripped))
+
+    return profile._replace(sample_count=sample_count)
+
+
+def add_sample(profile: MethodProfile, frames: List[str]) -> None:
+    profile.self_samples[frames[0]] = profile.self_samples.get(frames[0], 0) + 1
+    seen = set()  # type: Set[str]
+    for method in frames:
+        if method not in seen:
+            seen.add(method)
+            profile.total_samples[method] = profile.total_samples.get(method, 0) + 1
+
+
+def get_method(frame: str) -> str:
+    """Returns the method of a printed frame, e.g. java.util.HashMap.put(Object, Object) line: 612"""
+    line_index = frame.rfind(' line:')
+    return frame[:line_index] if line_index >= 0 else frame
@@ -0,0 +1,38 @@
+from typing import Dict
+
+
+def read_counters(filename: str) -> Dict[str, float]:
+    """Reads the counts of a perf stat run written with -x, and returns them by event name.
+
+    Counts of events that were not supported or not counted are left out. Events counted separately per core type on
+    hybrid cpus, like cpu_core/instructions/ and cpu_atom/instructions/, are added up.
+    """
+    counters = {}  # type: Dict[str, float]
+    with open(filename) as file:
+        for line in file:
+            if line.startswith('#') or len(line.strip()) == 0:
+                continue
+            fields = line.strip().split(',')
+            if len(fields) < 3:
+                continue
+            value = parse_count(fields[0])
+            if value is None:
+                continue
+            event = get_event_name(fields[2])
+            counters[event] = counters.get(event, 0.0) + value
+    return counters
+
+
+def get_event_name(event: str) -> str:
+    """Strips the pmu and the modifiers from an event, so cpu_core/cycles/ and cycles:u become cycles."""
+    if '/' in event:
+        event = event.strip('/').split('/')[-1]
+    return event.split(':')[0]
+
+
+def parse_count(value: str):
+    try:
+        return float(value)
+    except ValueError:
+        # <not supported> or <not counted>
+        return None
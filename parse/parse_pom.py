@@ -0,0 +1,189 @@
+import hashlib
+import os.path
+import re
+import xml.etree.ElementTree as ElementTree
+from typing import Dict, List, Optional, Tuple
+
+import const
+from model.objects import MavenModule, Pom
+
+PROPERTY_PATTERN = re.compile(r'\$\{([^}]+)\}')
+
+# parsed poms by git blob hash, so unchanged poms are parsed once no matter how many commits are visited
+_pom_cache = {}  # type: Dict[str, Pom]
+
+
+def read_reactor(path_to_pom: str) -> List[MavenModule]:
+    """Returns the module described by the pom followed by all of its submodules, like the maven reactor would.
+
+    Only the modules section of the project itself is taken into account, modules declared in profiles are not.
+    """
+    module = load_module(path_to_pom)
+    modules = [module]
+    for name in read_pom(path_to_pom).modules:
+        path = os.path.join(module.path, name)
+        if os.path.isdir(path):
+            path = os.path.join(path, const.POM)
+        modules.extend(read_reactor(path))
+
+    return modules
+
+
+def fetch_project_version(path_to_pom: str) -> str:
+    """Returns the resolved project.version of the specified project."""
+    return load_module(path_to_pom).version
+
+
+def load_module(path_to_pom: str) -> MavenModule:
+    """Resolves the coordinates and dependencies of the project described by the pom, including inherited values."""
+    pom = read_pom(path_to_pom)
+    properties = resolve_properties(path_to_pom)
+
+    parent = None
+    if pom.parent_artifact_id is not None:
+        parent = (pom.parent_group_id, pom.parent_artifact_id)
+    dependencies = [(interpolate(group_id, properties), interpolate(artifact_id, properties))
+                    for group_id, artifact_id in pom.dependencies]
+
+    return MavenModule(path=os.path.dirname(os.path.abspath(path_to_pom)),
+                       group_id=properties['project.groupId'],
+                       artifact_id=properties['project.artifactId'],
+                       parent=parent,
+                       dependencies=dependencies,
+                       version=properties['project.version'])
+
+
+def resolve_properties(path_to_pom: str) -> Dict[str, str]:
+    """Returns the properties of a project, merged with those inherited from its parents within the file system."""
+    pom = read_pom(path_to_pom)
+    path_to_parent_pom = find_parent_pom(path_to_pom, pom)
+    properties = dict(resolve_properties(path_to_parent_pom)) if path_to_parent_pom is not None else {}
+    properties.update(pom.properties)
+
+    group_id = pom.group_id if pom.group_id is not None else pom.parent_group_id
+    version = pom.version if pom.version is not None else pom.parent_version
+    properties.update({
+        'project.parent.groupId': pom.parent_group_id,
+        'project.parent.version': pom.parent_version,
+        'parent.version': pom.parent_version,
+        'project.groupId': group_id,
+        'project.artifactId': pom.artifact_id,
+        'project.version': version,
+        'pom.groupId': group_id,
+        'pom.version': version,
+    })
+    # the version itself may be defined by a property, e.g. ${revision}
+    for key in ('project.version', 'pom.version', 'project.groupId', 'pom.groupId'):
+        properties[key] = interpolate(properties[key], properties)
+
+    return properties
+
+
+def find_parent_pom(path_to_pom: str, pom: Pom) -> Optional[str]:
+    """Returns the path to the pom of the parent if it is part of the file system, otherwise None."""
+    if pom.parent_artifact_id is None:
+        return None
+
+    relative_path = pom.parent_relative_path if pom.parent_relative_path is not None else os.path.join(
+        os.pardir, const.POM)
+    path = os.path.join(os.path.dirname(os.path.abspath(path_to_pom)), relative_path)
+    if os.path.isdir(path):
+        path = os.path.join(path, const.POM)
+
+    if os.path.isfile(path) and read_pom(path).artifact_id == pom.parent_artifact_id:
+        return path
+    return None
+
+
+def read_pom(path_to_pom: str) -> Pom:
+    """Returns the parsed pom, reusing an earlier result if a pom with identical content was parsed before."""
+    with open(path_to_pom, 'rb') as file:
+        content = file.read()
+
+    key = get_blob_hash(content)
+    if key not in _pom_cache:
+        _pom_cache[key] = parse_pom(content)
+    return _pom_cache[key]
+
+
+def parse_pom(content: bytes) -> Pom:
+    """Extracts the values of a pom that are needed to build the reactor, without resolving anything."""
+    project = ElementTree.fromstring(content)
+
+    parent = find_child(project, 'parent')
+    parent_group_id, parent_artifact_id, parent_version, parent_relative_path = None, None, None, None
+    if parent is not None:
+        parent_group_id, parent_artifact_id = get_coordinates(parent)
+        parent_version = find_text(parent, 'version')
+        parent_relative_path = find_text(parent, 'relativePath')
+
+    modules = []  # type: List[str]
+    modules_element = find_child(project, 'modules')
+    if modules_element is not None:
+        modules = [module.text.strip() for module in find_children(modules_element, 'module')
+                   if module.text is not None]
+
+    dependencies = []  # type: List[Tuple[str, str]]
+    dependencies_element = find_child(project, 'dependencies')
+    if dependencies_element is not None:
+        dependencies = [get_coordinates(dependency)
+                        for dependency in find_children(dependencies_element, 'dependency')]
+
+    properties = {}  # type: Dict[str, str]
+    properties_element = find_child(project, 'properties')
+    if properties_element is not None:
+        for prop in properties_element:
+            if isinstance(prop.tag, str):
+                properties[get_local_name(prop.tag)] = (prop.text or '').strip()
+
+    return Pom(group_id=find_text(project, 'groupId'),
+               artifact_id=find_text(project, 'artifactId'),
+               version=find_text(project, 'version'),
+               parent_group_id=parent_group_id,
+               parent_artifact_id=parent_artifact_id,
+               parent_version=parent_version,
+               parent_relative_path=parent_relative_path,
+               modules=modules,
+               dependencies=dependencies,
+               properties=properties)
+
+
+def interpolate(value: Optional[str], properties: Dict[str, str]) -> Optional[str]:
+    """Replaces ${...} expressions by the value of the respective property, leaving unknown ones untouched."""
+    for i in range(10):
+        if value is None or '${' not in value:
+            break
+        replaced = PROPERTY_PATTERN.sub(lambda match: properties.get(match.group(1)) or match.group(0), value)
+        if replaced == value:
+            break
+        value = replaced
+
+    return value
+
+
+def get_blob_hash(content: bytes) -> str:
+    """Returns the object id git assigns to a file with the given content."""
+    header = 'blob {size}\0'.format(size=len(content)).encode('utf-8')
+    return hashlib.sha1(header + content).hexdigest()
+
+
+def get_coordinates(element: ElementTree.Element) -> Tuple[str, str]:
+    return find_text(element, 'groupId'), find_text(element, 'artifactId')
+
+
+def find_text(element: ElementTree.Element, name: str) -> Optional[str]:
+    child = find_child(element, name)
+    return child.text.strip() if child is not None and child.text is not None else None
+
+
+def find_child(element: ElementTree.Element, name: str) -> Optional[ElementTree.Element]:
+    return next(iter(find_children(element, name)), None)
+
+
+def find_children(element: ElementTree.Element, name: str) -> List[ElementTree.Element]:
+    """Returns the direct children with the given name, regardless of the namespace of the pom."""
+    return [child for child in element if isinstance(child.tag, str) and get_local_name(child.tag) == name]
+
+
+def get_local_name(tag: str) -> str:
+    return tag.rsplit('}', 1)[-1]
@@ -0,0 +1,73 @@
+import xml.etree.ElementTree as ElementTree
+from typing import Dict, List
+
+from model.objects import JUnitReport
+
+
+def read_junit_reports(filenames: List[str]) -> List[JUnitReport]:
+    """Reads the given surefire report files one after another and returns their reports in the same order.
+
+    Parsing is bound by the interpreter, so threads do not read faster. Commits are measured in parallel by the
+    worker processes of parallel.py instead.
+    """
+    return [read_junit_report(filename) for filename in filenames]
+
+
+def read_junit_report(filename: str) -> JUnitReport:
+    """Reads the totals and the time of every test method of a surefire report file.
+
+    Every element is discarded as soon as it has been read, so memory usage does not depend on the size of the
+    report, which mostly consists of captured output and stack traces.
+    """
+    root = None
+    test_cases = {}  # type: Dict[str, List[float]]
+    with open(filename, 'rb') as file:
+        for event, element in ElementTree.iterparse(file, events=('start', 'end')):
+            if root is None:
+                root = element
+                attributes = dict(element.attrib)
+            elif event == 'end' and element.tag == 'testcase':
+                add_test_case(test_cases, attributes.get('name'), element.attrib)
+                root.clear()
+
+    if root is None:
+        raise ElementTree.ParseError('No root element found in {file}'.format(file=filename))
+    return create_junit_report(attributes)._replace(test_cases=test_cases)
+
+
+def add_test_case(test_cases: Dict[str, List[float]], test_name: str, attributes: Dict[str, str]) -> None:
+    """Adds the time of a testcase element to the one of its method.
+
+    Methods of other classes than the test class itself, e.g. of nested classes, are prefixed with their class.
+    Test cases sharing a name, like repetitions, are added up.
+    """
+    method = attributes.get('name', '')
+    class_name = attributes.get('classname')
+    if class_name and class_name != test_name:
+        method = '{cls}.{method}'.format(cls=class_name, method=method)
+
+    time_elapsed = parse_float(attributes.get('time'))
+    if method in test_cases:
+        test_cases[method][0] += time_elapsed
+    else:
+        test_cases[method] = [time_elapsed]
+
+
+def create_junit_report(attributes: Dict[str, str]) -> JUnitReport:
+    """Creates a JUnitReport obj from the attributes of a testsuite element"""
+    return JUnitReport(
+        test_name=attributes.get('name'),
+        test_run=parse_int(attributes.get('tests')),
+        time_elapsed=parse_float(attributes.get('time')),
+        failures=parse_int(attributes.get('failures')),
+        errors=parse_int(attributes.get('errors')),
+        skipped=parse_int(attributes.get('skipped')))
+
+
+def parse_int(value: str) -> int:
+    return int(value) if value else 0
+
+
+def parse_float(value: str) -> float:
+    # some surefire versions format the time with a thousands separator
+    return float(value.replace(',', '')) if value else 0.0
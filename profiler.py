@@ -0,0 +1,124 @@
+import os.path
+import re
+import shlex
+import shutil
+import tempfile
+from typing import Dict, List, Tuple
+
+from git import Repo  # type: ignore
+
+import const
+import logger
+import runner
+import utils
+from model import objects
+from parse import parse_jfr
+from run.java import print_jfr_events, run_jar
+from run.maven import run_mvn_test
+from run.resources import create_java_wrapper
+
+STACK_DEPTH = 64  # frames of a stack trace taken into account, deeper frames only lack total samples
+TOP_METHODS = 30
+
+# every JVM writes its recording when it exits, %p is replaced by its pid so forked JVMs do not share a file
+RECORDING_OPTION = '-XX:StartFlightRecording=settings=profile,filename={dir}/recording-%p.jfr'
+
+
+def profile_commits(path_to_repo: str, path_to_log: str, targets: List[objects.ProfileTarget], branch: str,
+                    pipeline: objects.PipelineConfig = None) -> None:
+    """Profiles flagged commits and their predecessors with Java Flight Recorder and logs how their hot methods differ.
+
+    The flagged test classes are run by surefire and the flagged benchmarks by the pipeline, if one is given, while
+    every JVM records execution samples. Recordings are kept in the profiles dir of the log dir. Like a bisection,
+    this checks out the commits in the repository itself and checks out the branch again afterwards.
+    """
+    repo = Repo(path_to_repo)
+    for target in merge_targets(targets):
+        if len(target.test_classes) == 0 and pipeline is None:
+            continue
+
+        profiles = []  # type: List[objects.MethodProfile]
+        for commit_id in (target.previous_commit_id, target.commit_id):
+            print('Profiling {commit}'.format(commit=commit_id))
+            repo.git.checkout(commit_id)
+            recording_dir = os.path.join(path_to_log, const.PROFILES_DIR, target.commit_id, commit_id)
+            profiles.append(record_profile(path_to_repo, recording_dir, target, pipeline))
+
+        if any(profile.sample_count == 0 for profile in profiles):
+            print('Warning: no execution samples were recorded for {commit} or its predecessor, its hot methods '
+                  'are not compared'.format(commit=target.commit_id))
+            continue
+        logger.log_profile_diff(target, diff_profiles(profiles[0], profiles[1]),
+                                (profiles[0].sample_count, profiles[1].sample_count), dest_dir=path_to_log)
+
+    repo.git.checkout(branch)
+
+
+def merge_targets(targets: List[objects.ProfileTarget]) -> List[objects.ProfileTarget]:
+    """Merges the targets of the same pair of commits, so each pair is profiled once."""
+    merged = {}  # type: Dict[Tuple[str, str], objects.ProfileTarget]
+    for target in targets:
+        key = (target.commit_id, target.previous_commit_id)
+        if key not in merged:
+            merged[key] = target
+        else:
+            merged[key] = merged[key]._replace(test_classes=merged[key].test_classes + target.test_classes,
+                                               benchmarks=merged[key].benchmarks + target.benchmarks)
+    return list(merged.values())
+
+
+def record_profile(path_to_repo: str, recording_dir: str, target: objects.ProfileTarget,
+                   pipeline: objects.PipelineConfig = None) -> objects.MethodProfile:
+    """Runs the flagged tests and benchmarks of the checked out revision with flight recordings and reads them.
+
+    Surefire forks the test JVMs with a java wrapper that passes the recording option, so the arg line configured
+    by the project is kept and cannot drop it. A warning is printed if no JVM wrote a recording, e.g. because the
+    project configures the java executable of surefire itself or runs the tests in the JVM of maven.
+    """
+    shutil.rmtree(recording_dir, ignore_errors=True)
+    utils.create_dir(recording_dir)
+    option = RECORDING_OPTION.format(dir=os.path.abspath(recording_dir))
+    path_to_pom = os.path.join(path_to_repo, const.POM)
+
+    if len(target.test_classes) > 0:
+        path_to_wrapper = create_java_wrapper(recording_dir, '{java} ' + shlex.quote(option))
+        run_mvn_test(path_to_pom, test_classes=target.test_classes, jvm=path_to_wrapper)
+    if len(target.benchmarks) > 0 and pipeline is not None:
+        path_to_jar = runner.build_pipeline(path_to_pom, pipeline)
+        include = '^(' + '|'.join(re.escape(benchmark) for benchmark in target.benchmarks) + ')$'
+        with tempfile.TemporaryDirectory() as result_dir:
+            arguments = runner.build_jmh_arguments(pipeline._replace(include=include),
+                                                   os.path.join(result_dir, const.JMH_RESULT))
+            run_jar(path_to_jar, ['-jvmArgsAppend', option] + arguments)
+
+    profile = objects.MethodProfile(sample_count=0, self_samples={}, total_samples={})
+    filenames = utils.get_filenames_by_type(recording_dir, 'jfr')
+    if len(filenames) == 0:
+        print('Warning: no flight recording was written to {dir}'.format(dir=recording_dir))
+    for filename in filenames:
+        profile = parse_jfr.read_execution_samples(
+            print_jfr_events(filename, parse_jfr.EXECUTION_SAMPLE, STACK_DEPTH), profile)
+    return profile
+
+
+def diff_profiles(before: objects.MethodProfile, after: objects.MethodProfile,
+                  top: int = TOP_METHODS) -> List[objects.MethodDiff]:
+    """Returns the methods whose share of the samples changed most, ranked by the change of their self share.
+
+    Shares are used instead of sample counts, since the two runs are not necessarily of the same length.
+    """
+    def share(samples: Dict[str, int], sample_count: int, method: str) -> float:
+        return 100.0 * samples.get(method, 0) / sample_count if sample_count > 0 else 0.0
+
+    diffs = []  # type: List[objects.MethodDiff]
+    for method in sorted(set(before.total_samples) | set(after.total_samples)):
+        self_before = share(before.self_samples, before.sample_count, method)
+        self_after = share(after.self_samples, after.sample_count, method)
+        total_before = share(before.total_samples, before.sample_count, method)
+        total_after = share(after.total_samples, after.sample_count, method)
+        diffs.append(objects.MethodDiff(method=method, self_before=self_before, self_after=self_after,
+                                        self_delta=self_after - self_before, total_before=total_before,
+                                        total_after=total_after, total_delta=total_after - total_before))
+
+    diffs.sort(key=lambda diff: (abs(diff.self_delta), abs(diff.total_delta)), reverse=True)
+    return diffs[:top]
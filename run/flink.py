@@ -1,24 +1,161 @@
+import json
+import re
+import shlex
 import subprocess
+import threading
+import time
+import urllib.request
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Dict, IO, List
 
+from model import objects
 
-def submit_to_flink(path_to_flink: str, path_to_jar, classname: str = None, args: str = None) -> None:
-    """Submits job to flink cluster. Expects cluster is already running.
+POLL_INTERVAL = 1.0  # seconds between two readings of the backpressure of running jobs
+REQUEST_TIMEOUT = 10.0
+JOB_ID_PATTERN = re.compile(r'JobID ([0-9a-fA-F]{32})')
+
+
+def submit_to_flink(path_to_flink: str, path_to_jar, classname: str = None, args: str = None,
+                    parallelism: int = None, rest_url: str = None) -> List[objects.FlinkJobReport]:
+    """Submits job to flink cluster and waits until the program finished. Expects cluster is already running.
+
+    Every job the program executes is looked up in the REST API of the JobManager, if its url is given, and its
+    metrics are returned. While the program runs, the backpressure of the running vertices is sampled.
 
     :param path_to_flink Path to flink installation
     :param path_to_jar Path to jar containing submittable executable
     :param classname Name of submittable class
     :param args Arguments to be passed to the submittable class
+    :param parallelism Default parallelism of the submitted jobs, the one configured for the cluster if None
+    :param rest_url Url of the REST API of the JobManager
     """
     print('Submitting jar {jar} to {flink}'.format(jar=path_to_jar, flink=path_to_flink))
     cmd = '{flink}/bin/flink run '.format(flink=path_to_flink)
+    if parallelism is not None:
+        cmd += '-p {parallelism} '.format(parallelism=parallelism)
     if classname is not None:
         cmd += '-c {classname} '.format(classname=classname)
-    cmd += '{jar} '.format(jar=path_to_jar)
+    cmd += '{jar} '.format(jar=shlex.quote(path_to_jar))
     if args is not None:
         cmd += args
 
-    try:
-        subprocess.run(cmd, shell=True, check=True)
-    except subprocess.CalledProcessError:
+    # the client prints the id of every job it submits, which is picked up while the program runs
+    process = subprocess.Popen(cmd, shell=True, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                               universal_newlines=True)
+    job_ids = []  # type: List[str]
+    reader = threading.Thread(target=read_job_ids, args=(process.stdout, job_ids), daemon=True)
+    reader.start()
+
+    backpressure = {}  # type: Dict[str, Dict[str, List[float]]]
+    while process.poll() is None:
+        if rest_url is not None:
+            for job_id in list(job_ids):
+                sample_backpressure(rest_url, job_id, backpressure.setdefault(job_id, {}))
+        time.sleep(POLL_INTERVAL)
+    reader.join()
+
+    if process.returncode != 0:
         print('Could not submit flink job')
         exit(1)
+    if rest_url is None:
+        return []
+    return [fetch_job_report(rest_url, job_id, parallelism, backpressure.get(job_id, {})) for job_id in job_ids]
+
+
+def run_sweep(path_to_jar: str, flink: objects.FlinkConfig) -> List[objects.FlinkJobReport]:
+    """Submits the jar once per parallelism level of the config and returns the reports of all jobs it ran.
+
+    Submissions run concurrently as long as the slots they need, one per unit of parallelism, are free. A level that
+    needs more slots than there are is submitted once no other job runs. Jobs running at the same time share the task
+    managers, so the slots should be limited to those of a single level if the runtimes are compared.
+    """
+    total_slots = flink.slots if flink.slots is not None else fetch_overview(flink.rest_url)['slots-available']
+    pending = sorted(flink.parallelisms)
+    running = {}  # type: Dict[Future, int]
+    reports = []  # type: List[objects.FlinkJobReport]
+    with ThreadPoolExecutor(max_workers=max(len(pending), 1)) as executor:
+        while len(pending) > 0 or len(running) > 0:
+            free_slots = total_slots - sum(running.values())
+            while len(pending) > 0 and (pending[0] <= free_slots or len(running) == 0):
+                parallelism = pending.pop(0)
+                running[executor.submit(submit_to_flink, flink.path, path_to_jar, flink.classname, flink.args,
+                                        parallelism, flink.rest_url)] = parallelism
+                free_slots -= parallelism
+
+            done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+            for future in done:
+                del running[future]
+                # raises the error of a failed submission
+                reports.extend(future.result())
+
+    return sorted(reports, key=lambda report: report.parallelism)
+
+
+def read_job_ids(output: IO[str], job_ids: List[str]) -> None:
+    """Passes the output of the flink client through and collects the ids of the jobs it submitted."""
+    for line in output:
+        print(line, end='')
+        match = JOB_ID_PATTERN.search(line)
+        if match is not None and match.group(1) not in job_ids:
+            job_ids.append(match.group(1))
+
+
+def sample_backpressure(rest_url: str, job_id: str, samples: Dict[str, List[float]]) -> None:
+    """Appends the ratio of the most backpressured subtask of every running vertex of a job to its samples.
+
+    The JobManager samples backpressure on demand, so the first requests may not return a ratio yet.
+    """
+    try:
+        job = get_json(rest_url, '/jobs/{job}'.format(job=job_id))
+        for vertex in job['vertices']:
+            if vertex['status'] != 'RUNNING':
+                continue
+            stats = get_json(rest_url, '/jobs/{job}/vertices/{vertex}/backpressure'.format(
+                job=job_id, vertex=vertex['id']))
+            ratios = [subtask['ratio'] for subtask in stats.get('subtasks', [])]
+            if stats.get('status') == 'ok' and len(ratios) > 0:
+                samples.setdefault(vertex['id'], []).append(max(ratios))
+    except (OSError, ValueError, KeyError):
+        # the job may not be known yet or already be gone, it is sampled again at the next poll
+        pass
+
+
+def fetch_job_report(rest_url: str, job_id: str, parallelism: int,
+                     backpressure: Dict[str, List[float]]) -> objects.FlinkJobReport:
+    """Reads the runtime of a finished job and the throughput of its vertices from the REST API."""
+    try:
+        job = get_json(rest_url, '/jobs/{job}'.format(job=job_id))
+    except (OSError, ValueError):
+        print('Could not fetch the metrics of flink job {job} from {url}'.format(job=job_id, url=rest_url))
+        exit(1)
+
+    vertices = []  # type: List[objects.FlinkVertexMetrics]
+    for vertex in job['vertices']:
+        seconds = max(vertex.get('duration', 0), 1) / 1000
+        metrics = vertex.get('metrics', {})
+        samples = backpressure.get(vertex['id'], [])
+        vertices.append(objects.FlinkVertexMetrics(
+            name=vertex['name'], parallelism=vertex['parallelism'],
+            records_in=metrics.get('read-records', 0) / seconds, records_out=metrics.get('write-records', 0) / seconds,
+            backpressure=sum(samples) / len(samples) if len(samples) > 0 else None,
+            peak_backpressure=max(samples) if len(samples) > 0 else None))
+
+    return objects.FlinkJobReport(job_id=job_id, name=job['name'],
+                                  parallelism=parallelism if parallelism is not None else max(
+                                      (vertex.parallelism for vertex in vertices), default=0),
+                                  state=job['state'], runtime=job['duration'], vertices=vertices)
+
+
+def fetch_overview(rest_url: str) -> Dict[str, Any]:
+    """Returns the overview of the cluster, e.g. its total and available task slots."""
+    try:
+        return get_json(rest_url, '/overview')
+    except (OSError, ValueError):
+        print('Could not reach the JobManager at {url}'.format(url=rest_url))
+        exit(1)
+
+
+def get_json(rest_url: str, path: str) -> Dict[str, Any]:
+    with urllib.request.urlopen(rest_url.rstrip('/') + path, timeout=REQUEST_TIMEOUT) as response:
+        return json.loads(response.read().decode('utf-8'))
+
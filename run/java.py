@@ -1,13 +1,57 @@
+import shlex
 import subprocess
+from typing import Iterator, List, Optional
 
+from model import objects
+from run.resources import run_sampled
 
-def run_jar(path_to_jar: str) -> None:
-    """Runs an executable jar"""
+
+def run_jar(path_to_jar: str, arguments: List[str] = None,
+            sample_resources: bool = False, count_events: bool = False) -> Optional[objects.ResourceUsage]:
+    """Runs an executable jar, passing the given arguments to its main method.
+
+    If resources are sampled, their usage by the java process tree is returned (see run/resources.py). The jar is
+    expected to be a JMH runner, so hardware events, if counted, are only counted for the JVMs it forks.
+    """
     print('Running executable jar {jar}'.format(jar=path_to_jar))
     cmd = 'java -jar {jar}'.format(jar=path_to_jar)
+    if arguments is not None:
+        cmd += ' ' + ' '.join(shlex.quote(argument) for argument in arguments)
+
+    if sample_resources:
+        # the JMH runner forks the benchmark JVMs with the given java executable
+        returncode, usage = run_sampled(cmd, count_events=count_events, jvm_option=' -jvm {jvm}')
+        if returncode != 0:
+            print('Failed running executable jar {jar}'.format(jar=path_to_jar))
+            exit(1)
+        return usage
 
     try:
         subprocess.run(cmd, shell=True, check=True)
     except subprocess.CalledProcessError:
         print('Failed running executable jar {jar}'.format(jar=path_to_jar))
         exit(1)
+    return None
+
+
+def print_jfr_events(path_to_recording: str, event: str, stack_depth: int) -> Iterator[str]:
+    """Yields the lines the jfr tool prints for the events of the given type in a flight recording, as it prints them"""
+    cmd = 'jfr print --events {event} --stack-depth {depth} {recording}'.format(
+        event=event, depth=stack_depth, recording=shlex.quote(path_to_recording))
+    process = subprocess.Popen(cmd, shell=True, stdout=subprocess.PIPE, universal_newlines=True)
+    yield from process.stdout
+    if process.wait() != 0:
+        print('Failed printing the events of flight recording {recording}'.format(recording=path_to_recording))
+        exit(1)
+
+
+def fetch_java_version() -> str:
+    """Returns the version banner of the default java runtime"""
+    try:
+        completed_process = subprocess.run(
+            'java -version', stdout=subprocess.PIPE, stderr=subprocess.STDOUT, encoding='utf-8', shell=True,
+            check=True)
+        return completed_process.stdout
+    except subprocess.CalledProcessError:
+        print('Failed fetching the version of the java runtime')
+        exit(1)
@@ -1,30 +1,73 @@
+import shlex
 import subprocess
-from typing import List
+from typing import List, Optional
 
+from model import objects
+from run.resources import run_sampled
 
-def run_mvn_test(path_to_pom: str,
-                 test_classes: List[str] = None) -> None:
-    """Triggers test execution with surefire for the maven project specified in the pom."""
+# with incremental compilation disabled, the compiler plugin only recompiles sources newer than their classes
+STALE_SOURCES_ONLY = ' -Dmaven.compiler.useIncrementalCompilation=false'
+
+
+def run_mvn_test(path_to_pom: str, test_classes: List[str] = None, modules: List[str] = None,
+                 reuse_outputs: bool = False, sample_resources: bool = False,
+                 count_events: bool = False, jvm: str = None) -> Optional[objects.ResourceUsage]:
+    """Triggers test execution with surefire for the maven project specified in the pom.
+
+    If module paths are given, only these modules are cleaned and tested. If outputs are reused, the project is not
+    cleaned and only stale sources are compiled. If resources are sampled, the sources are compiled first and the
+    usage of a second test run, which finds nothing left to compile, is returned (see run/resources.py), so the
+    compiler barely counts towards it. Hardware events, if counted, are only counted for the forked test JVMs.
+    Given a java executable, surefire forks the test JVMs with it instead of the java of the JAVA_HOME.
+    """
     print('Running test suite of {pom}'.format(pom=path_to_pom))
-    if test_classes is None:
-        cmd = 'mvn clean test -f {pom} -q'.format(pom=path_to_pom)
-    else:
+    goals = 'test' if reuse_outputs else 'clean test'
+    options = ' -f {pom} -q'.format(pom=path_to_pom)
+    if test_classes is not None:
         comma_separated_classes = ','.join(test_classes)
-        cmd = 'mvn clean test -DfailIfNoTests=false -Dtest={classes} -am -f {pom} -q'.format(
-            pom=path_to_pom, classes=comma_separated_classes)
+        options = ' -DfailIfNoTests=false -Dtest={classes} -am'.format(classes=comma_separated_classes) + options
+    if modules is not None:
+        options += ' -pl {modules}'.format(modules=','.join(modules))
+    if reuse_outputs:
+        options += STALE_SOURCES_ONLY
+    if jvm is not None:
+        options += ' -Djvm={jvm}'.format(jvm=shlex.quote(jvm))
+
+    if sample_resources:
+        compile_goals = 'test-compile' if reuse_outputs else 'clean test-compile'
+        try:
+            subprocess.run('mvn {goals}'.format(goals=compile_goals) + options, shell=True, check=True)
+        except subprocess.CalledProcessError:
+            print('Failed compiling project described by {pom}'.format(pom=path_to_pom))
+            exit(1)
+        # the whole lifecycle runs, so sibling modules resolve to their target dirs rather than the local repository,
+        # and the compiler only checks that the classes are newer than their sources. surefire forks the test JVMs
+        # with the given java executable
+        test_options = options if reuse_outputs else options + STALE_SOURCES_ONLY
+        returncode, usage = run_sampled('mvn test' + test_options, count_events=count_events,
+                                        jvm_option=' -Djvm={jvm}')
+        if returncode != 0:
+            print('Failed running test suite of project described by {pom}'.format(pom=path_to_pom))
+            exit(1)
+        return usage
 
     try:
-        subprocess.run(cmd, shell=True, check=True)
+        subprocess.run('mvn {goals}'.format(goals=goals) + options, shell=True, check=True)
     except subprocess.CalledProcessError:
         print('Failed running test suite of project described by {pom}'.format(pom=path_to_pom))
         exit(1)
+    return None
 
 
-def run_mvn_install(path_to_pom: str) -> None:
-    """Installs the specified project to the local maven repository"""
+def run_mvn_install(path_to_pom: str, modules: List[str] = None, reuse_outputs: bool = False) -> None:
+    """Installs the specified project, or only the given module paths, to the local maven repository"""
     print('Installing {pom} to local maven repository.'.format(
         pom=path_to_pom))
     cmd = 'mvn install -f {pom} -DskipTests -q'.format(pom=path_to_pom)
+    if modules is not None:
+        cmd += ' -pl {modules}'.format(modules=','.join(modules))
+    if reuse_outputs:
+        cmd += STALE_SOURCES_ONLY
 
     # set findbugs version to 3.0.5 because maven 3.6.1 and findbugs<3.0.5 dont get along
     cmd += ' -Dplugin.maven-findbugs.version=3.0.5'
@@ -36,6 +79,13 @@ def run_mvn_install(path_to_pom: str) -> None:
         exit(1)
 
 
+def get_mvn_package_command(path_to_pom: str, reuse_outputs: bool = False) -> str:
+    """Returns the command that compiles and packages every module without running tests or installing anything"""
+    if reuse_outputs:
+        return 'mvn package -f {pom} -DskipTests -q'.format(pom=path_to_pom) + STALE_SOURCES_ONLY
+    return 'mvn clean package -f {pom} -DskipTests -q'.format(pom=path_to_pom)
+
+
 def mvn_package(path_to_pom: str) -> None:
     print('Packaging {pom}.'.format(pom=path_to_pom))
     cmd = 'mvn -f {pom} package -q'.format(pom=path_to_pom)
@@ -60,16 +110,12 @@ def mvn_set_dep_version(path_to_pom: str, group_id: str, version_nr: str) -> Non
         exit(1)
 
 
-def fetch_maven_project_version(path_to_pom: str) -> str:
-    print('Fetching version number of {pom}'.format(pom=path_to_pom))
-    cmd = ('mvn -f {pom} help:evaluate '
-           '-Dexpression=project.version -q -DforceStdout').format(pom=path_to_pom)
+def fetch_maven_version() -> str:
+    """Returns the version banner of the maven installation, which includes the java runtime used by it"""
     try:
         completed_process = subprocess.run(
-            cmd, stdout=subprocess.PIPE, encoding='utf-8', shell=True, check=True)
-
-        print('Fetched version nr.: {version}'.format(version=completed_process.stdout))
+            'mvn -v -q', stdout=subprocess.PIPE, encoding='utf-8', shell=True, check=True)
         return completed_process.stdout
     except subprocess.CalledProcessError:
-        print('Failed version nr of project described by {pom}'.format(pom=path_to_pom))
-        exit(1)
\ No newline at end of file
+        print('Failed fetching the version of maven')
+        exit(1)
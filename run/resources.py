@@ -0,0 +1,188 @@
+import glob
+import os
+import shlex
+import shutil
+import subprocess
+import tempfile
+import threading
+from typing import Dict, List, Set, Tuple
+
+from model import objects
+from parse import parse_perf
+
+SAMPLE_INTERVAL = 0.5  # seconds between two readings of the process tree
+
+# hardware events counted by perf stat, by the name of the field of ResourceUsage holding their count
+PERF_EVENTS = {'instructions': 'instructions', 'cycles': 'cycles', 'cache_misses': 'cache-misses',
+               'branch_misses': 'branch-misses'}
+
+
+def run_sampled(cmd: str, count_events: bool = False, jvm_option: str = None) -> Tuple[int, objects.ResourceUsage]:
+    """Runs a shell command and returns its exit code and the resources used by it and every process it started.
+
+    Cpu times and context switches are taken from the rusage of the command, which includes all descendants that were
+    waited for. Resident set size and storage I/O are sampled from /proc while the command runs, summed over the
+    process tree: the peak resident set size is the largest sum observed, I/O the largest total observed.
+    If events are counted, the PERF_EVENTS are counted by perf stat. Given a jvm option, a format string with a
+    {jvm} field like ' -Djvm={jvm}', it is appended to the command to fork the JVMs doing the work with a java
+    wrapper that runs them by perf stat, so only these JVMs are counted. Otherwise the whole command is.
+    """
+    if not count_events:
+        return run_process_tree(cmd)
+
+    with tempfile.TemporaryDirectory() as perf_dir:
+        if jvm_option is None:
+            path_to_counts = os.path.join(perf_dir, 'perf-stat.csv')
+            returncode, usage = run_process_tree('perf stat -x , -o {output} -e {events} -- sh -c {cmd}'.format(
+                output=shlex.quote(path_to_counts), events=','.join(PERF_EVENTS.values()), cmd=shlex.quote(cmd)))
+            counters = parse_perf.read_counters(path_to_counts) if os.path.isfile(path_to_counts) else {}
+        else:
+            # the pid of the shell is kept by perf, which replaces it, so it names the file of every JVM
+            path_to_wrapper = create_java_wrapper(perf_dir, 'perf stat -x , -o {output} -e {events} -- {{java}}'.format(
+                output=shlex.quote(perf_dir) + '/perf-$$.csv', events=','.join(PERF_EVENTS.values())))
+            returncode, usage = run_process_tree(cmd + jvm_option.format(jvm=shlex.quote(path_to_wrapper)))
+            counters = read_wrapped_counters(perf_dir)
+
+    return returncode, usage._replace(**{field: counters.get(event) for field, event in PERF_EVENTS.items()})
+
+
+def create_java_wrapper(directory: str, command: str) -> str:
+    """Writes an executable named java to the bin dir of directory, which runs a shell command with its arguments.
+
+    The {java} field of the command is replaced by the java executable of the JAVA_HOME or the path, so tools that
+    fork JVMs with a given java executable run them by the command.
+    """
+    java_home = os.environ.get('JAVA_HOME')
+    java = os.path.join(java_home, 'bin', 'java') if java_home else shutil.which('java')
+    if java is None:
+        print('Could not find the java executable to wrap')
+        exit(1)
+
+    bin_dir = os.path.join(directory, 'bin')
+    os.makedirs(bin_dir, exist_ok=True)
+    path_to_wrapper = os.path.join(bin_dir, 'java')
+    with open(path_to_wrapper, 'w') as file:
+        file.write('#!/bin/sh\nexec {command} "$@"\n'.format(command=command.format(java=shlex.quote(java))))
+    os.chmod(path_to_wrapper, 0o755)
+    return path_to_wrapper
+
+
+def read_wrapped_counters(perf_dir: str) -> Dict[str, float]:
+    """Adds up the counts of all JVMs started by the java wrapper in perf_dir.
+
+    Events missing from the counts of any JVM are left out. If no JVM was started, e.g. because the tests run in the
+    JVM of maven, nothing was counted.
+    """
+    counts = [parse_perf.read_counters(filename) for filename in glob.glob(os.path.join(perf_dir, 'perf-*.csv'))]
+    if len(counts) == 0:
+        print('No forked JVM was started, so no hardware events were counted')
+        return {}
+    return {event: sum(counters[event] for counters in counts)
+            for event in PERF_EVENTS.values() if all(event in counters for counters in counts)}
+
+
+def run_process_tree(cmd: str) -> Tuple[int, objects.ResourceUsage]:
+    process = subprocess.Popen(cmd, shell=True)
+    peaks = {'rss': 0, 'read_bytes': 0, 'write_bytes': 0}
+    done = threading.Event()
+    sampler = threading.Thread(target=sample_process_tree, args=(process.pid, done, peaks), daemon=True)
+    sampler.start()
+
+    _, status, rusage = os.wait4(process.pid, 0)
+    done.set()
+    sampler.join()
+    process.returncode = os.WEXITSTATUS(status) if os.WIFEXITED(status) else -os.WTERMSIG(status)
+
+    usage = objects.ResourceUsage(
+        user_time=rusage.ru_utime, system_time=rusage.ru_stime,
+        # ru_maxrss is the peak of the largest single process, in kilobytes
+        peak_rss=max(peaks['rss'], rusage.ru_maxrss * 1024),
+        voluntary_switches=rusage.ru_nvcsw, involuntary_switches=rusage.ru_nivcsw,
+        read_bytes=peaks['read_bytes'], write_bytes=peaks['write_bytes'])
+    return process.returncode, usage
+
+
+def sample_process_tree(root_pid: int, done: threading.Event, peaks: Dict[str, int]) -> None:
+    """Updates the peaks with the sums over the process tree of root_pid until done is set."""
+    while not done.wait(SAMPLE_INTERVAL):
+        rss, read_bytes, write_bytes = 0, 0, 0
+        for pid in find_process_tree(root_pid):
+            rss += read_rss(pid)
+            # the I/O of descendants that exited is accounted to the process that waited for them
+            process_read, process_written = read_io(pid)
+            read_bytes += process_read
+            write_bytes += process_written
+
+        peaks['rss'] = max(peaks['rss'], rss)
+        peaks['read_bytes'] = max(peaks['read_bytes'], read_bytes)
+        peaks['write_bytes'] = max(peaks['write_bytes'], write_bytes)
+
+
+def find_process_tree(root_pid: int) -> Set[int]:
+    """Returns the pid of the given process and of all of its living descendants, from /proc/<pid>/stat."""
+    children = {}  # type: Dict[int, List[int]]
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open('/proc/{pid}/stat'.format(pid=entry)) as file:
+                stat = file.read()
+        except OSError:
+            continue
+        # the command name in parentheses may contain spaces, the parent pid is the second field after it
+        parent_pid = int(stat[stat.rfind(')') + 2:].split()[1])
+        children.setdefault(parent_pid, []).append(int(entry))
+
+    tree = set()  # type: Set[int]
+    pending = [root_pid]
+    while len(pending) > 0:
+        pid = pending.pop()
+        if pid not in tree:
+            tree.add(pid)
+            pending.extend(children.get(pid, []))
+    return tree
+
+
+def read_rss(pid: int) -> int:
+    """Returns the resident set size of a process in bytes, from /proc/<pid>/status, or 0 if it exited."""
+    try:
+        with open('/proc/{pid}/status'.format(pid=pid)) as file:
+            for line in file:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return 0
+
+
+def read_io(pid: int) -> Tuple[int, int]:
+    """Returns the bytes a process read from and wrote to storage, from /proc/<pid>/io, or zeros if unavailable."""
+    counters = {}  # type: Dict[str, int]
+    try:
+        with open('/proc/{pid}/io'.format(pid=pid)) as file:
+            for line in file:
+                name, _, value = line.partition(':')
+                counters[name] = int(value)
+    except OSError:
+        pass
+    return counters.get('read_bytes', 0), counters.get('write_bytes', 0)
+
+
+def aggregate_usage(usage_list: List[objects.ResourceUsage], stage: str) -> objects.ResourceUsage:
+    """Combines the usage of repeated runs of a stage into their mean, the peak resident set size into the maximum.
+
+    Event counts are only kept if they were counted in every run.
+    """
+    count = len(usage_list)
+    counters = {field: sum(getattr(usage, field) for usage in usage_list) / count
+                if all(getattr(usage, field) is not None for usage in usage_list) else None
+                for field in PERF_EVENTS}
+    return objects.ResourceUsage(
+        user_time=sum(usage.user_time for usage in usage_list) / count,
+        system_time=sum(usage.system_time for usage in usage_list) / count,
+        peak_rss=max(usage.peak_rss for usage in usage_list),
+        voluntary_switches=sum(usage.voluntary_switches for usage in usage_list) / count,
+        involuntary_switches=sum(usage.involuntary_switches for usage in usage_list) / count,
+        read_bytes=sum(usage.read_bytes for usage in usage_list) / count,
+        write_bytes=sum(usage.write_bytes for usage in usage_list) / count,
+        stage=stage, **counters)
@@ -1,25 +1,147 @@
 import json
 import os.path
-import subprocess
-from typing import Dict, List
-
-from git import Repo  # type: ignore
-from junitparser import JUnitXml  # type: ignore
-
+import shutil
+import statistics
+import tempfile
+import time
+import xml.etree.ElementTree as ElementTree
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from git import Commit, Repo  # type: ignore
+
+import build_cache
+import cache
+import codec
 import const
+import impact
+import noise
+import orchestrator
+import parallel
 import run.maven
+import significance
+import store
 import utils
 from model import objects
+from parse import parse_pom, parse_surefire
+from run.flink import run_sweep
 from run.java import run_jar
 from run.maven import run_mvn_test, run_mvn_install
+from run.resources import aggregate_usage
 
 
 def run(path_to_repo: str, path_to_log: str, commit_ids: List[str], is_interval: bool,
-        branch: str, invocation_count: int, test_classes: List[str] = None):
-    """Runs a maven repositories test suite over a range of commits and logs commit specific execution times."""
+        branch: str, invocation_count: int, test_classes: List[str] = None, workers: int = 1,
+        worker_cpus: List[Set[int]] = None, worker_memory: str = None, cache_dir: str = None,
+        change_impact: bool = False, pipeline: objects.PipelineConfig = None, build_cache_dir: str = None,
+        build_cache_size: int = None, build_cpus: Set[int] = None, measure_cpus: Set[int] = None,
+        warmup_count: int = 0, quiescence: objects.QuiescenceLimits = None,
+        adaptive: objects.AdaptiveSampling = None, sample_resources: bool = False, count_events: bool = False,
+        flink: objects.FlinkConfig = None):
+    """Runs a maven repositories test suite over a range of commits and logs commit specific execution times.
+
+    With more than one worker, commits are measured concurrently in a pool of git worktrees (see parallel.py).
+    Given build and measure cpus, the next commit is built on the build cpus while the current one is measured on the
+    measure cpus (see orchestrator.py).
+    If a cache dir is given, commits that were measured before, or whose modules are identical to those of a measured
+    commit, are served from the cache instead of being measured again.
+    With change impact analysis, only the tests of modules affected by the changes to the next older selected commit
+    are run, the results of all other tests are carried over from that commit.
+    If a pipeline config is given, the JMH benchmarks are run for every commit and their reports are written to the
+    log dir. If a build cache dir is given, modules are only compiled if their sources or dependencies changed.
+    With quiescence limits, every measurement waits for the host to become quiet (see noise.py).
+    With adaptive sampling, test classes are invoked until their runtime is known with the targeted precision.
+    If resources are sampled, the cpu, memory and I/O usage of every stage is stored in the results database, and
+    if events are counted as well, the hardware event counts of perf stat.
+    Given a Flink config, the pipeline jar is also submitted to a Flink cluster at every parallelism level of the
+    config, and the metrics of the jobs are written to the log dir.
+    """
     repo = Repo(path_to_repo)
-    path_to_parent_pom = os.path.join(path_to_repo, const.POM)
+    selected_commits = select_commits(repo, commit_ids, is_interval, branch)
+    settings = objects.MeasurementSettings(invocation_count=invocation_count, test_classes=test_classes,
+                                           change_impact=change_impact, pipeline=pipeline,
+                                           build_cache_dir=build_cache_dir, warmup_count=warmup_count,
+                                           quiescence=quiescence, adaptive=adaptive,
+                                           sample_resources=sample_resources, count_events=count_events,
+                                           flink=flink)
+    if build_cache_size is not None:
+        settings = settings._replace(build_cache_size=build_cache_size)
+
+    utils.create_dir(path_to_log)
+
+    measurements = {}  # type: Dict[str, objects.CommitMeasurement]
+    cache_keys = {}  # type: Dict[str, List[str]]
+    # maps a commit to the one measured in its place because their modules are identical
+    substitutes = {}  # type: Dict[str, str]
+    pending_commits = []  # type: List[str]
+
+    if cache_dir is None:
+        pending_commits = [commit.hexsha for commit in selected_commits]
+    else:
+        environment = cache.get_environment_fingerprint(pipeline.path if pipeline is not None else None)
+        measured_sources = {}  # type: Dict[str, str]
+        # the oldest commit of a group with identical modules is measured, so it is complete before the others
+        for commit in reversed(selected_commits):
+            keys = cache.build_cache_keys(repo, commit, settings, environment, measure_cpus, worker_cpus, worker_memory)
+            cache_keys[commit.hexsha] = keys
+            measurement = cache.load_measurement(cache_dir, keys, commit.hexsha)
+            source_key = keys[-1]
+
+            if measurement is not None:
+                measurements[commit.hexsha] = measurement
+            elif source_key in measured_sources:
+                substitutes[commit.hexsha] = measured_sources[source_key]
+            else:
+                measured_sources[source_key] = commit.hexsha
+                pending_commits.insert(0, commit.hexsha)
+
+    previous_commits = {}  # type: Dict[str, str]
+    if change_impact:
+        for commit, previous_commit in zip(selected_commits, selected_commits[1:]):
+            previous_commits[commit.hexsha] = previous_commit.hexsha
+
+    for measurement in measure_commits(repo, path_to_repo, pending_commits, branch, settings, previous_commits,
+                                       workers, worker_cpus, worker_memory, build_cpus, measure_cpus):
+        measurements[measurement.commit_id] = measurement
+        # partial measurements are only stored once they have been completed below
+        if cache_dir is not None and measurement.tested_modules is None:
+            cache.store_measurement(cache_dir, cache_keys[measurement.commit_id], measurement)
+
+    # complete partial measurements from the oldest commit on, so carried over results are complete themselves
+    for commit in reversed(selected_commits):
+        commit_id = commit.hexsha
+        if commit_id in substitutes:
+            measurements[commit_id] = cache.assign_commit(measurements[substitutes[commit_id]], commit_id)
+            cache.store_measurement(cache_dir, cache_keys[commit_id], measurements[commit_id])
+        elif measurements[commit_id].tested_modules is not None:
+            measurement = impact.carry_forward(repo, measurements[commit_id], measurements[previous_commits[commit_id]])
+            measurements[commit_id] = measurement
+            if cache_dir is not None:
+                cache.store_measurement(cache_dir, cache_keys[commit_id], measurement)
+
+    commit_report_list = []  # type: List[objects.JUnitCommitReport]
+    jmh_report_list = []  # type: List[objects.JmhCommitReport]
+    flink_report_list = []  # type: List[objects.FlinkCommitReport]
+    for commit in selected_commits:
+        commit_report_list.extend(measurements[commit.hexsha].junit_reports)
+        jmh_report_list.extend(measurements[commit.hexsha].jmh_reports)
+        flink_report_list.extend(measurements[commit.hexsha].flink_reports or [])
+
+    connection = store.open_store(path_to_log)
+    store.add_commits(connection, [(commit.hexsha, commit.committed_date) for commit in selected_commits])
+    store.add_junit_reports(connection, commit_report_list)
+    for commit in selected_commits:
+        if measurements[commit.hexsha].resource_usage is not None:
+            store.add_resource_usage(connection, commit.hexsha, measurements[commit.hexsha].resource_usage)
+    connection.close()
 
+    if pipeline is not None:
+        codec.write_records(os.path.join(path_to_log, const.JMH_REPORTS), codec.JMH, jmh_report_list)
+    if flink is not None:
+        codec.write_records(os.path.join(path_to_log, const.FLINK_REPORTS), codec.FLINK, flink_report_list)
+
+
+def select_commits(repo: Repo, commit_ids: List[str], is_interval: bool, branch: str) -> List[Commit]:
+    """Returns the commits to be measured, ordered from the most recent to the oldest one."""
     # list of all commits in the specified branch
     commit_list = list(repo.iter_commits(branch))
 
@@ -32,96 +154,325 @@ def run(path_to_repo: str, path_to_log: str, commit_ids: List[str], is_interval:
             exit(1)
 
         # get last n commits, counting from HEAD
-        selected_commits = commit_list[index_start: index_end + 1]
-    else:
-        # retrieve commit objects by id from the commit list
-        selected_commits = list(
-            map(lambda x: commit_list[commit_list.index(repo.commit(x))], commit_ids))
+        return commit_list[index_start: index_end + 1]
 
-    utils.create_dir(path_to_log)
+    # retrieve commit objects by id from the commit list
+    return list(map(lambda x: commit_list[commit_list.index(repo.commit(x))], commit_ids))
 
-    commit_report_list = []  # type: List[objects.JUnitCommitReport]
-    jmh_report_list = []  # type: List[objects.JmhCommitReport]
 
-    for commit in selected_commits:
-        commit_id = commit.hexsha
-        repo.git.checkout(commit_id)
+def measure_commits(repo: Repo, path_to_repo: str, commit_ids: List[str], branch: str,
+                    settings: objects.MeasurementSettings, previous_commits: Dict[str, str], workers: int,
+                    worker_cpus: List[Set[int]], worker_memory: str, build_cpus: Set[int] = None,
+                    measure_cpus: Set[int] = None) -> Iterator[objects.CommitMeasurement]:
+    """Measures the given commits and yields their measurements in the order of the given commit ids.
 
-        generate_test_suite_metrics(commit_report_list, path_to_parent_pom, commit_id, invocation_count, test_classes)
-        generate_pipeline_metrics(jmh_report_list, path_to_parent_pom, '~/Code/gradoop-jmh-pipeline', commit_id)
+    Without build cpus, measurements are pinned to the measure cpus if given.
+    """
+    if len(commit_ids) == 0:
+        return
 
-    for grouped_list in group_commit_reports_by_test_name(commit_report_list):
-        write_grouped_commit_reports(grouped_list, path_to_log)
+    if build_cpus is not None and measure_cpus is not None:
+        yield from orchestrator.run_pipelined(path_to_repo, commit_ids, settings, previous_commits,
+                                              build_cpus=build_cpus, measure_cpus=measure_cpus)
+        return
 
-    with open('jmh_reports.json', 'w') as file:
-        file.write(json.dumps(utils.unpack(jmh_report_list), indent=2))
+    if workers > 1:
+        yield from parallel.run_parallel(path_to_repo, commit_ids, settings, previous_commits, workers=workers,
+                                         worker_cpus=worker_cpus, worker_memory=worker_memory)
+        return
 
-    # revert repo to original state
-    repo.git.checkout(branch)
+    # measured processes inherit the cpu affinity of this process
+    original_cpus = os.sched_getaffinity(0)
+    if measure_cpus is not None:
+        os.sched_setaffinity(0, measure_cpus)
+
+    try:
+        for commit_id in commit_ids:
+            repo.git.checkout(commit_id)
+            yield measure_commit(path_to_repo, commit_id, settings, previous_commits.get(commit_id))
+
+        # revert repo to original state
+        repo.git.checkout(branch)
+    finally:
+        os.sched_setaffinity(0, original_cpus)
+
+
+def measure_commit(path_to_repo: str, commit_id: str, settings: objects.MeasurementSettings,
+                   previous_commit_id: str = None, pipeline_lock=None,
+                   prebuilt: bool = False) -> objects.CommitMeasurement:
+    """Measures the revision currently checked out in path_to_repo.
+
+    If a previous commit is given, only the tests of the modules affected by the changes since that commit are run.
+    If a lock is given, the pipeline stage is run while holding it, because it installs to the shared local maven
+    repository and edits the pipeline project in place.
+    With a build cache, the outputs of modules that were built before with identical inputs are restored instead of
+    compiling them again, and the outputs of all other modules are added to the cache afterwards.
+    A prebuilt revision (see orchestrator.py) is neither cleaned nor looked up in the build cache.
+    """
+    path_to_parent_pom = os.path.join(path_to_repo, const.POM)
+    commit_report_list = []  # type: List[objects.JUnitCommitReport]
+    jmh_report_list = []  # type: List[objects.JmhCommitReport]
+    flink_report_list = [] if settings.flink is not None else None  # type: Optional[List[objects.FlinkCommitReport]]
+    resource_usage_list = [] if settings.sample_resources else None  # type: Optional[List[objects.ResourceUsage]]
+
+    modules = None  # type: Optional[List[objects.MavenModule]]
+    module_keys = {}  # type: Dict[str, str]
+    reuse_outputs = settings.build_cache_dir is not None or prebuilt
+    use_build_cache = settings.build_cache_dir is not None and not prebuilt
+    if use_build_cache:
+        modules = impact.load_reactor(path_to_repo)
+        module_keys = build_cache.get_module_keys(path_to_repo, modules)
+        for module_dir in build_cache.restore_outputs(path_to_repo, module_keys, settings.build_cache_dir):
+            del module_keys[module_dir]
+
+    tested_modules = None
+    if previous_commit_id is not None:
+        modules = modules if modules is not None else impact.load_reactor(path_to_repo)
+        tested_modules = impact.select_affected_modules(path_to_repo, modules, commit_id, previous_commit_id)
+        if tested_modules and settings.test_classes is None:
+            # modules outside of the selection are resolved from the local repository
+            upstream_modules = impact.get_upstream_modules(path_to_repo, modules, tested_modules)
+            if len(upstream_modules) > 0:
+                run_mvn_install(path_to_parent_pom, modules=upstream_modules, reuse_outputs=reuse_outputs)
+
+    generate_test_suite_metrics(commit_report_list, path_to_parent_pom, commit_id, settings.invocation_count,
+                                settings.test_classes, modules=tested_modules, reuse_outputs=reuse_outputs,
+                                warmup_count=settings.warmup_count, quiescence=settings.quiescence,
+                                adaptive=settings.adaptive, resource_usage_list=resource_usage_list,
+                                count_events=settings.count_events)
+    if settings.pipeline is not None and pipeline_lock is None:
+        generate_pipeline_metrics(jmh_report_list, path_to_parent_pom, settings.pipeline, commit_id,
+                                  reuse_outputs=reuse_outputs, quiescence=settings.quiescence,
+                                  resource_usage_list=resource_usage_list, count_events=settings.count_events,
+                                  flink=settings.flink, flink_report_list=flink_report_list)
+    elif settings.pipeline is not None:
+        with pipeline_lock:
+            generate_pipeline_metrics(jmh_report_list, path_to_parent_pom, settings.pipeline, commit_id,
+                                      reuse_outputs=reuse_outputs, quiescence=settings.quiescence,
+                                      resource_usage_list=resource_usage_list, count_events=settings.count_events,
+                                      flink=settings.flink, flink_report_list=flink_report_list)
+
+    if use_build_cache:
+        build_cache.store_outputs(path_to_repo, module_keys, settings.build_cache_dir, settings.build_cache_size)
+
+    return objects.CommitMeasurement(commit_id=commit_id, junit_reports=commit_report_list,
+                                     jmh_reports=jmh_report_list, tested_modules=tested_modules,
+                                     resource_usage=resource_usage_list, flink_reports=flink_report_list)
 
 
 def generate_test_suite_metrics(commit_report_list: List[objects.JUnitCommitReport], path_to_parent_pom: str,
-                                commit_id: str, invocation_count: int, test_classes: List[str]) -> None:
-    """Runs the test suite and collects originating JUnit reports"""
-    if invocation_count is 0:
+                                commit_id: str, invocation_count: int, test_classes: List[str],
+                                modules: List[str] = None, reuse_outputs: bool = False, warmup_count: int = 0,
+                                quiescence: objects.QuiescenceLimits = None,
+                                adaptive: objects.AdaptiveSampling = None,
+                                resource_usage_list: List[objects.ResourceUsage] = None,
+                                count_events: bool = False) -> None:
+    """Runs the test suite and collects originating JUnit reports.
+
+    If a list of module paths is given, only the tests of these modules are run. If outputs are reused, the project
+    is not cleaned, only the reports of the previous invocation are removed.
+    Warmup invocations are run first and their reports are discarded. With quiescence limits, every recorded
+    invocation waits for the host to become quiet, and its reports are flagged as contended if it did not.
+    With adaptive sampling, the test classes whose runtime is not yet known precisely enough are invoked again after
+    the first invocation_count invocations, until all of them are or the limits of the sampling are reached.
+    If a resource usage list is given, the mean usage of the first invocation_count invocations, which run every
+    selected test, is appended to it, with hardware event counts if events are counted.
+    """
+    if invocation_count is 0 or (modules is not None and len(modules) == 0):
         return
 
+    for i in range(warmup_count):
+        print('Warmup invocation {n} of {count}'.format(n=i + 1, count=warmup_count))
+        run_mvn_test(path_to_parent_pom, test_classes=test_classes, modules=modules, reuse_outputs=reuse_outputs)
+    # the time budget of adaptive sampling covers the recorded invocations only
+    start = time.monotonic()
+
+    # every invocation starts with mvn clean, so its reports have to be collected before the next one
+    invocations = []  # type: List[List[objects.JUnitReport]]
+    usage_list = []  # type: List[objects.ResourceUsage]
     for i in range(invocation_count):
-        run_mvn_test(path_to_parent_pom, test_classes=test_classes)
+        reports, usage = invoke_test_suite(path_to_parent_pom, test_classes, modules, reuse_outputs, quiescence,
+                                           sample_resources=resource_usage_list is not None,
+                                           count_events=count_events)
+        invocations.append(reports)
+        if usage is not None:
+            usage_list.append(usage)
+    if resource_usage_list is not None:
+        resource_usage_list.append(aggregate_usage(usage_list, 'test'))
+
+    if adaptive is not None:
+        while True:
+            pending_tests = find_imprecise_tests(invocations, adaptive.ci_target)
+            if len(pending_tests) == 0:
+                break
+            if len(invocations) >= adaptive.max_invocations or (
+                    adaptive.time_budget is not None and time.monotonic() - start >= adaptive.time_budget):
+                print('Stopped sampling {commit} after {n} invocations, {count} test classes did not reach the '
+                      'confidence target'.format(commit=commit_id, n=len(invocations), count=len(pending_tests)))
+                break
+            print('Invoking {count} test classes again to reach the confidence target'.format(
+                count=len(pending_tests)))
+            reports, _ = invoke_test_suite(path_to_parent_pom, pending_tests, modules, reuse_outputs, quiescence)
+            invocations.append(reports)
+
+    for report in merge_invocations(invocations):
+        commit_report = objects.create_junit_commit_report(commit=commit_id, report=report)
+        commit_report_list.append(commit_report)
+
+
+def invoke_test_suite(path_to_parent_pom: str, test_classes: Optional[List[str]], modules: Optional[List[str]],
+                      reuse_outputs: bool, quiescence: Optional[objects.QuiescenceLimits],
+                      sample_resources: bool = False,
+                      count_events: bool = False) -> Tuple[List[objects.JUnitReport], Optional[objects.ResourceUsage]]:
+    """Runs the test suite once and returns the reports and, if sampled, the resource usage of this invocation."""
+    if reuse_outputs:
+        remove_surefire_reports(path_to_parent_pom)
+    quiet = noise.wait_for_quiescence(quiescence) if quiescence is not None else True
+    usage = run_mvn_test(path_to_parent_pom, test_classes=test_classes, modules=modules, reuse_outputs=reuse_outputs,
+                         sample_resources=sample_resources, count_events=count_events)
+    reports = collect_junit_reports(path_to_parent_pom, modules=modules)
+    return (reports if quiet else [report._replace(contended=True) for report in reports]), usage
+
+
+def find_imprecise_tests(invocations: List[List[objects.JUnitReport]], ci_target: float) -> List[str]:
+    """Returns the names of the test classes whose confidence interval is wider than ci_target times their mean.
+
+    A test class needs at least two samples for its interval to be known.
+    """
+    samples_by_test = {}  # type: Dict[str, List[float]]
+    for reports in invocations:
+        for report in reports:
+            samples_by_test.setdefault(report.test_name, []).append(report.time_elapsed)
+
+    imprecise_tests = []  # type: List[str]
+    for test_name, samples in sorted(samples_by_test.items()):
+        lower, upper = significance.confidence_interval(samples)
+        mean = statistics.mean(samples)
+        if len(samples) < 2 or (mean > 0 and (upper - lower) / mean > ci_target):
+            imprecise_tests.append(test_name)
+    return imprecise_tests
+
 
+def merge_invocations(invocations: List[List[objects.JUnitReport]]) -> List[objects.JUnitReport]:
+    """Merges the reports of repeated invocations into one report per test class holding every runtime as sample.
+
+    The time elapsed of a merged report is the mean of its samples, all other values are taken from the last run.
+    The times of the test methods are merged the same way.
+    """
+    reports_by_test = {}  # type: Dict[str, List[objects.JUnitReport]]
+    for reports in invocations:
+        for report in reports:
+            reports_by_test.setdefault(report.test_name, []).append(report)
+
+    merged_reports = []  # type: List[objects.JUnitReport]
+    for reports in reports_by_test.values():
+        samples = [report.time_elapsed for report in reports]
+        test_cases = {}  # type: Dict[str, List[float]]
+        for report in reports:
+            for method, method_samples in (report.test_cases or {}).items():
+                test_cases.setdefault(method, []).extend(method_samples)
+        merged_reports.append(reports[-1]._replace(time_elapsed=statistics.mean(samples), samples=samples,
+                                                   contended=any(report.contended for report in reports),
+                                                   test_cases=test_cases))
+
+    return merged_reports
+
+
+def collect_junit_reports(path_to_parent_pom: str, modules: List[str] = None) -> List[objects.JUnitReport]:
+    """Reads the surefire reports of every submodule, or of the given module paths, left behind by the last test run."""
     submodules = filter_target_modules(
         collect_submodules(path_to_parent_pom))
+    if modules is not None:
+        project_root = os.path.dirname(os.path.abspath(path_to_parent_pom))
+        submodules = [submodule for submodule in submodules
+                      if os.path.relpath(os.path.abspath(submodule), project_root) in modules]
 
+    filenames = []  # type: List[str]
     for submodule in submodules:
-        filenames = collect_surefire_reports(submodule)
-        for filename in filenames:
-            report_xml = JUnitXml.fromfile(filename)
-            report = objects.create_junit_report(report_xml)
-            commit_report = objects.create_junit_commit_report(commit=commit_id, report=report)
+        filenames.extend(collect_surefire_reports(submodule))
 
-            commit_report_list.append(commit_report)
+    return parse_surefire.read_junit_reports(filenames)
 
 
 def generate_pipeline_metrics(jmh_report_list: List[objects.JmhCommitReport], path_to_pom: str,
-                              path_to_pipeline: str, commit_id: str) -> None:
-    """Runs the pipeline and collects originating JMH reports.
-
-    It is assumed that the executable jar containing the benchmark can be found under pipeline_root/target/.
-    It is further assumed that the resulting jmh-report is named after the default (jmh-result.json).
+                              pipeline: objects.PipelineConfig, commit_id: str, reuse_outputs: bool = False,
+                              quiescence: objects.QuiescenceLimits = None,
+                              resource_usage_list: List[objects.ResourceUsage] = None,
+                              count_events: bool = False, flink: objects.FlinkConfig = None,
+                              flink_report_list: List[objects.FlinkCommitReport] = None) -> None:
+    """Runs the pipeline and collects originating JMH reports, one for every benchmark and parameter combination.
+
+    It is assumed that the executable jar containing the benchmarks can be found under pipeline_root/target/ and
+    accepts the command line options of the JMH runner. With quiescence limits, the benchmarks and the Flink jobs wait
+    for the host to become quiet, and their reports are flagged as contended if it did not. If a resource usage list
+    is given, the usage of the benchmark run is appended to it. Given a Flink config, the jar it names is submitted
+    afterwards at every parallelism level (see run/flink.py) and the reports of the jobs are appended to the Flink
+    report list.
     """
+    path_to_jar = build_pipeline(path_to_pom, pipeline, reuse_outputs=reuse_outputs)
+    # execute pipeline
+    with tempfile.TemporaryDirectory() as result_dir:
+        path_to_result = os.path.join(result_dir, const.JMH_RESULT)
+        quiet = noise.wait_for_quiescence(quiescence) if quiescence is not None else True
+        usage = run_jar(path_to_jar, build_jmh_arguments(pipeline, path_to_result),
+                        sample_resources=resource_usage_list is not None, count_events=count_events)
+        if usage is not None:
+            resource_usage_list.append(usage._replace(stage='jmh'))
+
+        # read jmh-result file
+        with open(path_to_result) as file:
+            data = json.load(file)
+
+    # create JmhReport objects
+    for report_data in data:
+        jmh_report = objects.build_jmh_report(report_data)._replace(contended=not quiet)
+        jmh_report_list.append(objects.JmhCommitReport(commit_id=commit_id, jmh_report=jmh_report))
+
+    if flink is not None:
+        quiet = noise.wait_for_quiescence(quiescence) if quiescence is not None else True
+        for flink_report in run_sweep(os.path.join(os.path.dirname(path_to_jar), flink.jar), flink):
+            flink_report_list.append(objects.FlinkCommitReport(commit_id=commit_id,
+                                                               flink_report=flink_report._replace(contended=not quiet)))
+
+
+def build_pipeline(path_to_pom: str, pipeline: objects.PipelineConfig, reuse_outputs: bool = False) -> str:
+    """Installs the revision, builds the pipeline against it and returns the path to the executable benchmark jar."""
+    path_to_pipeline = os.path.expanduser(pipeline.path)
     # install current revision
-    run_mvn_install(path_to_pom)
+    run_mvn_install(path_to_pom, reuse_outputs=reuse_outputs)
     # get version number
-    version_nr = run.maven.fetch_maven_project_version(path_to_pom)
+    version_nr = parse_pom.fetch_project_version(path_to_pom)
     # build pipeline
     pipeline_pom = os.path.join(path_to_pipeline, 'pom.xml')
     run.maven.mvn_set_dep_version(pipeline_pom, 'org.gradoop', version_nr)
     run.maven.mvn_package(pipeline_pom)
-    # execute pipeline
-    jar_name = 'gradoop-pipeline-1.0-SNAPSHOT-shaded.jar'
-    path_to_jar = os.path.join(path_to_pipeline, const.MVN_TARGET_DIR, jar_name)
-    run_jar(path_to_jar)
+    return os.path.join(path_to_pipeline, const.MVN_TARGET_DIR, pipeline.jar)
+
+
+def build_jmh_arguments(pipeline: objects.PipelineConfig, path_to_result: str) -> List[str]:
+    """Returns the JMH runner options selecting the benchmarks and writing their results as JSON to the given file."""
+    arguments = ['-rf', 'json', '-rff', path_to_result]
+    if pipeline.forks is not None:
+        arguments.extend(['-f', str(pipeline.forks)])
+    if pipeline.warmup_iterations is not None:
+        arguments.extend(['-wi', str(pipeline.warmup_iterations)])
+    if pipeline.measurement_iterations is not None:
+        arguments.extend(['-i', str(pipeline.measurement_iterations)])
+    if pipeline.include is not None:
+        arguments.append(pipeline.include)
 
-    # read jmh-result file
-    with open('jmh-result.json') as file:
-        data = json.load(file)
-    # create JmhReport object
-    jmh_report = objects.build_jmh_report(data[0])
-    jmh_commit_report = objects.JmhCommitReport(commit_id=commit_id, jmh_report=jmh_report)
-    jmh_report_list.append(jmh_commit_report)
+    return arguments
 
 
 def collect_submodules(path_to_pom: str) -> List[str]:
-    """Returns a list of paths to every mvn submodule of the specified parent module."""
-    print('Collecting submodules of {pom}'.format(pom=path_to_pom))
-    cmd = 'mvn -f {pom} -q --also-make exec:exec -Dexec.executable="pwd"'.format(
-        pom=path_to_pom)
+    """Returns a list of paths to every mvn submodule of the specified parent module, including the parent itself.
 
+    The poms are read in-process (see parse/parse_pom.py) instead of asking maven for the reactor.
+    """
+    print('Collecting submodules of {pom}'.format(pom=path_to_pom))
     try:
-        completed_process = subprocess.run(
-            cmd, stdout=subprocess.PIPE, encoding='utf-8', shell=True, check=True)
-        return completed_process.stdout.splitlines()
-    except subprocess.CalledProcessError:
+        return [module.path for module in parse_pom.read_reactor(path_to_pom)]
+    except (OSError, ElementTree.ParseError):
         print('Error while trying to collect submodules of expected parent {pom}'.format(pom=path_to_pom))
         exit(1)
 
@@ -153,40 +504,7 @@ def collect_surefire_reports(project_root: str) -> List[str]:
     return utils.get_filenames_by_type(path_to_reports, 'xml')
 
 
-def group_commit_reports_by_test_name(
-        commit_reports: List[objects.JUnitCommitReport]) -> List[List[objects.JUnitCommitReport]]:
-    """
-    Groups a list of CommitReport objects like [{'test_name': 'X'},{'test_name': 'Y'}, {'test_name': 'X'}]
-    to a list of lists like [[{'test_name': 'X'}, {'test_name': 'X'}], [{'test_name': 'Y'}]]
-    """
-    grouped_commit_reports = []  # type: List[List[objects.JUnitCommitReport]]
-    test_result_map = {}  # type: Dict[str, List[objects.JUnitCommitReport]]
-
-    for commit_report in commit_reports:
-        test_name = commit_report.report.test_name
-
-        if test_name not in test_result_map.keys():
-            test_result_map[test_name] = [commit_report]
-        else:
-            test_result_map[test_name].append(commit_report)
-
-    for key in test_result_map.keys():
-        grouped_commit_reports.append(test_result_map[key])
-
-    return grouped_commit_reports
-
-
-def write_grouped_commit_reports(commit_reports: List[objects.JUnitCommitReport], path_to_log: str) -> str:
-    """Writes a list of test data dicts to a JSON file in the specified dir and returns the path to the created file.
-
-    :param commit_reports: List of CommitReport objects
-    :param path_to_log: Path to log dir
-    :return: Name of the file the data was written to
-    """
-    filename = commit_reports[0].report.test_name + '.json'
-    path = os.path.join(path_to_log, filename)
-
-    with open(path, 'w') as file:
-        file.write(json.dumps(utils.unpack(commit_reports), indent=2))
-
-    return filename
+def remove_surefire_reports(path_to_parent_pom: str) -> None:
+    """Removes the surefire reports of every submodule, which mvn clean would do otherwise."""
+    for submodule in filter_target_modules(collect_submodules(path_to_parent_pom)):
+        shutil.rmtree(os.path.join(submodule, const.MVN_TARGET_DIR, const.SUREFIRE_REPORTS_DIR), ignore_errors=True)
@@ -0,0 +1,213 @@
+import argparse
+import math
+import os.path
+from typing import Dict, List, Tuple
+
+import numpy  # type: ignore
+
+import logger
+from model.objects import BenchmarkLogSummary, ScalingFit, ScalingPoint, ScalingRegression
+from parse.parse_gradoop import parse_gradoop_benchmark_report
+
+SCALING_THRESHOLD = 0.05  # tolerated increase of the relative runtime change at a parallelism over the lowest one
+SIGNIFICANCE_LEVEL = 0.05
+
+
+def get_runtime_column(summary: BenchmarkLogSummary, name: str = None) -> int:
+    """Returns the index of the measured column holding the runtime.
+
+    Defaults to the first measured column whose name contains 'runtime', else to the last measured column.
+    """
+    if name is not None:
+        if name not in summary.measured_columns:
+            print('Error: {name} is not a numeric column, choose one of {columns}'.format(
+                name=name, columns=', '.join(summary.measured_columns)))
+            exit(1)
+        return summary.measured_columns.index(name)
+
+    for index, column in enumerate(summary.measured_columns):
+        if 'runtime' in column.lower():
+            return index
+    return len(summary.measured_columns) - 1
+
+
+def get_configuration_ids(summary: BenchmarkLogSummary) -> Tuple[List[str], numpy.ndarray]:
+    """Returns the label of every configuration and the configuration of every group of the summary."""
+    labels = [', '.join(configuration) if len(configuration) > 0 else 'default'
+              for configuration in summary.configurations]
+    configurations, configuration_ids = numpy.unique(numpy.array(labels), return_inverse=True)
+    return [str(configuration) for configuration in configurations], configuration_ids
+
+
+def analyze_log(commit_id: str, summary: BenchmarkLogSummary,
+                runtime_column: int) -> Tuple[List[ScalingPoint], List[ScalingFit]]:
+    """Computes speedup and efficiency of every configuration and fits Amdahl's and Gustafson's law to them.
+
+    Amdahl's law T(p) = a + b / p is fitted to the mean runtimes by least squares, all configurations at once. The
+    serial fraction is a / (a + b). Speedups are relative to the measured runtime at parallelism one or, if that was
+    not measured, to the fitted one. Gustafson's serial fraction is the least squares solution of S(p) = p - α (p - 1).
+    """
+    configurations, configuration_ids = get_configuration_ids(summary)
+    count = len(configurations)
+    parallelism = summary.parallelism.astype(numpy.float64)
+    runtime = summary.means[:, runtime_column]
+
+    # normal equations of the fit of T to x = 1 / p per configuration
+    x = 1.0 / parallelism
+    n = numpy.bincount(configuration_ids, minlength=count).astype(numpy.float64)
+    sum_x = numpy.bincount(configuration_ids, weights=x, minlength=count)
+    sum_xx = numpy.bincount(configuration_ids, weights=x * x, minlength=count)
+    sum_t = numpy.bincount(configuration_ids, weights=runtime, minlength=count)
+    sum_xt = numpy.bincount(configuration_ids, weights=x * runtime, minlength=count)
+    determinant = n * sum_xx - sum_x ** 2
+    fitted = numpy.abs(determinant) > 1e-12
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        b = numpy.where(fitted, (n * sum_xt - sum_x * sum_t) / determinant, numpy.nan)
+        a = numpy.where(fitted, (sum_t - b * sum_x) / n, numpy.nan)
+        serial_runtime = a + b
+        amdahl_fraction = a / serial_runtime
+
+    # runtime at parallelism one, measured where available
+    base_runtime = serial_runtime.copy()
+    at_one = parallelism == 1
+    base_runtime[configuration_ids[at_one]] = runtime[at_one]
+
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        speedup = base_runtime[configuration_ids] / runtime
+        efficiency = speedup / parallelism
+        spread = parallelism - 1
+        lost_speedup = numpy.bincount(configuration_ids, weights=(parallelism - speedup) * spread, minlength=count)
+        gustafson_fraction = lost_speedup / numpy.bincount(configuration_ids, weights=spread ** 2, minlength=count)
+
+    max_parallelism = numpy.zeros(count, dtype=numpy.int64)
+    numpy.maximum.at(max_parallelism, configuration_ids, summary.parallelism)
+    at_max = summary.parallelism == max_parallelism[configuration_ids]
+    max_efficiency = numpy.full(count, numpy.nan)
+    max_efficiency[configuration_ids[at_max]] = efficiency[at_max]
+
+    order = numpy.lexsort((summary.parallelism, configuration_ids))
+    points = [ScalingPoint(commit_id=commit_id, configuration=configurations[configuration_ids[index]],
+                           parallelism=int(summary.parallelism[index]), runtime=float(runtime[index]),
+                           speedup=float(speedup[index]), efficiency=float(efficiency[index]))
+              for index in order]
+    fits = [ScalingFit(commit_id=commit_id, configuration=configurations[index],
+                       serial_runtime=float(serial_runtime[index]),
+                       amdahl_serial_fraction=float(amdahl_fraction[index]),
+                       gustafson_serial_fraction=float(gustafson_fraction[index]),
+                       max_parallelism=int(max_parallelism[index]), efficiency=float(max_efficiency[index]))
+            for index in range(count)]
+    return points, fits
+
+
+def compare_logs(commit_id: str, summary: BenchmarkLogSummary, previous_commit_id: str,
+                 previous_summary: BenchmarkLogSummary, runtime_column: int) -> List[ScalingRegression]:
+    """Returns the configurations and parallelisms whose runtime grew more than the runtime at the lowest parallelism.
+
+    A change that slows down p=16 but not p=1 hurts the scalability rather than the work done. The runtime changes of
+    the parallelisms measured for both commits are compared with the change at the lowest of them, and the difference
+    is flagged if it exceeds SCALING_THRESHOLD and the runtime change is significant by a Welch test.
+    """
+    previous_groups = index_groups(previous_summary)
+    previous_runtime = previous_summary.means[:, runtime_column]
+    previous_variance = get_variance(previous_summary, runtime_column)
+    runtime = summary.means[:, runtime_column]
+    variance = get_variance(summary, runtime_column)
+
+    common = {}  # type: Dict[str, List[Tuple[int, int, int]]]
+    for (configuration, parallelism), index in sorted(index_groups(summary).items()):
+        if (configuration, parallelism) in previous_groups:
+            common.setdefault(configuration, []).append(
+                (parallelism, index, previous_groups[(configuration, parallelism)]))
+
+    regressions = []  # type: List[ScalingRegression]
+    for configuration, groups in common.items():
+        _, base_index, previous_base_index = groups[0]
+        baseline_change = relative_change(runtime[base_index], previous_runtime[previous_base_index])
+        for parallelism, index, previous_index in groups[1:]:
+            runtime_change = relative_change(runtime[index], previous_runtime[previous_index])
+            if runtime_change - baseline_change <= SCALING_THRESHOLD:
+                continue
+            p_value = welch_p_value(runtime[index], variance[index], summary.counts[index, runtime_column],
+                                    previous_runtime[previous_index], previous_variance[previous_index],
+                                    previous_summary.counts[previous_index, runtime_column])
+            # without repetitions significance cannot be tested, the change is reported anyway
+            if math.isnan(p_value) or p_value < SIGNIFICANCE_LEVEL:
+                regressions.append(ScalingRegression(
+                    commit_id=commit_id, previous_commit_id=previous_commit_id, configuration=configuration,
+                    parallelism=parallelism, runtime_change=runtime_change, baseline_change=baseline_change,
+                    p_value=p_value))
+    return regressions
+
+
+def select_measured_groups(summary: BenchmarkLogSummary, column: int) -> BenchmarkLogSummary:
+    """Returns the summary without the groups that have no value in the given measured column."""
+    measured = summary.counts[:, column] > 0
+    return summary._replace(configurations=[configuration for configuration, keep
+                                            in zip(summary.configurations, measured) if keep],
+                            parallelism=summary.parallelism[measured], counts=summary.counts[measured],
+                            means=summary.means[measured], m2=summary.m2[measured])
+
+
+def index_groups(summary: BenchmarkLogSummary) -> Dict[Tuple[str, int], int]:
+    configurations, configuration_ids = get_configuration_ids(summary)
+    return {(configurations[configuration_id], int(parallelism)): index
+            for index, (configuration_id, parallelism) in enumerate(zip(configuration_ids, summary.parallelism))}
+
+
+def get_variance(summary: BenchmarkLogSummary, column: int):
+    """Returns the sample variance of a measured column per group, nan for groups of a single row."""
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        counts = summary.counts[:, column]
+        return numpy.where(counts > 1, summary.m2[:, column] / (counts - 1), numpy.nan)
+
+
+def relative_change(value: float, previous_value: float) -> float:
+    return float(value / previous_value - 1) if previous_value != 0 else math.nan
+
+
+def welch_p_value(mean: float, variance: float, count: float,
+                  previous_mean: float, previous_variance: float, previous_count: float) -> float:
+    """Returns the two-sided p-value of the difference of two means by the normal approximation of Welch's test."""
+    standard_error = math.sqrt(variance / count + previous_variance / previous_count)
+    if math.isnan(standard_error):
+        return math.nan
+    if standard_error == 0:
+        return 0.0 if mean != previous_mean else 1.0
+    return math.erfc(abs(mean - previous_mean) / standard_error / math.sqrt(2))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Fit scaling models to Gradoop benchmark logs and compare their scalability across commits')
+    parser.add_argument('paths', type=str, nargs='+',
+                        help='Paths to the csv logs, one per commit and ordered from the oldest to the newest commit')
+    parser.add_argument('--runtime-column', type=str,
+                        help='Name of the column holding the runtime, defaults to the first one named like runtime')
+    parser.add_argument('--key-columns', type=str, nargs='+',
+                        help='Numeric columns identifying a configuration rather than measured, e.g. a scale factor')
+    parser.add_argument('-d', '--destination', type=str,
+                        help='Directory to write statistics/scaling.txt to, printed if omitted')
+    args = parser.parse_args()
+
+    points = []  # type: List[ScalingPoint]
+    fits = []  # type: List[ScalingFit]
+    regressions = []  # type: List[ScalingRegression]
+    previous = None  # type: Tuple[str, BenchmarkLogSummary]
+    for path in args.paths:
+        commit_id = os.path.splitext(os.path.basename(path))[0]
+        summary = parse_gradoop_benchmark_report(path, args.key_columns)
+        runtime_column = get_runtime_column(summary, args.runtime_column)
+        summary = select_measured_groups(summary, runtime_column)
+        commit_points, commit_fits = analyze_log(commit_id, summary, runtime_column)
+        points.extend(commit_points)
+        fits.extend(commit_fits)
+        if previous is not None:
+            regressions.extend(compare_logs(commit_id, summary, previous[0], previous[1],
+                                            get_runtime_column(previous[1], summary.measured_columns[runtime_column])))
+        previous = (commit_id, summary)
+
+    logger.log_scaling_analysis(points, fits, regressions, dest_dir=args.destination)
+
+
+if __name__ == '__main__':
+    main()
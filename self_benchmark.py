@@ -0,0 +1,190 @@
+import argparse
+import gc
+import json
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Tuple
+
+import numpy  # type: ignore
+from tabulate import tabulate
+
+import analyzer
+import codec
+import logger
+import store
+import utils
+from model import objects
+
+SIZES = ['100x10', '1000x100', '10000x10', '100x10000']  # commits x tests
+REPETITIONS = 3
+TIME_BUDGET = 0.25  # tolerated relative slowdown compared to the baseline
+MEMORY_BUDGET = 0.25
+MIN_SECONDS = 0.005  # slowdowns of functions faster than this are timer noise
+SHIFT_PROBABILITY = 0.01  # share of the cells whose runtime jumps, so some commits are salient
+
+
+def generate_reports(commit_count: int, test_count: int, seed: int = 0) -> List[objects.JUnitCommitReport]:
+    """Returns a synthetic history of JUnit reports, the most recent commit first, like the results database does.
+
+    Every test has a base runtime of 1 to 10 seconds with 5% noise, and some cells are slower by a factor of 2.5.
+    """
+    random_state = numpy.random.RandomState(seed)
+    base_runtimes = random_state.uniform(1, 10, test_count)
+    runtimes = base_runtimes * random_state.normal(1, 0.05, (commit_count, test_count))
+    runtimes[random_state.random_sample((commit_count, test_count)) < SHIFT_PROBABILITY] *= 2.5
+
+    commit_ids = ['{index:040x}'.format(index=index) for index in range(commit_count)]
+    test_names = ['org.example.Test{index}'.format(index=index) for index in range(test_count)]
+    return [objects.JUnitCommitReport(commit_id=commit_id, report=objects.JUnitReport(
+        test_name=test_name, test_run=1, failures=0, errors=0, time_elapsed=float(runtimes[row, column]), skipped=0))
+        for row, commit_id in enumerate(commit_ids) for column, test_name in enumerate(test_names)]
+
+
+def group_reports(reports: List[objects.JUnitCommitReport]) -> List[List[objects.JUnitCommitReport]]:
+    """Returns the reports of every test, in the order of the history."""
+    groups = {}  # type: Dict[str, List[objects.JUnitCommitReport]]
+    for commit_report in reports:
+        groups.setdefault(commit_report.report.test_name, []).append(commit_report)
+    return list(groups.values())
+
+
+def prepare_cases(reports: List[objects.JUnitCommitReport],
+                  path_to_log: str) -> List[Tuple[str, Callable[[], Any]]]:
+    """Returns the benchmarked functions of the analysis, each bound to the output of the stage before it."""
+    grouped_reports = group_reports(reports)
+    statistics_list = [analyzer.analyze_report_list(test_reports) for test_reports in grouped_reports]
+    salient_commits = analyzer.find_salient_commits(statistics_list)
+
+    connection = store.open_store(path_to_log)
+    commit_count = len(grouped_reports[0])
+    # the oldest commit gets the smallest commit time
+    store.add_commits(connection, [(commit_report.commit_id, commit_count - position)
+                                   for position, commit_report in enumerate(grouped_reports[0])])
+    store.add_junit_reports(connection, reports)
+    runtime_matrix = store.load_runtime_matrix(connection)
+    matrix_statistics = analyzer.analyze_runtime_matrix(runtime_matrix)
+    measurement = objects.CommitMeasurement(commit_id=reports[0].commit_id, junit_reports=reports, jmh_reports=[])
+    encoded_measurement = codec.encode_measurement(measurement)
+
+    return [
+        ('group_reports', lambda: group_reports(reports)),
+        ('analyze_report_list', lambda: [analyzer.analyze_report_list(test_reports)
+                                         for test_reports in grouped_reports]),
+        ('find_salient_commits', lambda: analyzer.find_salient_commits(statistics_list)),
+        ('utils.unpack', lambda: utils.unpack(statistics_list)),
+        ('logger.format_salient_commits', lambda: logger.format_salient_commits(salient_commits)),
+        ('store.load_runtime_matrix', lambda: store.load_runtime_matrix(connection)),
+        ('analyze_runtime_matrix', lambda: analyzer.analyze_runtime_matrix(runtime_matrix)),
+        ('find_salient_commits_in_matrix',
+         lambda: analyzer.find_salient_commits_in_matrix(runtime_matrix, matrix_statistics)),
+        ('codec.encode_measurement', lambda: codec.encode_measurement(measurement)),
+        ('codec.decode_measurement', lambda: codec.decode_measurement(encoded_measurement)),
+    ]
+
+
+def measure(function: Callable[[], Any], repetitions: int = REPETITIONS) -> Tuple[float, int]:
+    """Returns the fastest of the runtimes of a function and the peak memory it allocated, in a separate run.
+
+    Tracing allocations slows down the function, so the peak memory is taken from an extra run that is not timed.
+    """
+    seconds = float('inf')
+    for _ in range(repetitions):
+        gc.collect()
+        start = time.perf_counter()
+        function()
+        seconds = min(seconds, time.perf_counter() - start)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        function()
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return seconds, peak_memory
+
+
+def run_benchmarks(sizes: List[Tuple[int, int]], repetitions: int = REPETITIONS) -> List[objects.SelfBenchmarkResult]:
+    results = []  # type: List[objects.SelfBenchmarkResult]
+    for commit_count, test_count in sizes:
+        print('Benchmarking {commits} commits x {tests} tests'.format(commits=commit_count, tests=test_count))
+        reports = generate_reports(commit_count, test_count)
+        with tempfile.TemporaryDirectory() as path_to_log:
+            for name, function in prepare_cases(reports, path_to_log):
+                seconds, peak_memory = measure(function, repetitions)
+                results.append(objects.SelfBenchmarkResult(function=name, commits=commit_count, tests=test_count,
+                                                           seconds=seconds, peak_memory=peak_memory))
+    return results
+
+
+def compare_to_baseline(results: List[objects.SelfBenchmarkResult], baseline: List[objects.SelfBenchmarkResult],
+                        time_budget: float, memory_budget: float) -> List[Dict[str, Any]]:
+    """Returns the results that are slower, or allocate more, than their baseline by more than the budget allows."""
+    baseline_results = {(result.function, result.commits, result.tests): result for result in baseline}
+    violations = []  # type: List[Dict[str, Any]]
+    for result in results:
+        previous = baseline_results.get((result.function, result.commits, result.tests))
+        if previous is None:
+            continue
+        if result.seconds > previous.seconds * (1 + time_budget) + MIN_SECONDS:
+            violations.append({'function': result.function, 'commits': result.commits, 'tests': result.tests,
+                               'metric': 'seconds', 'baseline': previous.seconds, 'value': result.seconds,
+                               'ratio': result.seconds / previous.seconds if previous.seconds > 0 else float('nan')})
+        if result.peak_memory > previous.peak_memory * (1 + memory_budget):
+            violations.append({'function': result.function, 'commits': result.commits, 'tests': result.tests,
+                               'metric': 'peak_memory', 'baseline': previous.peak_memory, 'value': result.peak_memory,
+                               'ratio': result.peak_memory / previous.peak_memory if previous.peak_memory > 0
+                               else float('nan')})
+    return violations
+
+
+def parse_size(size: str) -> Tuple[int, int]:
+    try:
+        commit_count, test_count = size.lower().split('x')
+        return int(commit_count), int(test_count)
+    except ValueError:
+        print('Error: {size} is not a size of the form <commits>x<tests>, e.g. 1000x100'.format(size=size))
+        exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Measure time and peak memory of the analysis of perfdelta on synthetic histories')
+    parser.add_argument('--sizes', type=str, nargs='+', metavar='commitsxtests', default=SIZES,
+                        help='history sizes to benchmark (defaults to {sizes}).'.format(sizes=' '.join(SIZES)))
+    parser.add_argument('--repetitions', type=int, metavar='count', default=REPETITIONS,
+                        help='timed runs of every function, the fastest one counts (defaults to {n}).'.format(
+                            n=REPETITIONS))
+    parser.add_argument('--save', type=str, metavar='path',
+                        help='write the results to a JSON file, to be used as baseline later.')
+    parser.add_argument('--baseline', type=str, metavar='path',
+                        help='compare the results to a saved baseline and fail if a budget is exceeded.')
+    parser.add_argument('--time-budget', type=float, metavar='fraction', default=TIME_BUDGET,
+                        help='tolerated slowdown compared to the baseline (defaults to {budget}).'.format(
+                            budget=TIME_BUDGET))
+    parser.add_argument('--memory-budget', type=float, metavar='fraction', default=MEMORY_BUDGET,
+                        help='tolerated growth of the peak memory compared to the baseline (defaults to {budget}).'
+                        .format(budget=MEMORY_BUDGET))
+    args = parser.parse_args()
+
+    results = run_benchmarks([parse_size(size) for size in args.sizes], args.repetitions)
+    print(tabulate(utils.unpack(results), headers='keys', floatfmt='.4f'))
+
+    if args.save is not None:
+        with open(args.save, 'w') as file:
+            file.write(json.dumps(utils.unpack(results), indent=2))
+
+    if args.baseline is not None:
+        with open(args.baseline) as file:
+            baseline = [objects.SelfBenchmarkResult(**result) for result in json.load(file)]
+        violations = compare_to_baseline(results, baseline, args.time_budget, args.memory_budget)
+        if len(violations) > 0:
+            print('\nThe following functions exceed their budget:\n')
+            print(tabulate(violations, headers='keys', floatfmt='.4f'))
+            exit(1)
+        print('\nAll functions are within their budget.')
+
+
+if __name__ == '__main__':
+    main()
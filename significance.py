@@ -0,0 +1,138 @@
+import math
+import statistics
+from typing import List, Tuple
+
+import numpy  # type: ignore
+
+# two-sided 95% quantiles of the t-distribution for 1 to 30 degrees of freedom
+T_QUANTILES_95 = [12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228,
+                  2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101, 2.093, 2.086,
+                  2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042]
+Z_QUANTILE_95 = 1.960
+
+BOOTSTRAP_RESAMPLES = 1000
+# upper bound of resamples x distinct values held in memory at once while bootstrapping
+MAX_RESAMPLE_CELLS = 2 ** 22
+
+
+def mann_whitney_u(samples_x: List[float], samples_y: List[float]) -> Tuple[float, float]:
+    """Performs a two-sided Mann-Whitney U test and returns the U statistic of samples_x and the p-value.
+
+    The p-value is obtained by the normal approximation with tie and continuity correction, which is reasonable from
+    about five samples per group on. Does not assume normally distributed runtimes.
+    """
+    n_x = len(samples_x)
+    n_y = len(samples_y)
+    if n_x == 0 or n_y == 0:
+        return 0.0, 1.0
+
+    ranks, tie_sizes = rank(samples_x + samples_y)
+    u_x = sum(ranks[:n_x]) - n_x * (n_x + 1) / 2
+
+    n = n_x + n_y
+    tie_correction = sum(t ** 3 - t for t in tie_sizes) / (n * (n - 1)) if n > 1 else 0
+    variance = n_x * n_y / 12 * ((n + 1) - tie_correction)
+    if variance <= 0:
+        return u_x, 1.0
+
+    mean = n_x * n_y / 2
+    z = max(abs(u_x - mean) - 0.5, 0) / math.sqrt(variance)
+    return u_x, min(1.0, math.erfc(z / math.sqrt(2)))
+
+
+def confidence_interval(samples: List[float]) -> Tuple[float, float]:
+    """Returns the 95% confidence interval of the mean of the samples, based on the t-distribution.
+
+    With less than two samples the interval collapses to the single value.
+    """
+    mean = statistics.mean(samples)
+    if len(samples) < 2:
+        return mean, mean
+
+    degrees_of_freedom = len(samples) - 1
+    quantile = T_QUANTILES_95[degrees_of_freedom - 1] if degrees_of_freedom <= len(T_QUANTILES_95) else Z_QUANTILE_95
+    margin = quantile * statistics.stdev(samples) / math.sqrt(len(samples))
+    return mean - margin, mean + margin
+
+
+def mann_whitney_u_weighted(values_x, counts_x, values_y, counts_y) -> Tuple[float, float]:
+    """Performs mann_whitney_u on numpy arrays of distinct values and how often each of them was sampled.
+
+    Ranks are computed per distinct value, so histograms with millions of samples are tested without expanding them.
+    """
+    n_x = float(counts_x.sum())
+    n_y = float(counts_y.sum())
+    if n_x == 0 or n_y == 0:
+        return 0.0, 1.0
+
+    distinct_values, inverse = numpy.unique(numpy.concatenate([values_x, values_y]), return_inverse=True)
+    group_x = numpy.bincount(inverse, weights=numpy.concatenate([counts_x, numpy.zeros(len(values_y))]),
+                             minlength=len(distinct_values))
+    group_y = numpy.bincount(inverse, weights=numpy.concatenate([numpy.zeros(len(values_x)), counts_y]),
+                             minlength=len(distinct_values))
+    tie_sizes = group_x + group_y
+    average_ranks = numpy.cumsum(tie_sizes) - (tie_sizes - 1) / 2
+    u_x = float(numpy.dot(group_x, average_ranks)) - n_x * (n_x + 1) / 2
+
+    n = n_x + n_y
+    tie_correction = float(numpy.sum(tie_sizes ** 3 - tie_sizes)) / (n * (n - 1)) if n > 1 else 0
+    variance = n_x * n_y / 12 * ((n + 1) - tie_correction)
+    if variance <= 0:
+        return u_x, 1.0
+
+    mean = n_x * n_y / 2
+    z = max(abs(u_x - mean) - 0.5, 0) / math.sqrt(variance)
+    return u_x, min(1.0, math.erfc(z / math.sqrt(2)))
+
+
+def bootstrap_ratio_interval(values_x, counts_x, values_y, counts_y,
+                             random_state: numpy.random.RandomState) -> Tuple[float, float]:
+    """Returns the 95% percentile bootstrap confidence interval of mean(x) / mean(y).
+
+    Takes the same arguments as mann_whitney_u_weighted. Resampling draws how often each distinct value occurs.
+    """
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        ratios = (bootstrap_means(values_x, counts_x, random_state)
+                  / bootstrap_means(values_y, counts_y, random_state))
+    ratios = ratios[numpy.isfinite(ratios)]
+    if len(ratios) == 0:
+        return math.nan, math.nan
+
+    lower, upper = numpy.percentile(ratios, [2.5, 97.5])
+    return float(lower), float(upper)
+
+
+def bootstrap_means(values, counts, random_state: numpy.random.RandomState):
+    """Returns the means of BOOTSTRAP_RESAMPLES resamples of the weighted values."""
+    sample_count = int(counts.sum())
+    probabilities = counts / counts.sum()
+    chunk_size = max(1, MAX_RESAMPLE_CELLS // len(values))
+
+    means = numpy.empty(BOOTSTRAP_RESAMPLES)
+    for start in range(0, BOOTSTRAP_RESAMPLES, chunk_size):
+        size = min(chunk_size, BOOTSTRAP_RESAMPLES - start)
+        resampled_counts = random_state.multinomial(sample_count, probabilities, size=size)
+        means[start:start + size] = resampled_counts.dot(values) / sample_count
+
+    return means
+
+
+def rank(values: List[float]) -> Tuple[List[float], List[int]]:
+    """Returns the ranks of the values, with ties getting their average rank, and the sizes of all ties."""
+    order = sorted(range(len(values)), key=lambda i: values[i])
+    ranks = [0.0] * len(values)
+    tie_sizes = []  # type: List[int]
+
+    start = 0
+    while start < len(order):
+        end = start
+        while end + 1 < len(order) and values[order[end + 1]] == values[order[start]]:
+            end += 1
+        average_rank = (start + end) / 2 + 1
+        for i in range(start, end + 1):
+            ranks[order[i]] = average_rank
+        if end > start:
+            tie_sizes.append(end - start + 1)
+        start = end + 1
+
+    return ranks, tie_sizes
@@ -0,0 +1,465 @@
+import itertools
+import json
+import os.path
+import sqlite3
+from array import array
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+import numpy  # type: ignore
+
+import codec
+import const
+import utils
+from model import objects
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS commits (
+    commit_id TEXT PRIMARY KEY,
+    commit_time INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS commits_by_time ON commits (commit_time);
+CREATE TABLE IF NOT EXISTS junit_reports (
+    test_name TEXT NOT NULL,
+    commit_id TEXT NOT NULL,
+    test_run INTEGER NOT NULL,
+    failures INTEGER NOT NULL,
+    errors INTEGER NOT NULL,
+    time_elapsed REAL NOT NULL,
+    skipped INTEGER NOT NULL,
+    unchanged INTEGER NOT NULL,
+    samples BLOB,
+    contended INTEGER NOT NULL DEFAULT 0,
+    method_ids BLOB,
+    method_times BLOB,
+    PRIMARY KEY (test_name, commit_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS test_methods (
+    method_id INTEGER PRIMARY KEY,
+    test_name TEXT NOT NULL,
+    method_name TEXT NOT NULL,
+    UNIQUE (test_name, method_name)
+);
+CREATE TABLE IF NOT EXISTS resource_usage (
+    commit_id TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    user_time REAL NOT NULL,
+    system_time REAL NOT NULL,
+    peak_rss REAL NOT NULL,
+    voluntary_switches REAL NOT NULL,
+    involuntary_switches REAL NOT NULL,
+    read_bytes REAL NOT NULL,
+    write_bytes REAL NOT NULL,
+    instructions REAL,
+    cycles REAL,
+    cache_misses REAL,
+    branch_misses REAL,
+    PRIMARY KEY (commit_id, stage)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS pending_reports (
+    test_name TEXT NOT NULL,
+    commit_id TEXT NOT NULL,
+    PRIMARY KEY (test_name, commit_id)
+) WITHOUT ROWID;
+CREATE TRIGGER IF NOT EXISTS junit_reports_pending AFTER INSERT ON junit_reports
+BEGIN
+    INSERT OR IGNORE INTO pending_reports (test_name, commit_id) VALUES (NEW.test_name, NEW.commit_id);
+END;
+CREATE TABLE IF NOT EXISTS running_statistics (
+    kind TEXT NOT NULL,
+    name TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    mean REAL NOT NULL,
+    m2 REAL NOT NULL,
+    recent BLOB NOT NULL,
+    last_commit_id TEXT NOT NULL,
+    last_commit_time INTEGER NOT NULL,
+    last_value REAL NOT NULL,
+    unit TEXT,
+    last_report TEXT,
+    PRIMARY KEY (kind, name)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS junit_statistics (
+    test_name TEXT NOT NULL,
+    commit_id TEXT NOT NULL,
+    runtime REAL NOT NULL,
+    speedup REAL NOT NULL,
+    runtime_delta REAL NOT NULL,
+    sample_count INTEGER NOT NULL,
+    median REAL NOT NULL,
+    variance REAL NOT NULL,
+    ci_lower REAL NOT NULL,
+    ci_upper REAL NOT NULL,
+    PRIMARY KEY (test_name, commit_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS jmh_statistics (
+    commit_id TEXT NOT NULL,
+    mode TEXT NOT NULL,
+    score REAL NOT NULL,
+    delta REAL NOT NULL,
+    benchmark TEXT NOT NULL,
+    unit TEXT NOT NULL,
+    ratio REAL,
+    ci_lower REAL,
+    ci_upper REAL,
+    p_value REAL,
+    change TEXT NOT NULL,
+    previous_commit_id TEXT NOT NULL,
+    PRIMARY KEY (benchmark, mode, commit_id)
+) WITHOUT ROWID;
+'''
+
+# columns added to tables after their first version, added to older databases when they are opened
+ADDED_COLUMNS = [('junit_reports', 'contended', 'INTEGER NOT NULL DEFAULT 0'),
+                 ('junit_reports', 'method_ids', 'BLOB'),
+                 ('junit_reports', 'method_times', 'BLOB'),
+                 ('resource_usage', 'instructions', 'REAL'),
+                 ('resource_usage', 'cycles', 'REAL'),
+                 ('resource_usage', 'cache_misses', 'REAL'),
+                 ('resource_usage', 'branch_misses', 'REAL')]
+
+RESOURCE_COLUMNS = ('commit_id, stage, user_time, system_time, peak_rss, voluntary_switches, involuntary_switches, '
+                    'read_bytes, write_bytes, instructions, cycles, cache_misses, branch_misses')
+
+MAX_VARIABLES = 500  # placeholders per query, older sqlite versions allow at most 999
+
+JUNIT_STATISTICS_COLUMNS = ', '.join(objects.JUnitStatistics._fields)
+JMH_STATISTICS_COLUMNS = ', '.join(objects.JmhStatistics._fields)
+
+JUNIT_COLUMNS = ('r.test_name, r.commit_id, r.test_run, r.failures, r.errors, r.time_elapsed, r.skipped, '
+                 'r.unchanged, r.samples, r.contended')
+
+
+def open_store(path_to_log: str) -> sqlite3.Connection:
+    """Opens the results database in the specified dir, creating it if necessary."""
+    utils.create_dir(path_to_log)
+    connection = sqlite3.connect(os.path.join(path_to_log, const.RESULTS_DATABASE))
+    connection.executescript(SCHEMA)
+
+    existing_columns = {}  # type: Dict[str, Set[str]]
+    with connection:
+        for table, name, definition in ADDED_COLUMNS:
+            if table not in existing_columns:
+                existing_columns[table] = {row[1] for row in connection.execute(
+                    'PRAGMA table_info({table})'.format(table=table))}
+            if name not in existing_columns[table]:
+                connection.execute('ALTER TABLE {table} ADD COLUMN {name} {definition}'.format(
+                    table=table, name=name, definition=definition))
+    return connection
+
+
+def add_commits(connection: sqlite3.Connection, commits: List[Tuple[str, int]]) -> None:
+    """Registers commits together with their commit time, which defines the order of the history."""
+    with connection:
+        connection.executemany('INSERT OR REPLACE INTO commits (commit_id, commit_time) VALUES (?, ?)', commits)
+
+
+def add_junit_reports(connection: sqlite3.Connection, commit_reports: List[objects.JUnitCommitReport]) -> None:
+    """Appends reports, replacing earlier ones of the same test class and commit. Their commits must be known.
+
+    The mean times of the test methods are stored with the report of their class, as an array of method ids, which
+    refer to the test_methods table, and an array of times. This keeps one row per class and commit, however many
+    methods a class has.
+    """
+    methods = {(commit_report.report.test_name, method) for commit_report in commit_reports
+               for method in (commit_report.report.test_cases or {})}
+    with connection:
+        connection.executemany('INSERT OR IGNORE INTO test_methods (test_name, method_name) VALUES (?, ?)',
+                               sorted(methods))
+        # only the methods of the added reports are looked up, by the index of their unique constraint
+        method_ids = {method: connection.execute(
+            'SELECT method_id FROM test_methods WHERE test_name = ? AND method_name = ?', method).fetchone()[0]
+            for method in methods}
+
+        rows = [(commit_report.commit_id,) + encode_junit_report(commit_report.report)
+                + encode_test_cases(commit_report.report, method_ids) for commit_report in commit_reports]
+        connection.executemany(
+            'INSERT OR REPLACE INTO junit_reports (commit_id, test_name, test_run, failures, errors, time_elapsed, '
+            'skipped, unchanged, samples, contended, method_ids, method_times) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', rows)
+
+
+def add_resource_usage(connection: sqlite3.Connection, commit_id: str,
+                       usage_list: List[objects.ResourceUsage]) -> None:
+    """Stores the resource usage of the stages of a commit, replacing earlier ones. The commit must be known."""
+    rows = [(commit_id, usage.stage, usage.user_time, usage.system_time, usage.peak_rss, usage.voluntary_switches,
+             usage.involuntary_switches, usage.read_bytes, usage.write_bytes, usage.instructions, usage.cycles,
+             usage.cache_misses, usage.branch_misses) for usage in usage_list]
+    with connection:
+        connection.executemany(
+            'INSERT OR REPLACE INTO resource_usage (' + RESOURCE_COLUMNS + ') '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', rows)
+
+
+def load_resource_usage(connection: sqlite3.Connection,
+                        commit_ids: Iterable[str] = None) -> Dict[str, Dict[str, objects.ResourceUsage]]:
+    """Returns the resource usage of every commit, or only of the given commits, by commit id and stage."""
+    query = 'SELECT ' + RESOURCE_COLUMNS + ' FROM resource_usage'
+    if commit_ids is None:
+        rows = connection.execute(query)  # type: Iterable[tuple]
+    else:
+        rows = select_in(connection, query + ' WHERE commit_id IN ({marks})', commit_ids)
+
+    usage = {}  # type: Dict[str, Dict[str, objects.ResourceUsage]]
+    for row in rows:
+        usage.setdefault(row[0], {})[row[1]] = objects.ResourceUsage(
+            user_time=row[2], system_time=row[3], peak_rss=row[4], voluntary_switches=row[5],
+            involuntary_switches=row[6], read_bytes=row[7], write_bytes=row[8], stage=row[1], instructions=row[9],
+            cycles=row[10], cache_misses=row[11], branch_misses=row[12])
+    return usage
+
+
+def get_test_names(connection: sqlite3.Connection) -> List[str]:
+    return [row[0] for row in connection.execute('SELECT DISTINCT test_name FROM junit_reports ORDER BY test_name')]
+
+
+def get_junit_history(connection: sqlite3.Connection, test_name: str,
+                      limit: int = None) -> List[objects.JUnitCommitReport]:
+    """Returns the reports of a test class, starting with the most recent commit, optionally only the last ones."""
+    query = ('SELECT ' + JUNIT_COLUMNS + ' FROM junit_reports r JOIN commits c ON r.commit_id = c.commit_id '
+             'WHERE r.test_name = ? ORDER BY c.commit_time DESC, c.commit_id')
+    parameters = (test_name,)  # type: tuple
+    if limit is not None:
+        query += ' LIMIT ?'
+        parameters += (limit,)
+
+    return [decode_junit_row(row) for row in connection.execute(query, parameters)]
+
+
+def iter_junit_histories(connection: sqlite3.Connection) -> Iterator[Tuple[str, List[objects.JUnitCommitReport]]]:
+    """Yields the name and the reports of every test class, in the order of get_junit_history, in a single scan."""
+    rows = connection.execute(
+        'SELECT ' + JUNIT_COLUMNS + ' FROM junit_reports r JOIN commits c ON r.commit_id = c.commit_id '
+        'ORDER BY r.test_name, c.commit_time DESC, c.commit_id')
+    for test_name, test_rows in itertools.groupby(rows, key=lambda row: row[0]):
+        yield test_name, [decode_junit_row(row) for row in test_rows]
+
+
+def get_commit_ids(connection: sqlite3.Connection) -> List[str]:
+    """Returns the commits with reports, ordered like get_junit_history."""
+    return [row[0] for row in connection.execute(
+        'SELECT c.commit_id FROM commits c '
+        'WHERE EXISTS (SELECT 1 FROM junit_reports r WHERE r.commit_id = c.commit_id) '
+        'ORDER BY c.commit_time DESC, c.commit_id')]
+
+
+def get_commit_times(connection: sqlite3.Connection, commit_ids: Iterable[str] = None) -> Dict[str, int]:
+    """Returns the time of every commit, or only of the given commits, by commit id."""
+    if commit_ids is None:
+        return dict(connection.execute('SELECT commit_id, commit_time FROM commits'))
+    return dict(select_in(connection, 'SELECT commit_id, commit_time FROM commits WHERE commit_id IN ({marks})',
+                          commit_ids))
+
+
+def select_in(connection: sqlite3.Connection, query: str, values: Iterable[str]) -> Iterator[tuple]:
+    """Yields the rows of a query whose {marks} are replaced by the placeholders of a chunk of values at a time."""
+    values = list(values)
+    for start in range(0, len(values), MAX_VARIABLES):
+        chunk = values[start:start + MAX_VARIABLES]
+        yield from connection.execute(query.format(marks=', '.join('?' * len(chunk))), chunk)
+
+
+def get_previous_resource_commit(connection: sqlite3.Connection, commit_id: str) -> Optional[str]:
+    """Returns the next older commit the resource usage was recorded for, in the order of get_junit_history."""
+    row = connection.execute(
+        'SELECT c.commit_id FROM commits c JOIN commits t ON t.commit_id = ? '
+        'WHERE (c.commit_time < t.commit_time OR (c.commit_time = t.commit_time AND c.commit_id > t.commit_id)) '
+        'AND EXISTS (SELECT 1 FROM resource_usage r WHERE r.commit_id = c.commit_id) '
+        'ORDER BY c.commit_time DESC, c.commit_id LIMIT 1', (commit_id,)).fetchone()
+    return row[0] if row is not None else None
+
+
+def load_runtime_matrix(connection: sqlite3.Connection) -> objects.RuntimeMatrix:
+    """Loads the runtimes of all test classes into a commit x test matrix, ordered like get_junit_history."""
+    commit_ids = get_commit_ids(connection)
+    test_names = get_test_names(connection)
+    commit_rows = {commit_id: row for row, commit_id in enumerate(commit_ids)}
+    test_columns = {test_name: column for column, test_name in enumerate(test_names)}
+
+    cells = connection.execute('SELECT commit_id, test_name, time_elapsed, samples FROM junit_reports').fetchall()
+    rows = numpy.fromiter((commit_rows[cell[0]] for cell in cells), dtype=numpy.intp, count=len(cells))
+    columns = numpy.fromiter((test_columns[cell[1]] for cell in cells), dtype=numpy.intp, count=len(cells))
+
+    runtimes = numpy.full((len(commit_ids), len(test_names)), numpy.nan)
+    runtimes[rows, columns] = numpy.fromiter((cell[2] for cell in cells), dtype=numpy.float64, count=len(cells))
+
+    samples = {}  # type: Dict[Tuple[int, int], List[float]]
+    for index, cell in enumerate(cells):
+        if cell[3] is not None and len(cell[3]) > 8:
+            samples[(int(rows[index]), int(columns[index]))] = array('d', cell[3]).tolist()
+
+    return objects.RuntimeMatrix(commit_ids=commit_ids, test_names=test_names, runtimes=runtimes, samples=samples)
+
+
+def iter_method_runtime_matrices(connection: sqlite3.Connection) -> Iterator[objects.RuntimeMatrix]:
+    """Yields the mean times of the test methods of one test class after another as commit x method matrices.
+
+    The rows of every matrix are the commits of load_runtime_matrix, so only the times of a single class are held in
+    memory at a time. Methods are named after their class and themselves, e.g. org.example.ATest#testB.
+    """
+    commit_ids = get_commit_ids(connection)
+    commit_rows = {commit_id: row for row, commit_id in enumerate(commit_ids)}
+    methods = connection.execute(
+        'SELECT method_id, test_name, method_name FROM test_methods ORDER BY test_name, method_name')
+    for test_name, class_methods in itertools.groupby(methods, key=lambda method: method[1]):
+        class_methods = list(class_methods)
+        method_columns = {method[0]: column for column, method in enumerate(class_methods)}
+
+        runtimes = numpy.full((len(commit_ids), len(class_methods)), numpy.nan)
+        for commit_id, ids, times in connection.execute(
+                'SELECT commit_id, method_ids, method_times FROM junit_reports '
+                'WHERE test_name = ? AND method_ids IS NOT NULL', (test_name,)):
+            columns = [method_columns[method_id] for method_id in numpy.frombuffer(ids, dtype=numpy.int64).tolist()]
+            runtimes[commit_rows[commit_id], columns] = numpy.frombuffer(times, dtype=numpy.float64)
+
+        method_names = ['{test}#{method}'.format(test=test_name, method=method[2]) for method in class_methods]
+        yield objects.RuntimeMatrix(commit_ids=commit_ids, test_names=method_names, runtimes=runtimes, samples={})
+
+
+def get_junit_reports(connection: sqlite3.Connection, test_name: str,
+                      commit_ids: Iterable[str]) -> List[objects.JUnitCommitReport]:
+    """Returns the reports of a test class for the given commits, ordered like get_junit_history."""
+    commit_ids = list(commit_ids)
+    return [decode_junit_row(row) for row in connection.execute(
+        'SELECT ' + JUNIT_COLUMNS + ' FROM junit_reports r JOIN commits c ON r.commit_id = c.commit_id '
+        'WHERE r.test_name = ? AND r.commit_id IN ({marks}) ORDER BY c.commit_time DESC, c.commit_id'.format(
+            marks=', '.join('?' * len(commit_ids))), [test_name] + commit_ids)]
+
+
+def load_pending_reports(connection: sqlite3.Connection) -> Dict[str, Set[str]]:
+    """Returns the commits of the reports added since the running statistics were last updated, by test class.
+
+    Reports are registered as pending by a trigger on junit_reports, so replaced reports are pending as well.
+    """
+    pending = {}  # type: Dict[str, Set[str]]
+    for test_name, commit_id in connection.execute('SELECT test_name, commit_id FROM pending_reports'):
+        pending.setdefault(test_name, set()).add(commit_id)
+    return pending
+
+
+def load_running_statistics(connection: sqlite3.Connection, kind: str,
+                            name: str) -> Optional[objects.RunningStatistics]:
+    """Returns the running statistics of a test class (kind junit) or a benchmark (kind jmh), None if unknown."""
+    row = connection.execute(
+        'SELECT count, mean, m2, recent, last_commit_id, last_commit_time, last_value, unit, last_report '
+        'FROM running_statistics WHERE kind = ? AND name = ?', (kind, name)).fetchone()
+    if row is None:
+        return None
+    last_report = codec.decode_jmh_commit_report(json.loads(row[8])) if row[8] is not None else None
+    return objects.RunningStatistics(count=row[0], mean=row[1], m2=row[2], recent=array('d', row[3]).tolist(),
+                                     last_commit_id=row[4], last_commit_time=row[5], last_value=row[6], unit=row[7],
+                                     last_report=last_report)
+
+
+def save_junit_statistics(connection: sqlite3.Connection, test_name: str, running: objects.RunningStatistics,
+                          statistics: List[objects.JUnitStatistics], replace: bool) -> None:
+    """Stores the statistics of new commits of a test class and its running statistics, and clears its pending reports.
+
+    If statistics are replaced, those stored before are removed, e.g. because an older commit was added.
+    """
+    with connection:
+        if replace:
+            connection.execute('DELETE FROM junit_statistics WHERE test_name = ?', (test_name,))
+        connection.executemany(
+            'INSERT OR REPLACE INTO junit_statistics (test_name, ' + JUNIT_STATISTICS_COLUMNS + ') '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', [(test_name,) + tuple(row) for row in statistics])
+        save_running_statistics(connection, codec.JUNIT, test_name, running)
+        connection.execute('DELETE FROM pending_reports WHERE test_name = ?', (test_name,))
+
+
+def save_jmh_statistics(connection: sqlite3.Connection, name: str, running: objects.RunningStatistics,
+                        statistics: List[objects.JmhStatistics]) -> None:
+    """Stores the comparisons of new commits of a benchmark and its running statistics."""
+    with connection:
+        connection.executemany(
+            'INSERT OR REPLACE INTO jmh_statistics (' + JMH_STATISTICS_COLUMNS + ') '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', [tuple(row) for row in statistics])
+        save_running_statistics(connection, codec.JMH, name, running)
+
+
+def save_running_statistics(connection: sqlite3.Connection, kind: str, name: str,
+                            running: objects.RunningStatistics) -> None:
+    last_report = codec.encode(running.last_report) if running.last_report is not None else None
+    connection.execute(
+        'INSERT OR REPLACE INTO running_statistics (kind, name, count, mean, m2, recent, last_commit_id, '
+        'last_commit_time, last_value, unit, last_report) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+        (kind, name, running.count, running.mean, running.m2, array('d', running.recent).tobytes(),
+         running.last_commit_id, running.last_commit_time, running.last_value, running.unit, last_report))
+
+
+def load_salient_statistics(connection: sqlite3.Connection, delta_threshold: float,
+                            speedup_threshold: float) -> Dict[str, List[Dict[str, Any]]]:
+    """Returns the stored statistics exceeding a threshold by commit, like analyzer.find_salient_commits_in_matrix."""
+    salient_commits = {}  # type: Dict[str, List[Dict[str, Any]]]
+    for row in connection.execute(
+            'SELECT ' + ', '.join('s.' + column for column in objects.JUnitStatistics._fields) + ', s.test_name '
+            'FROM junit_statistics s JOIN commits c ON s.commit_id = c.commit_id '
+            'WHERE s.runtime_delta > ? OR s.speedup > ? ORDER BY c.commit_time DESC, c.commit_id, s.test_name',
+            (delta_threshold, speedup_threshold)):
+        data = dict(objects.JUnitStatistics(*row[:-1])._asdict())
+        data[const.TEST_NAME] = row[-1]
+        salient_commits.setdefault(row[0], []).append(data)
+    return salient_commits
+
+
+def is_empty(connection: sqlite3.Connection) -> bool:
+    return connection.execute('SELECT 1 FROM junit_reports LIMIT 1').fetchone() is None
+
+
+def import_json_reports(connection: sqlite3.Connection, path_to_log_dir: str, repo=None) -> int:
+    """Imports the one-file-per-test JSON reports written by earlier versions and returns the number of files.
+
+    Commit times are taken from the git repository if one is given. Otherwise the order of the reports within the
+    files is preserved by numbering the commits down from zero, which places them before all commits with real
+    commit times. The reports of a file are stored before the next one is read.
+    """
+    filenames = utils.get_filenames_by_type(path_to_log_dir, 'json')
+    commit_times = {}  # type: Dict[str, int]
+    imported = 0
+
+    for filename in filenames:
+        with open(filename) as file:
+            data = json.load(file)
+        # skips other JSON files, e.g. the JMH reports
+        if not isinstance(data, list) or len(data) == 0 or const.REPORT not in data[0]:
+            continue
+        imported += 1
+        commit_reports = [objects.build_junit_commit_report(report_data) for report_data in data]
+        commits = []  # type: List[Tuple[str, int]]
+        for commit_report in commit_reports:
+            if commit_report.commit_id not in commit_times:
+                commit_time = (repo.commit(commit_report.commit_id).committed_date if repo is not None
+                               else -len(commit_times))
+                commit_times[commit_report.commit_id] = commit_time
+                commits.append((commit_report.commit_id, commit_time))
+
+        add_commits(connection, commits)
+        add_junit_reports(connection, commit_reports)
+
+    return imported
+
+
+def encode_junit_report(report: objects.JUnitReport) -> tuple:
+    samples = array('d', report.samples).tobytes() if report.samples is not None else None
+    return (report.test_name, report.test_run, report.failures, report.errors, report.time_elapsed, report.skipped,
+            int(report.unchanged), samples, int(report.contended))
+
+
+def encode_test_cases(report: objects.JUnitReport, method_ids: Dict[Tuple[str, str], int]) -> tuple:
+    if report.test_cases is None:
+        return None, None
+    methods = sorted(report.test_cases)
+    ids = array('q', [method_ids[(report.test_name, method)] for method in methods])
+    times = array('d', [sum(report.test_cases[method]) / len(report.test_cases[method]) for method in methods])
+    return ids.tobytes(), times.tobytes()
+
+
+def decode_junit_row(row: tuple) -> objects.JUnitCommitReport:
+    """Decodes a row of JUNIT_COLUMNS, without the times of the test methods (see iter_method_runtime_matrices)."""
+    samples = None  # type: Optional[List[float]]
+    if row[8] is not None:
+        samples = array('d', row[8]).tolist()
+
+    report = objects.JUnitReport(test_name=row[0], test_run=row[2], failures=row[3], errors=row[4],
+                                 time_elapsed=row[5], skipped=row[6], unchanged=bool(row[7]), samples=samples,
+                                 contended=bool(row[9]))
+    return objects.JUnitCommitReport(commit_id=row[1], report=report)
@@ -0,0 +1,89 @@
+import math
+import unittest
+
+import numpy  # type: ignore
+
+import analyzer
+from model import objects
+
+
+def create_matrix(runtimes):
+    """Returns a runtime matrix of one test per column, the most recent commit first."""
+    runtimes = numpy.array(runtimes, dtype=numpy.float64)
+    return objects.RuntimeMatrix(commit_ids=['c{i}'.format(i=i) for i in range(runtimes.shape[0])],
+                                 test_names=['T{i}'.format(i=i) for i in range(runtimes.shape[1])],
+                                 runtimes=runtimes, samples={})
+
+
+class ThresholdTest(unittest.TestCase):
+
+    def setUp(self):
+        self.thresholds = analyzer.DELTA_THRESHOLD, analyzer.SPEEDUP_THRESHOLD
+
+    def tearDown(self):
+        analyzer.DELTA_THRESHOLD, analyzer.SPEEDUP_THRESHOLD = self.thresholds
+
+    def test_reads_the_thresholds_when_called(self):
+        # a delta of 3 s at a speedup of 1.43
+        matrix = create_matrix([[10.0], [7.0]])
+        self.assertTrue(analyzer.analyze_runtime_matrix(matrix).salient[0, 0])
+
+        analyzer.DELTA_THRESHOLD, analyzer.SPEEDUP_THRESHOLD = 5.0, 10.0
+        self.assertFalse(analyzer.analyze_runtime_matrix(matrix).salient[0, 0])
+
+    def test_method_thresholds_are_relative(self):
+        # 0.1 s -> 1.5 s is a large relative change below the delta threshold of test classes,
+        # 0.01 s -> 0.03 s triples the runtime but stays below the minimum delta
+        matrix = create_matrix([[1.5, 0.03], [0.1, 0.01]])
+        self.assertFalse(analyzer.analyze_runtime_matrix(matrix).salient[0].any())
+
+        statistics = analyzer.analyze_runtime_matrix(
+            matrix, delta_threshold=math.inf, speedup_threshold=analyzer.METHOD_SPEEDUP_THRESHOLD,
+            min_delta=analyzer.METHOD_MIN_DELTA, relative=True)
+        self.assertEqual(statistics.salient[0].tolist(), [True, False])
+        self.assertAlmostEqual(statistics.speedups[0, 0], 15.0)
+
+
+class RuntimeMatrixTest(unittest.TestCase):
+
+    def test_missing_cells_are_skipped(self):
+        matrix = create_matrix([[10.0, math.nan], [math.nan, 3.0], [4.0, 1.0]])
+        statistics = analyzer.analyze_runtime_matrix(matrix)
+
+        self.assertEqual(statistics.compared.tolist(), [[True, False], [False, True], [False, False]])
+        self.assertEqual((statistics.runtime_deltas[0, 0], statistics.speedups[0, 0]), (6.0, 2.5))
+        self.assertEqual((statistics.runtime_deltas[1, 1], statistics.speedups[1, 1]), (2.0, 3.0))
+        self.assertEqual(statistics.salient.tolist(), [[True, False], [False, True], [False, False]])
+        self.assertAlmostEqual(statistics.std_devs[0], math.sqrt(18.0))
+
+    def test_matches_analyze_report_list(self):
+        runtimes = [12.0, 9.5, 3.0, 0.5, 4.0, 4.5]
+        matrix = create_matrix([[runtime] for runtime in runtimes])
+        reports = [objects.JUnitCommitReport(commit_id=commit_id, report=objects.JUnitReport(
+            test_name='T0', test_run=1, failures=0, errors=0, time_elapsed=runtime, skipped=0))
+            for commit_id, runtime in zip(matrix.commit_ids, runtimes)]
+
+        statistics = analyzer.create_benchmark_statistics(matrix, analyzer.analyze_runtime_matrix(matrix), 0)
+        expected = analyzer.analyze_report_list(reports)
+        self.assertEqual(statistics.junit_statistics, expected.junit_statistics)
+        self.assertAlmostEqual(statistics.std_dev, expected.std_dev)
+
+
+class CreateJunitStatisticsTest(unittest.TestCase):
+
+    def test_summarizes_the_samples(self):
+        statistics = analyzer.create_junit_statistics('c1', 2.5, 1.25, 0.5, [1.0, 2.0, 3.0, 4.0])
+        self.assertEqual((statistics.sample_count, statistics.median), (4, 2.5))
+        self.assertAlmostEqual(statistics.variance, 5 / 3)
+        # the t quantile for 3 degrees of freedom is 3.182
+        self.assertAlmostEqual(statistics.ci_lower, 2.5 - 3.182 * math.sqrt(5 / 3) / 2, places=2)
+        self.assertAlmostEqual(statistics.ci_upper, 2.5 + 3.182 * math.sqrt(5 / 3) / 2, places=2)
+
+    def test_a_single_sample_is_its_own_interval(self):
+        statistics = analyzer.create_junit_statistics('c1', 2.0, 1.0, 0.0, [2.0])
+        self.assertEqual((statistics.sample_count, statistics.median, statistics.variance), (1, 2.0, 0.0))
+        self.assertEqual((statistics.ci_lower, statistics.ci_upper), (2.0, 2.0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,41 @@
+import os.path
+import shutil
+import tempfile
+import unittest
+
+from git import Actor, Repo  # type: ignore
+
+import cache
+import const
+from model import objects
+
+
+class BuildCacheKeysTest(unittest.TestCase):
+
+    def setUp(self):
+        self.repo_dir = tempfile.mkdtemp()
+        self.repo = Repo.init(self.repo_dir)
+        with open(os.path.join(self.repo_dir, const.POM), 'w') as file:
+            file.write('<project/>')
+        self.repo.index.add([const.POM])
+        author = Actor('author', 'author@example.org')
+        self.commit = self.repo.index.commit('pom', author=author, committer=author)
+        self.settings = objects.MeasurementSettings(invocation_count=3)
+
+    def tearDown(self):
+        self.repo.close()
+        shutil.rmtree(self.repo_dir)
+
+    def build_keys(self, **options):
+        return cache.build_cache_keys(self.repo, self.commit, self.settings, 'environment', **options)
+
+    def test_workers_are_part_of_the_keys(self):
+        keys = self.build_keys()
+        self.assertEqual(self.build_keys(), keys)
+        self.assertNotEqual(self.build_keys(worker_memory='2g'), keys)
+        self.assertNotEqual(self.build_keys(worker_cpus=[{0, 1}, {2, 3}]), keys)
+        self.assertNotEqual(self.build_keys(worker_cpus=[{0, 1}, {2, 3}]), self.build_keys(worker_cpus=[{0, 1, 2, 3}]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+
+import numpy  # type: ignore
+
+import changepoint
+
+
+class AdjustPValuesTest(unittest.TestCase):
+
+    def test_matches_the_benjamini_hochberg_procedure(self):
+        adjusted = changepoint.adjust_p_values([0.01, 0.04, 0.03, 0.5])
+        for value, expected in zip(adjusted, [0.04, 0.04 * 4 / 3, 0.04 * 4 / 3, 0.5]):
+            self.assertAlmostEqual(value, expected)
+
+    def test_is_capped_at_one(self):
+        self.assertEqual(changepoint.adjust_p_values([0.9, 0.8]), [0.9, 0.9])
+        self.assertEqual(changepoint.adjust_p_values([1.0, 1.0, 0.9]), [1.0, 1.0, 1.0])
+        self.assertEqual(changepoint.adjust_p_values([]), [])
+
+
+class DetectChangePointsTest(unittest.TestCase):
+
+    def test_finds_shifts_among_many_series(self):
+        random_state = numpy.random.RandomState(1)
+        series_list = [('noise{i}'.format(i=i), list(range(200)), random_state.normal(0, 1, 200))
+                       for i in range(100)]
+        values = random_state.normal(0, 1, 200)
+        values[120:] += 3
+        series_list.append(('shift', list(range(200)), values))
+
+        change_points = changepoint.detect_change_points(series_list)
+
+        self.assertIn(('shift', 120), [(point.name, point.commit_id) for point in change_points])
+        shift = next(point for point in change_points if point.name == 'shift')
+        self.assertAlmostEqual(shift.shift, 3, delta=0.5)
+        self.assertLess(shift.p_value, changepoint.SIGNIFICANCE_LEVEL)
+        # noise alone is rarely flagged at a false discovery rate of 5%
+        self.assertLessEqual(len([point for point in change_points if point.name != 'shift']), 2)
+
+    def test_skips_constant_and_short_series(self):
+        series_list = [('constant', list(range(50)), [1.0] * 50), ('short', [0, 1, 2], [1.0, 5.0, 9.0])]
+        self.assertEqual(changepoint.detect_change_points(series_list), [])
+
+    def test_stops_drawing_permutations_once_a_split_is_clearly_insignificant(self):
+        segment = numpy.random.RandomState(2).normal(0, 1, 500)
+        _, statistic = changepoint.find_split(segment)
+        # a permuted maximum reaching the statistic is likely, so the p-value is estimated within the first chunk
+        p_values = changepoint.compute_p_values([segment], [statistic * 0.5], numpy.random.RandomState(0))
+        self.assertAlmostEqual(p_values[0], 1.0, delta=0.1)
+
+    def test_p_values_are_not_smaller_than_the_permutations_allow(self):
+        segment = numpy.concatenate([numpy.zeros(50), numpy.ones(50)]) + numpy.linspace(0, 0.01, 100)
+        _, statistic = changepoint.find_split(segment)
+        p_values = changepoint.compute_p_values([segment], [statistic], numpy.random.RandomState(0))
+        self.assertGreaterEqual(p_values[0], 1 / (changepoint.PERMUTATIONS + 1))
+        self.assertLess(p_values[0], changepoint.SIGNIFICANCE_LEVEL)
+
+
+if __name__ == '__main__':
+    unittest.main()
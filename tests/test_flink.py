@@ -0,0 +1,122 @@
+import json
+import os
+import re
+import socketserver
+import stat
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+from model import objects
+from run import flink
+
+# prints the id of the submitted job, derived from its parallelism, and logs when it starts and ends
+FLINK_SCRIPT = '''#!/bin/sh
+parallelism=$3
+echo "start $parallelism" >> {log}
+echo "Job has been submitted with JobID $(printf '%032x' "$parallelism")"
+sleep 0.5
+echo "end $parallelism" >> {log}
+exit {returncode}
+'''
+
+
+class JobManagerHandler(BaseHTTPRequestHandler):
+    """Answers the requests of run/flink.py like the REST API of a JobManager with 4 free slots."""
+
+    def do_GET(self):
+        match = re.fullmatch(r'/jobs/([0-9a-f]{32})(/vertices/source/backpressure)?', self.path)
+        if self.path == '/overview':
+            self.send_json({'slots-available': 4})
+        elif match is not None and match.group(2) is not None:
+            self.send_json({'status': 'ok', 'subtasks': [{'ratio': 0.2}, {'ratio': 0.5}]})
+        elif match is not None:
+            parallelism = int(match.group(1), 16)
+            self.send_json({'name': 'pipeline', 'state': 'FINISHED', 'duration': 1000 * parallelism, 'vertices': [
+                {'id': 'source', 'name': 'Source', 'parallelism': parallelism, 'status': 'RUNNING',
+                 'duration': 2000, 'metrics': {'read-records': 4000, 'write-records': 2000}}]})
+        else:
+            self.send_error(404)
+
+    def send_json(self, data):
+        body = json.dumps(data).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class ThreadingServer(socketserver.ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class RunSweepTest(unittest.TestCase):
+
+    def setUp(self):
+        self.poll_interval = flink.POLL_INTERVAL
+        flink.POLL_INTERVAL = 0.05
+        self.server = ThreadingServer(('localhost', 0), JobManagerHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.rest_url = 'http://localhost:{port}'.format(port=self.server.server_address[1])
+        self.flink_dir = tempfile.TemporaryDirectory()
+        self.path_to_log = os.path.join(self.flink_dir.name, 'submissions.log')
+
+    def tearDown(self):
+        flink.POLL_INTERVAL = self.poll_interval
+        self.server.shutdown()
+        self.server.server_close()
+        self.flink_dir.cleanup()
+
+    def create_flink_script(self, returncode: int = 0) -> None:
+        os.makedirs(os.path.join(self.flink_dir.name, 'bin'))
+        path_to_script = os.path.join(self.flink_dir.name, 'bin', 'flink')
+        with open(path_to_script, 'w') as file:
+            file.write(FLINK_SCRIPT.format(log=self.path_to_log, returncode=returncode))
+        os.chmod(path_to_script, os.stat(path_to_script).st_mode | stat.S_IEXEC)
+
+    def read_submissions(self):
+        with open(self.path_to_log) as file:
+            return [(event, int(parallelism)) for event, parallelism in (line.split() for line in file)]
+
+    def test_submits_levels_concurrently_within_the_free_slots(self):
+        self.create_flink_script()
+        config = objects.FlinkConfig(path=self.flink_dir.name, parallelisms=[8, 2, 1, 4], jar='pipeline.jar',
+                                     rest_url=self.rest_url)
+
+        reports = flink.run_sweep('pipeline.jar', config)
+
+        self.assertEqual([report.parallelism for report in reports], [1, 2, 4, 8])
+        self.assertEqual([report.runtime for report in reports], [1000, 2000, 4000, 8000])
+        vertex = reports[0].vertices[0]
+        self.assertEqual((vertex.records_in, vertex.records_out), (2000.0, 1000.0))
+        self.assertEqual((vertex.backpressure, vertex.peak_backpressure), (0.5, 0.5))
+
+        occupied, peak, running = 0, 0, set()
+        for event, parallelism in self.read_submissions():
+            if event == 'start':
+                # a level needing more slots than there are runs alone
+                self.assertTrue(occupied + parallelism <= 4 or len(running) == 0)
+                running.add(parallelism)
+                occupied += parallelism
+                peak = max(peak, len(running))
+            else:
+                running.remove(parallelism)
+                occupied -= parallelism
+        self.assertEqual(peak, 2)
+
+    def test_exits_if_a_submission_fails(self):
+        self.create_flink_script(returncode=1)
+        config = objects.FlinkConfig(path=self.flink_dir.name, parallelisms=[1, 2], jar='pipeline.jar',
+                                     rest_url=self.rest_url, slots=4)
+
+        with self.assertRaises(SystemExit):
+            flink.run_sweep('pipeline.jar', config)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import os.path
+import shutil
+import tempfile
+import unittest
+
+import numpy  # type: ignore
+
+import const
+import incremental
+import store
+from model import objects
+
+
+def create_report(commit_id, time_elapsed):
+    return objects.JUnitCommitReport(commit_id=commit_id, report=objects.JUnitReport(
+        test_name='T', test_run=1, failures=0, errors=0, time_elapsed=time_elapsed, skipped=0))
+
+
+class AddValueTest(unittest.TestCase):
+
+    def test_matches_the_mean_and_variance(self):
+        values = [3.0, 1.5, 4.0, 1.0, 5.5, 9.0, 2.5]
+        running = None
+        for index, value in enumerate(values):
+            running = incremental.add_value(running, value, 'c{i}'.format(i=index), index)
+
+        self.assertEqual(running.count, len(values))
+        self.assertAlmostEqual(running.mean, numpy.mean(values))
+        self.assertAlmostEqual(running.m2 / (running.count - 1), numpy.var(values, ddof=1))
+        self.assertEqual((running.last_commit_id, running.last_value), ('c6', 2.5))
+
+    def test_keeps_the_recent_values(self):
+        running = None
+        for index in range(incremental.WINDOW_SIZE + 5):
+            running = incremental.add_value(running, float(index), 'c{i}'.format(i=index), index)
+
+        self.assertEqual(running.recent, [float(index) for index in range(5, incremental.WINDOW_SIZE + 5)])
+
+
+class AnalyzeJunitReportsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.log_dir = tempfile.mkdtemp()
+        self.connection = store.open_store(self.log_dir)
+
+    def tearDown(self):
+        self.connection.close()
+        shutil.rmtree(self.log_dir)
+
+    def add_reports(self, runtimes):
+        store.add_commits(self.connection, [(commit_id, commit_time) for commit_id, commit_time, _ in runtimes])
+        store.add_junit_reports(self.connection, [create_report(commit_id, time_elapsed)
+                                                  for commit_id, _, time_elapsed in runtimes])
+
+    def read(self, filename):
+        with open(os.path.join(self.log_dir, const.STATISTICS_DIR, filename)) as file:
+            return file.read()
+
+    def test_appends_the_statistics_of_new_commits(self):
+        self.add_reports([('c1', 1, 10.0), ('c2', 2, 10.0)])
+        incremental.analyze_junit_reports(self.log_dir)
+        self.add_reports([('c3', 3, 30.0)])
+        targets = incremental.analyze_junit_reports(self.log_dir)
+
+        statistics = self.read('T')
+        self.assertEqual(statistics.count('c2'), 1)
+        self.assertEqual(statistics.count('c3'), 1)
+        # the rows of the second update follow those of the first one
+        self.assertLess(statistics.index('c2'), statistics.index('c3'))
+        salient_commits = self.read('salient_commits.txt')
+        self.assertEqual(salient_commits.count('The following commits'), 1)
+        self.assertIn('c3:', salient_commits)
+        self.assertEqual([(target.commit_id, target.previous_commit_id) for target in targets], [('c3', 'c2')])
+
+    def test_rewrites_the_statistics_if_an_older_commit_is_added(self):
+        self.add_reports([('c1', 1, 10.0), ('c3', 3, 10.0)])
+        incremental.analyze_junit_reports(self.log_dir)
+        self.add_reports([('c2', 2, 30.0)])
+        incremental.analyze_junit_reports(self.log_dir)
+
+        statistics = self.read('T')
+        self.assertEqual([statistics.count(commit_id) for commit_id in ['c2', 'c3']], [1, 1])
+        # the most recent commit first
+        self.assertLess(statistics.index('c3'), statistics.index('c2'))
+        self.assertIn('c2:', self.read('salient_commits.txt'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import asyncio
+import os
+import threading
+import time
+import unittest
+from unittest import mock
+
+import orchestrator
+from model import objects
+
+
+class RunPipelinedTest(unittest.TestCase):
+    """Runs the stages with builds and measurements that only log when they start and end."""
+
+    def setUp(self):
+        self.events = []
+        self.lock = threading.Lock()
+
+    def log(self, *event):
+        with self.lock:
+            self.events.append(event)
+
+    async def build_commit(self, worktree, commit_id, settings):
+        self.log('build', commit_id, worktree)
+        await asyncio.sleep(0.05)
+        self.log('built', commit_id, worktree)
+
+    def measure_commit(self, worktree, commit_id, settings, previous_commit_id, prebuilt):
+        self.log('measure', commit_id, worktree)
+        time.sleep(0.2)
+        self.log('measured', commit_id, worktree)
+        return commit_id, previous_commit_id, prebuilt
+
+    def run_pipelined(self, commit_ids, previous_commits):
+        cpus = os.sched_getaffinity(0)
+        with mock.patch('parallel.prepare_worktrees', return_value=['w0', 'w1']), \
+                mock.patch('orchestrator.build_commit', self.build_commit), \
+                mock.patch('runner.measure_commit', self.measure_commit):
+            return list(orchestrator.run_pipelined('repo', commit_ids, objects.MeasurementSettings(invocation_count=1),
+                                                   previous_commits, cpus, cpus))
+
+    def test_builds_the_next_commit_while_measuring(self):
+        measurements = self.run_pipelined(['c1', 'c2', 'c3'], {'c1': 'c2', 'c2': 'c3'})
+
+        self.assertEqual(measurements, [('c1', 'c2', True), ('c2', 'c3', True), ('c3', None, True)])
+        index = self.events.index
+        self.assertLess(index(('build', 'c2', 'w1')), index(('measured', 'c1', 'w0')))
+        # a single commit is built ahead, c3 needs the worktree of c1
+        self.assertLess(index(('measured', 'c1', 'w0')), index(('build', 'c3', 'w0')))
+        measure_events = [event for event in self.events if event[0] in ('measure', 'measured')]
+        self.assertEqual([event[:2] for event in measure_events],
+                         [(stage, commit_id) for commit_id in ['c1', 'c2', 'c3'] for stage in ('measure', 'measured')])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,29 @@
+import unittest
+
+import runner
+from model import objects
+
+
+def create_report(test_name, time_elapsed, **fields):
+    return objects.JUnitReport(test_name=test_name, test_run=1, failures=0, errors=0, time_elapsed=time_elapsed,
+                               skipped=0, **fields)
+
+
+class MergeInvocationsTest(unittest.TestCase):
+
+    def test_keeps_the_runtime_of_every_invocation(self):
+        invocations = [[create_report('A', 1.0, test_cases={'testX': [0.5]}), create_report('B', 4.0)],
+                       [create_report('A', 3.0, test_cases={'testX': [1.5]}, contended=True)],
+                       [create_report('A', 2.0, test_cases={'testX': [1.0]}), create_report('B', 6.0)]]
+
+        merged = {report.test_name: report for report in runner.merge_invocations(invocations)}
+        self.assertEqual(merged['A'].samples, [1.0, 3.0, 2.0])
+        self.assertEqual(merged['A'].time_elapsed, 2.0)
+        self.assertEqual(merged['A'].test_cases, {'testX': [0.5, 1.5, 1.0]})
+        self.assertTrue(merged['A'].contended)
+        self.assertEqual((merged['B'].samples, merged['B'].time_elapsed), ([4.0, 6.0], 5.0))
+        self.assertFalse(merged['B'].contended)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import json
+import os.path
+import shutil
+import tempfile
+import unittest
+
+import numpy  # type: ignore
+
+import const
+import store
+from model import objects
+
+
+def create_report_data(commit_id, test_name, time_elapsed):
+    return {const.COMMIT: commit_id, const.REPORT: {'test_name': test_name, 'test_run': 1, 'failures': 0,
+                                                   'errors': 0, 'time_elapsed': time_elapsed, 'skipped': 0}}
+
+
+class StoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.log_dir = tempfile.mkdtemp()
+        self.connection = store.open_store(self.log_dir)
+
+    def tearDown(self):
+        self.connection.close()
+        shutil.rmtree(self.log_dir)
+
+    def write_json(self, filename, data):
+        with open(os.path.join(self.log_dir, filename), 'w') as file:
+            json.dump(data, file)
+
+    def test_imports_the_reports_of_every_file(self):
+        # the most recent commit first, c1 was not measured for B
+        self.write_json('A.json', [create_report_data(commit_id, 'A', time) for commit_id, time
+                                   in [('c3', 3.0), ('c2', 2.0), ('c1', 1.0)]])
+        self.write_json('B.json', [create_report_data(commit_id, 'B', time) for commit_id, time
+                                   in [('c3', 6.0), ('c2', 4.0)]])
+        self.write_json('jmh.json', [{'benchmark': 'b'}])
+
+        self.assertEqual(store.import_json_reports(self.connection, self.log_dir), 2)
+        self.assertEqual(store.get_commit_ids(self.connection), ['c3', 'c2', 'c1'])
+        self.assertEqual([(report.commit_id, report.report.time_elapsed)
+                          for report in store.get_junit_history(self.connection, 'B')], [('c3', 6.0), ('c2', 4.0)])
+
+    def test_stores_the_times_of_the_test_methods(self):
+        store.add_commits(self.connection, [('c1', 1), ('c2', 2)])
+        store.add_junit_reports(self.connection, [
+            objects.JUnitCommitReport(commit_id=commit_id, report=objects.JUnitReport(
+                test_name='A', test_run=1, failures=0, errors=0, time_elapsed=3.0, skipped=0, test_cases=test_cases))
+            for commit_id, test_cases in [('c1', {'testX': [1.0, 3.0]}), ('c2', {'testX': [2.0], 'testY': [1.0]})]])
+
+        matrix = next(store.iter_method_runtime_matrices(self.connection))
+        self.assertEqual(matrix.test_names, ['A#testX', 'A#testY'])
+        numpy.testing.assert_array_equal(matrix.runtimes, [[2.0, 1.0], [2.0, numpy.nan]])
+
+    def test_loads_the_runtime_matrix(self):
+        store.add_commits(self.connection, [('c1', 1), ('c2', 2), ('c3', 3)])
+        store.add_junit_reports(self.connection, [
+            objects.JUnitCommitReport(commit_id=commit_id, report=objects.JUnitReport(
+                test_name=test_name, test_run=1, failures=0, errors=0, time_elapsed=time, skipped=0, samples=samples))
+            for commit_id, test_name, time, samples in [('c1', 'A', 1.0, None), ('c3', 'A', 3.0, [2.0, 4.0]),
+                                                        ('c2', 'B', 2.0, None)]])
+
+        matrix = store.load_runtime_matrix(self.connection)
+        self.assertEqual((matrix.commit_ids, matrix.test_names), (['c3', 'c2', 'c1'], ['A', 'B']))
+        numpy.testing.assert_array_equal(matrix.runtimes, [[3.0, numpy.nan], [numpy.nan, 2.0], [1.0, numpy.nan]])
+        self.assertEqual(matrix.samples, {(0, 0): [2.0, 4.0]})
+
+
+if __name__ == '__main__':
+    unittest.main()
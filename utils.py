@@ -1,6 +1,6 @@
 import glob
 import os.path
-from typing import List, Dict, Any
+from typing import List, Set
 
 import const
 
@@ -35,6 +35,18 @@ def create_dir(path: str) -> str:
     return path
 
 
+def parse_cpu_list(cpu_list: str) -> Set[int]:
+    """Parses a cpu list in the format used by taskset and /sys, e.g. '0-3,8,10-11', to a set of cpu ids."""
+    cpus = set()  # type: Set[int]
+    for part in cpu_list.split(','):
+        if '-' in part:
+            first, last = part.split('-')
+            cpus.update(range(int(first), int(last) + 1))
+        elif part:
+            cpus.add(int(part))
+    return cpus
+
+
 def is_named_tuple(x):
     """Copy pasted from stack overflow
 
@@ -66,19 +78,3 @@ def unpack(obj):
     else:
         return obj
 
-
-def compute_speedup(gradoop_benchmark_report: List[Dict[str, Any]]) -> None:
-    mean_runtime_p1 = 'undefined'
-
-    for row in gradoop_benchmark_report:
-        if row['parallelism'] is 1:
-            mean_runtime_p1 = row['mean_runtime']
-            break
-
-    speedup_list = []
-    for row in gradoop_benchmark_report:
-        if row['parallelism'] > 1:
-            key = 'speedup_p' + str(row['parallelism'])
-            value = mean_runtime_p1 / row['mean_runtime']
-            speedup = {key: value}
-            speedup_list.append(speedup)